@@ -1,4 +1,9 @@
+import datetime
+
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.admin.views.main import ChangeList
 
 from metadata.admin_base import TextMetadataInline
 
@@ -7,7 +12,52 @@ from schedule.models import BlockShowRule, BlockRangeRule
 from schedule.models import Show, ShowCredit
 from schedule.models import ShowTextMetadata
 from schedule.models import Season
+from schedule.models import Term
 from schedule.models import Timeslot
+from schedule.utils import clash, memo, metadata
+from schedule.utils import recurring, reschedule, rollover
+from schedule.utils.exceptions import ScheduleConflictError
+
+
+## Prefetching ##
+
+class PrefetchChangeList(ChangeList):
+    """A change list that has its ModelAdmin prefetch what the rows of the
+    page shown need, once the page has been picked.
+    """
+    def get_results(self, request):
+        super(PrefetchChangeList, self).get_results(request)
+        self.result_list = self.model_admin.prefetch(list(self.result_list))
+
+
+class PrefetchAdmin(admin.ModelAdmin):
+    """A ModelAdmin whose change list loads the related objects and text
+    metadata of its rows in bulk, rather than with queries per row.
+    """
+    def get_changelist(self, request, **kwargs):
+        return PrefetchChangeList
+
+    def prefetch(self, items):
+        """Loads what the change list shows for a page of items.
+
+        Returns:
+            the items.
+        """
+        return items
+
+
+def attach_lookups(seasons=(), shows=()):
+    """Gives seasons their terms, and shows their show types, from the
+    memoised lists of each instead of a query or join per row.
+    """
+    terms = dict((term.pk, term) for term in memo.terms())
+    for season in seasons:
+        if season.term_id in terms:
+            season.term = terms[season.term_id]
+    show_types = memo.show_types()
+    for show in shows:
+        if show.show_type_id in show_types:
+            show.show_type = show_types[show.show_type_id]
 
 
 ## BlockShowRule ##
@@ -31,9 +81,111 @@ class BlockAdmin(admin.ModelAdmin):
 
 ## Timeslot ##
 
-class TimeslotAdmin(admin.ModelAdmin):
+class RescheduleForm(forms.Form):
+    """The options of the timeslot rescheduling action."""
+    offset = forms.IntegerField(
+        required=False,
+        initial=0,
+        help_text='Minutes to move the timeslots by.'
+    )
+    resize = forms.IntegerField(
+        required=False,
+        initial=0,
+        help_text='Minutes to lengthen the timeslots by.'
+    )
+    local_time = forms.BooleanField(
+        required=False,
+        help_text='Keep local start times across DST changes.'
+    )
+
+
+class TimeslotActionForm(ActionForm, RescheduleForm):
+    pass
+
+
+class TimeslotAdmin(PrefetchAdmin):
     date_hierarchy = 'start_time'
     list_display = ('season', 'start_time', 'duration')
+    actions = ['find_location_clashes', 'reschedule']
+    action_form = TimeslotActionForm
+
+    def queryset(self, request):
+        return super(TimeslotAdmin, self).queryset(
+            request
+        ).select_related('season__show')
+
+    def prefetch(self, items):
+        seasons = [slot.season for slot in items]
+        shows = [season.show for season in seasons]
+        attach_lookups(seasons, shows)
+        metadata.prefetch_shows(shows, keys=('title',))
+        return items
+
+    # Number of clashes to list in the admin message.
+    CLASHES_SHOWN = 20
+
+    def find_location_clashes(self, request, queryset):
+        """Reports the location clashes involving the selected timeslots."""
+        selected = list(queryset.select_related('season'))
+        if not selected:
+            return
+        start = min(slot.start_time for slot in selected)
+        end = max(slot.end_time for slot in selected)
+        ids = set(slot.pk for slot in selected)
+        clashes = [
+            found for found in clash.find(
+                Timeslot.objects.in_range(start, end)
+            )
+            if found.first.pk in ids or found.second.pk in ids
+        ]
+
+        if not clashes:
+            self.message_user(request, 'No location clashes found.')
+        for found in clashes[:self.CLASHES_SHOWN]:
+            self.message_user(
+                request,
+                u'{0}: {1} clashes with {2}'.format(
+                    found.location,
+                    found.first,
+                    found.second
+                )
+            )
+        if len(clashes) > self.CLASHES_SHOWN:
+            self.message_user(
+                request,
+                '...and {} more.'.format(len(clashes) - self.CLASHES_SHOWN)
+            )
+    find_location_clashes.short_description = (
+        'Find location clashes with selected timeslots'
+    )
+
+    def reschedule(self, request, queryset):
+        """Moves and resizes the selected timeslots, by the minutes given
+        alongside the action, in bulk.
+        """
+        form = RescheduleForm(request.POST)
+        if not form.is_valid():
+            self.message_user(request, 'Give whole numbers of minutes.')
+            return
+        try:
+            changed = reschedule.shift(
+                queryset,
+                offset=datetime.timedelta(
+                    minutes=form.cleaned_data['offset'] or 0
+                ),
+                resize=datetime.timedelta(
+                    minutes=form.cleaned_data['resize'] or 0
+                ),
+                local=form.cleaned_data['local_time']
+            )
+        except ValueError as error:
+            self.message_user(request, unicode(error))
+        else:
+            self.message_user(
+                request,
+                'Rescheduled {} timeslots.'.format(changed)
+            )
+    reschedule.short_description = 'Move or resize selected timeslots'
 
 
 class TimeslotInline(admin.TabularInline):
@@ -52,11 +204,98 @@ class ShowCreditAdmin(admin.ModelAdmin):
 
 ## Season ##
 
-class SeasonAdmin(admin.ModelAdmin):
+class SeasonAdmin(PrefetchAdmin):
     model_display = ('show', 'term')
     inlines = [
         TimeslotInline
     ]
+    actions = ['repeat_weekly', 'roll_over']
+
+    def queryset(self, request):
+        return super(SeasonAdmin, self).queryset(
+            request
+        ).select_related('show')
+
+    def prefetch(self, items):
+        shows = [season.show for season in items]
+        attach_lookups(items, shows)
+        metadata.prefetch_shows(shows, keys=('title',))
+        return items
+
+    def repeat_weekly(self, request, queryset):
+        """Fills the rest of each selected season's term with weekly repeats
+        of its first timeslot.
+        """
+        for season in queryset.select_related('term'):
+            try:
+                created = recurring.repeat_weekly(season)
+            except ValueError as error:
+                message = unicode(error)
+            except ScheduleConflictError as error:
+                message = u'{}: {}  Nothing was scheduled.'.format(
+                    season,
+                    error
+                )
+            else:
+                message = u'{}: scheduled {} timeslots.'.format(
+                    season,
+                    len(created)
+                )
+            self.message_user(request, message)
+    repeat_weekly.short_description = (
+        'Repeat first timeslot weekly for the rest of the term'
+    )
+
+    def roll_over(self, request, queryset):
+        """Rolls each selected season over into the term following its own,
+        with the same weekly timeslots.
+        """
+        by_term = {}
+        for season in queryset.select_related('term'):
+            following = list(Term.objects.filter(
+                start_date__gte=season.term.end_date
+            ).order_by('start_date')[:1])
+            if not following:
+                self.message_user(
+                    request,
+                    u'{}: there is no following term.'.format(season)
+                )
+                continue
+            term = following[0]
+            by_term.setdefault(term.pk, (term, []))[1].append(season)
+
+        for term, seasons in by_term.itervalues():
+            try:
+                result = rollover.rollover(seasons, term)
+            except ValueError as error:
+                message = u'{}: {}'.format(term, error)
+            except ScheduleConflictError as error:
+                message = u'{}: {}  Nothing was rolled over.'.format(
+                    term,
+                    error
+                )
+            else:
+                message = u'{}: created {} seasons and {} timeslots.'.format(
+                    term,
+                    result.seasons,
+                    result.timeslots
+                )
+                if result.skipped:
+                    message += (
+                        u'  Skipped {} timeslots at local times the clocks'
+                        u' go forward past: {}'.format(
+                            len(result.skipped),
+                            u', '.join(
+                                u'{} at {:%Y-%m-%d %H:%M}'.format(
+                                    skip.season,
+                                    skip.start
+                                )
+                                for skip in result.skipped
+                            )
+                        )
+                    )
+            self.message_user(request, message)
+    roll_over.short_description = 'Roll over into the following term'
 
 
 class SeasonInline(admin.TabularInline):
@@ -69,9 +308,9 @@ class ShowTextMetadataInline(TextMetadataInline):
     model = ShowTextMetadata
 
 
-class ShowAdmin(admin.ModelAdmin):
+class ShowAdmin(PrefetchAdmin):
     date_hierarchy = 'date_submitted'
-    list_display = ('title', 'description', 'date_submitted')
+    list_display = ('title', 'show_type', 'description', 'date_submitted')
     list_filter = ('show_type',)
     inlines = [
         SeasonInline,
@@ -88,6 +327,11 @@ class ShowAdmin(admin.ModelAdmin):
     def description(self, obj):
         return obj.description
 
+    def prefetch(self, items):
+        attach_lookups(shows=items)
+        metadata.prefetch_shows(items)
+        return items
+
 
 def register(site):
     """
@@ -0,0 +1,52 @@
+"""Management command for freezing closed terms into schedule archives."""
+
+from optparse import make_option
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from schedule.models import Term
+from schedule.utils import archive
+
+
+class Command(BaseCommand):
+    """Freezes the timeslots of closed terms into archives, which the
+    schedule then reads instead of the database.
+
+    Run this again for a term if its schedule is changed after it closes.
+    See schedule.utils.archive for details.
+
+    """
+    args = '[term ID ...]'
+    help = 'Freezes closed terms into memory-mapped schedule archives.'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--all',
+            action='store_true',
+            dest='all',
+            default=False,
+            help='Archive every closed term.'
+        ),
+    )
+
+    def handle(self, *args, **options):
+        if not getattr(settings, 'SCHEDULE_ARCHIVE_DIR', None):
+            raise CommandError('Set SCHEDULE_ARCHIVE_DIR first.')
+
+        if options['all']:
+            terms = [term for term in Term.objects.all()
+                     if archive.is_closed(term)]
+        elif args:
+            terms = list(Term.objects.filter(pk__in=args))
+            if len(terms) != len(set(args)):
+                raise CommandError('Some of those terms do not exist.')
+        else:
+            raise CommandError('Give some term IDs, or --all.')
+
+        for term in terms:
+            if not archive.is_closed(term):
+                raise CommandError('{} has not closed yet.'.format(term))
+            count = archive.freeze(term)
+            self.stdout.write(
+                u'{}: archived {} timeslots.\n'.format(term, count)
+            )
@@ -0,0 +1,112 @@
+"""Management command for benchmarking the schedule pipeline."""
+
+import datetime
+import json
+from optparse import make_option
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from people.models import Person
+
+from schedule.utils import benchmark, nltime, synthetic
+
+
+# The Monday the synthetic schedule starts on.
+BENCHMARK_START = datetime.date(2012, 10, 8)
+
+
+class Command(BaseCommand):
+    """Benchmarks the schedule pipeline against a synthetic schedule.
+
+    The benchmarks run in a freshly created test database, which is filled
+    using schedule.utils.synthetic and destroyed afterwards, so this never
+    touches the real schedule.  Results are written as JSON, so that runs
+    can be compared.
+
+    """
+    help = 'Benchmarks the schedule pipeline on synthetic data.'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--sizes',
+            dest='sizes',
+            default='1,4,52,520',
+            help='Comma-separated range sizes to benchmark, in weeks.'
+        ),
+        make_option(
+            '--repeat',
+            type='int',
+            dest='repeat',
+            default=3,
+            help='The number of times to run each benchmark.'
+        ),
+        make_option(
+            '--shows',
+            type='int',
+            dest='shows',
+            default=60,
+            help='The number of shows in the synthetic schedule.'
+        ),
+        make_option(
+            '--seed',
+            type='int',
+            dest='seed',
+            default=0,
+            help='The seed for the synthetic schedule generator.'
+        ),
+        make_option(
+            '--output',
+            dest='output',
+            default=None,
+            help='The file to write JSON results to (default: stdout).'
+        ),
+    )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--sizes must be a list of integers.')
+
+        # The synthetic schedule expects a local midnight, not the start of
+        # the broadcast day.
+        start = nltime.un_nld(
+            datetime.datetime.combine(BENCHMARK_START, datetime.time())
+        )
+        report = {
+            'started': timezone.now().isoformat(),
+            'sizes': sizes,
+            'repeat': options['repeat'],
+            'seed': options['seed'],
+        }
+
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0)
+        # The filler show is cached, and the real one must not leak in.
+        cache.delete('filler-show')
+        try:
+            call_command('loaddata', 'test_people', verbosity=0)
+            report['generated'] = synthetic.generate(
+                Person.objects.all()[0],
+                start,
+                max(sizes),
+                shows=options['shows'],
+                seed=options['seed']
+            )
+            report['results'] = benchmark.run(
+                start,
+                sizes,
+                options['repeat']
+            )
+        finally:
+            cache.delete('filler-show')
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+        else:
+            self.stdout.write(json.dumps(report, indent=2) + '\n')
@@ -0,0 +1,48 @@
+"""Management command for checking the timeslot history for bad data."""
+
+import collections
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from schedule.utils import integrity
+
+
+class Command(BaseCommand):
+    """Lists every timeslot with bad data: a zero or negative duration, an
+    overlap with another public timeslot, or a start outside every term or
+    outside its season's term.
+
+    Exits with an error if any problems were found.
+
+    """
+    help = 'Checks every timeslot for data that would break the schedule.'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--page-size',
+            type='int',
+            dest='page_size',
+            default=integrity.PAGE_SIZE,
+            help='The number of timeslots to read at once.'
+        ),
+    )
+
+    def handle(self, *args, **options):
+        counts = collections.Counter()
+        for problem in integrity.check(page_size=options['page_size']):
+            counts[problem.kind] += 1
+            self.stdout.write(
+                u'{0} ({1}): {2}: {3}\n'.format(
+                    problem.timeslot,
+                    problem.start,
+                    problem.kind,
+                    problem.detail
+                ).encode('utf-8')
+            )
+
+        if counts:
+            raise CommandError('Found {}.'.format(', '.join(
+                '{} {}'.format(count, kind)
+                for kind, count in sorted(counts.iteritems())
+            )))
+        self.stdout.write('No problems found.\n')
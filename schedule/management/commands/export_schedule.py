@@ -0,0 +1,71 @@
+"""Management command for exporting timeslots for reporting."""
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from schedule.utils import export
+
+
+class Command(BaseCommand):
+    """Exports every timeslot in a term or date range, with its show title,
+    season number, block, location and credits.
+
+    The export is streamed, so any range can be exported in bounded memory.
+
+    """
+    help = 'Exports the timeslots in a term or date range as CSV or JSON lines.'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--term',
+            dest='term',
+            default=None,
+            help='The ID of the term to export.'
+        ),
+        make_option(
+            '--start',
+            dest='start',
+            default=None,
+            help='The first date to export, as YYYY-MM-DD.'
+        ),
+        make_option(
+            '--end',
+            dest='end',
+            default=None,
+            help='The date to export up to (exclusive), as YYYY-MM-DD.'
+        ),
+        make_option(
+            '--format',
+            dest='format',
+            default='csv',
+            choices=export.FORMATS,
+            help='The export format: csv (the default) or jsonl.'
+        ),
+        make_option(
+            '--output',
+            dest='output',
+            default=None,
+            help='The file to write the export to (default: stdout).'
+        ),
+    )
+
+    def handle(self, *args, **options):
+        try:
+            timeslots = export.select(
+                options['term'],
+                options['start'],
+                options['end']
+            )
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        if options['output']:
+            out = open(options['output'], 'wb')
+        else:
+            out = self.stdout
+        try:
+            for line in export.lines(timeslots, options['format']):
+                out.write(line)
+        finally:
+            if out is not self.stdout:
+                out.close()
@@ -0,0 +1,171 @@
+"""Management command for exporting the schedule as static files."""
+
+import datetime
+import multiprocessing
+import os
+import time
+from optparse import make_option
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.client import RequestFactory
+from django.utils import timezone
+
+from schedule.utils import block, filler, memo
+from schedule.views import api, common
+
+
+# Lookups shared by every week, loaded once and inherited by each worker.
+_registry = {}
+
+
+class Command(BaseCommand):
+    """Renders every week schedule, from the first term up to this week, to
+    static HTML and JSON files.
+
+    Each week is written to WEEK.html and WEEK.json in the output directory,
+    where WEEK is its ISO year and week number (for example 2012-W41).  The
+    pages are those served by the public week schedule and JSON API views.
+
+    """
+    args = '<output directory>'
+    help = 'Renders every week schedule to static HTML and JSON files.'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--processes',
+            type='int',
+            dest='processes',
+            default=multiprocessing.cpu_count(),
+            help='The number of worker processes to render weeks with.'
+        ),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError('Give the directory to export to.')
+        directory = args[0]
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        terms = memo.terms()
+        if not terms:
+            raise CommandError('There are no terms to export.')
+        mondays = weeks_between(
+            timezone.localtime(terms[0].start_date).date(),
+            timezone.localtime(timezone.now()).date()
+        )
+
+        started = time.time()
+        for monday in run(mondays, directory, options['processes']):
+            self.stdout.write('Exported week commencing {:%d %b %Y}\n'.format(
+                monday
+            ))
+        self.stdout.write(
+            'Exported {} weeks in {:.2f}s\n'.format(
+                len(mondays),
+                time.time() - started
+            )
+        )
+
+
+def weeks_between(first, last):
+    """Returns the dates of the Mondays of every week from the one containing
+    first to the one containing last.
+    """
+    monday = first - datetime.timedelta(days=first.weekday())
+    mondays = []
+    while monday <= last:
+        mondays.append(monday)
+        monday += datetime.timedelta(weeks=1)
+    return mondays
+
+
+def load_registry():
+    """Loads the lookups every week needs: terms, blocks and block matching
+    rules, show types and the filler show.
+
+    Returns:
+        a dictionary of memo entries, to be used to seed each week's memo.
+    """
+    with memo.scope() as registry:
+        memo.terms()
+        block.annotate([])
+        filler.show(None, None)
+        memo.show_types()
+        return dict(registry)
+
+
+def run(mondays, directory, processes):
+    """Exports the weeks starting on the given Mondays.
+
+    Args:
+        mondays: a list of dates of the Mondays of the weeks to export.
+        directory: the directory to write the files to.
+        processes: the number of worker processes to use; if 1, everything is
+            done in this process.
+
+    Returns:
+        an iterator of the Mondays exported, in order.
+    """
+    # The registry holds block matching functions, which can't be pickled,
+    # so it is loaded before the workers are forked and inherited by them.
+    _registry.update(load_registry())
+    jobs = [(monday, directory) for monday in mondays]
+    if processes <= 1:
+        return (export_week(job) for job in jobs)
+
+    # The workers must not share this process's database connection.
+    connection.close()
+    pool = multiprocessing.Pool(processes, initializer=connection.close)
+    results = pool.imap(export_week, jobs)
+    pool.close()
+    return results
+
+
+def export_week(job):
+    """Renders the week starting on a Monday to HTML and JSON files.
+
+    Args:
+        job: a tuple of the date of the Monday and the output directory.
+
+    Returns:
+        the Monday.
+    """
+    monday, directory = job
+    year, week, _ = monday.isocalendar()
+    name = os.path.join(directory, '{}-W{:02d}'.format(year, week))
+
+    memo.activate().update(_registry)
+    try:
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        # Past weeks are built once each, so they are built without the
+        # cache, which they would only crowd, and without deferring work to
+        # a request_finished that never comes.
+        write(
+            name + '.html',
+            common.schedule_view(
+                request,
+                'week',
+                monday,
+                backend='plain'
+            ).content
+        )
+        write(
+            name + '.json',
+            api.schedule_json(request, 'week', monday, backend='plain').content
+        )
+    finally:
+        memo.deactivate()
+    return monday
+
+
+def write(path, content):
+    """Writes a file atomically, by writing a temporary file and moving it
+    into place.
+    """
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as out:
+        out.write(content)
+    os.rename(temporary, path)
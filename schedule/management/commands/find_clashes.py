@@ -0,0 +1,45 @@
+"""Management command for finding location clashes in the schedule."""
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from schedule.models import Term
+from schedule.utils import clash, export
+
+
+class Command(BaseCommand):
+    """Lists every pair of timeslots booked into the same location at the
+    same time, term by term.
+
+    """
+    help = 'Finds timeslots double-booking the same location.'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--term',
+            dest='term',
+            default=None,
+            help='The ID of a term to check (default: every term).'
+        ),
+    )
+
+    def handle(self, *args, **options):
+        terms = Term.objects.all()
+        if options['term'] is not None:
+            terms = terms.filter(pk=options['term'])
+            if not terms.exists():
+                raise CommandError('There is no such term.')
+
+        total = 0
+        for term in terms:
+            for found in clash.find(export.in_term(term)):
+                total += 1
+                self.stdout.write(
+                    u'{0}: {1}: {2} clashes with {3}\n'.format(
+                        term,
+                        found.location,
+                        found.first,
+                        found.second
+                    ).encode('utf-8')
+                )
+        self.stdout.write('{} clashes found.\n'.format(total))
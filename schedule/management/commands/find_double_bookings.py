@@ -0,0 +1,62 @@
+"""Management command for finding presenters booked on overlapping shows."""
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from people.models import Person
+
+from schedule.utils import clash, export
+
+
+class Command(BaseCommand):
+    """Lists every person credited on two timeslots that overlap, in a term
+    or date range.
+
+    """
+    help = 'Finds people credited on overlapping timeslots.'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--term',
+            dest='term',
+            default=None,
+            help='The ID of the term to check.'
+        ),
+        make_option(
+            '--start',
+            dest='start',
+            default=None,
+            help='The first date to check, as YYYY-MM-DD.'
+        ),
+        make_option(
+            '--end',
+            dest='end',
+            default=None,
+            help='The date to check up to (exclusive), as YYYY-MM-DD.'
+        ),
+    )
+
+    def handle(self, *args, **options):
+        try:
+            timeslots = export.select(
+                options['term'],
+                options['start'],
+                options['end']
+            )
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        found = clash.double_bookings(timeslots)
+        people = Person.objects.in_bulk(set(f.person for f in found))
+        for booking in found:
+            self.stdout.write(
+                u'{0}: timeslot {1} ({2}) overlaps timeslot {3} ({4})\n'
+                .format(
+                    people.get(booking.person, booking.person),
+                    booking.first.timeslot,
+                    booking.first.start,
+                    booking.second.timeslot,
+                    booking.second.start
+                ).encode('utf-8')
+            )
+        self.stdout.write('{} double bookings found.\n'.format(len(found)))
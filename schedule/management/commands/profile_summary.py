@@ -0,0 +1,67 @@
+"""Management command for summarising schedule view profiles."""
+
+import glob
+import os
+import pstats
+from optparse import make_option
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    """Aggregates the profiles written by schedule.utils.profiling.
+
+    All matching .pstats files in SCHEDULE_PROFILE_DIR (or the directory
+    given) are added together, and the hottest functions printed.
+
+    """
+    args = '[directory]'
+    help = 'Summarises the hottest functions in schedule view profiles.'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--match',
+            dest='match',
+            default='',
+            help=(
+                'Only include profiles whose file names contain this, '
+                'for example "week".'
+            )
+        ),
+        make_option(
+            '--sort',
+            dest='sort',
+            default='cumulative',
+            help='The pstats sort key, for example "cumulative" or "time".'
+        ),
+        make_option(
+            '--limit',
+            type='int',
+            dest='limit',
+            default=30,
+            help='The number of functions to show.'
+        ),
+    )
+
+    def handle(self, *args, **options):
+        if args:
+            directory = args[0]
+        else:
+            directory = getattr(settings, 'SCHEDULE_PROFILE_DIR', None)
+        if not directory:
+            raise CommandError(
+                'Give a directory, or set SCHEDULE_PROFILE_DIR.'
+            )
+
+        paths = sorted(
+            path for path in glob.glob(os.path.join(directory, '*.pstats'))
+            if options['match'] in os.path.basename(path)
+        )
+        if not paths:
+            raise CommandError('No profiles found in {}.'.format(directory))
+
+        self.stdout.write('Aggregating {} profiles.\n'.format(len(paths)))
+        stats = pstats.Stats(paths[0], stream=self.stdout)
+        for path in paths[1:]:
+            stats.add(path)
+        stats.sort_stats(options['sort']).print_stats(options['limit'])
@@ -0,0 +1,80 @@
+"""Management command for reporting schedule analytics by term."""
+
+import json
+from optparse import make_option
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from schedule.models import Term
+from schedule.utils import analytics
+
+
+DAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+
+class Command(BaseCommand):
+    """Reports, term by term, the hours of live programming each block got,
+    the share of airtime left to filler, and a weekday by hour heatmap of
+    live programming.
+
+    Needs NumPy.
+
+    """
+    help = 'Reports block airtime, filler share and live hours by term.'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--term',
+            dest='term',
+            default=None,
+            help='The ID of a term to report on (default: every term).'
+        ),
+        make_option(
+            '--json',
+            action='store_true',
+            dest='json',
+            default=False,
+            help='Output the figures as JSON, one term per line.'
+        ),
+    )
+
+    def handle(self, *args, **options):
+        terms = Term.objects.all()
+        if options['term'] is not None:
+            terms = terms.filter(pk=options['term'])
+            if not terms.exists():
+                raise CommandError('There is no such term.')
+
+        for term in terms:
+            try:
+                summary = analytics.summarise(term)
+            except ImproperlyConfigured as error:
+                raise CommandError(error)
+            if options['json']:
+                self.stdout.write(json.dumps(summary) + '\n')
+            else:
+                self.report(summary)
+
+    def report(self, summary):
+        """Writes out a term's figures as text."""
+        self.stdout.write(u'{}\n'.format(summary['name']).encode('utf-8'))
+        self.stdout.write('  Filler share: {:.1%}\n'.format(
+            summary['filler_share']
+        ))
+        for row in summary['airtime']:
+            self.stdout.write(u'  {:<30} {:8.1f}h\n'.format(
+                row['name'] or '(no block)',
+                row['hours']
+            ).encode('utf-8'))
+        # One character per hour: the tenths of the hour that were live.
+        self.stdout.write('      {}\n'.format(
+            ''.join(str(hour % 10) for hour in range(24))
+        ))
+        for day, hours in zip(DAYS, summary['heatmap']):
+            self.stdout.write('  {} {}\n'.format(
+                day,
+                ''.join(
+                    '#' if share >= 0.95 else str(int(share * 10))
+                    for share in hours
+                )
+            ))
@@ -0,0 +1,63 @@
+"""Management command for adding new schedule indexes to existing
+databases."""
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from schedule.models import Timeslot
+
+
+# Fields given db_index after their tables were first created.  syncdb only
+# indexes new tables, so existing databases need these adding.
+INDEXED_FIELDS = (
+    (Timeslot, 'start_time'),
+)
+
+
+class Command(BaseCommand):
+    """Prints, or runs, the CREATE INDEX statements for the indexes added to
+    the schedule models since their tables were created.
+
+    The statements are those syncdb would use for a new table, so they
+    follow the database backend and any table names given in the settings.
+
+    """
+    help = 'Prints, or runs, the SQL adding new schedule indexes.'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--execute',
+            action='store_true',
+            dest='execute',
+            default=False,
+            help='Create the indexes rather than printing the SQL.'
+        ),
+    )
+
+    def handle(self, *args, **options):
+        statements = index_sql()
+        if not options['execute']:
+            self.stdout.write('\n'.join(statements) + '\n')
+            return
+
+        cursor = connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        transaction.commit_unless_managed()
+        self.stdout.write('Created {} indexes.\n'.format(len(statements)))
+
+
+def index_sql():
+    """Returns the list of CREATE INDEX statements for INDEXED_FIELDS."""
+    style = no_style()
+    return [
+        statement
+        for model, name in INDEXED_FIELDS
+        for statement in connection.creation.sql_indexes_for_field(
+            model,
+            model._meta.get_field(name),
+            style
+        )
+    ]
@@ -0,0 +1,70 @@
+"""Management command for writing schedule snapshots."""
+
+import os
+import time
+from optparse import make_option
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from schedule.management.commands.warm_schedule import (
+    VARIANTS,
+    term_mondays,
+    warm_terms
+)
+from schedule.utils import memo, object, snapshot
+from schedule.views import common
+
+
+class Command(BaseCommand):
+    """Writes every week schedule in the current term to snapshot files,
+    from which sites with SCHEDULE_BUILDER set to 'snapshot' serve the
+    schedule.
+
+    The snapshots are written to SCHEDULE_SNAPSHOT_DIR, and should be
+    rewritten whenever the schedule changes (or regularly, from cron).
+
+    """
+    help = 'Writes the week schedules for the current term to snapshots.'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--next',
+            action='store_true',
+            dest='next',
+            default=False,
+            help='Also snapshot the term after the current one.'
+        ),
+    )
+
+    def handle(self, *args, **options):
+        directory = getattr(settings, 'SCHEDULE_SNAPSHOT_DIR', None)
+        if not directory:
+            raise CommandError('Set SCHEDULE_SNAPSHOT_DIR first.')
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        terms = warm_terms(timezone.now(), options['next'])
+        mondays = [monday for term in terms for monday in term_mondays(term)]
+
+        started = time.time()
+        for monday in mondays:
+            with memo.scope():
+                for variant in VARIANTS:
+                    snapshot.write(week_schedule(monday, variant), variant)
+        self.stdout.write(
+            'Wrote {} weeks in {:.2f}s\n'.format(
+                len(mondays),
+                time.time() - started
+            )
+        )
+
+
+def week_schedule(monday, variant):
+    """Returns the week schedule starting on monday, built from the database.
+    """
+    timeslots = common.variant_timeslots(variant)
+    return object.WeekSchedule(
+        common.ury_start_on_date(monday),
+        lambda schedule: object.range_builder(schedule, timeslots, variant)
+    )
@@ -0,0 +1,167 @@
+"""Management command for pre-warming the schedule cache."""
+
+import datetime
+import multiprocessing
+import time
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from schedule.models import Term
+from schedule.utils import cache, memo
+from schedule.utils import object
+from schedule.views import common
+
+
+# The schedule variants, as understood by common.variant_timeslots, to warm.
+VARIANTS = ('public', 'private')
+
+
+class Command(BaseCommand):
+    """Builds and caches every week and day schedule in the current term.
+
+    The cache must be one shared between processes (such as memcached or the
+    database cache) for this to be any use to the site.
+
+    """
+    help = (
+        'Builds and caches every week and day schedule for the current term.'
+    )
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--next',
+            action='store_true',
+            dest='next',
+            default=False,
+            help='Also warm the term after the current one.'
+        ),
+        make_option(
+            '--processes',
+            type='int',
+            dest='processes',
+            default=multiprocessing.cpu_count(),
+            help='The number of worker processes to build schedules with.'
+        ),
+    )
+
+    def handle(self, *args, **options):
+        terms = warm_terms(timezone.now(), options['next'])
+        mondays = [monday for term in terms for monday in term_mondays(term)]
+
+        started = time.time()
+        for monday, seconds in run(mondays, options['processes']):
+            self.stdout.write(
+                'Week commencing {:%d %b %Y}: {:.2f}s\n'.format(
+                    monday,
+                    seconds
+                )
+            )
+        self.stdout.write(
+            'Warmed {} weeks in {:.2f}s\n'.format(
+                len(mondays),
+                time.time() - started
+            )
+        )
+
+
+def warm_terms(now, include_next):
+    """Returns the list of terms to warm.
+
+    Args:
+        now: the current datetime.
+        include_next: if True, the term after the current one is included.
+
+    Returns:
+        a list of Terms.
+    """
+    term = Term.of(now)
+    if term is None:
+        raise CommandError('There is no current term to warm.')
+
+    terms = [term]
+    if include_next:
+        following = Term.objects.filter(start_date__gte=term.end_date)
+        if following.exists():
+            terms.append(following[0])
+    return terms
+
+
+def term_mondays(term):
+    """Returns the dates of the Mondays of every week that a term touches."""
+    first = timezone.localtime(term.start_date).date()
+    monday = first - datetime.timedelta(days=first.weekday())
+    mondays = []
+    while common.ury_start_on_date(monday) < term.end_date:
+        mondays.append(monday)
+        monday += datetime.timedelta(weeks=1)
+    return mondays
+
+
+def run(mondays, processes):
+    """Warms the weeks starting on the given Mondays.
+
+    Args:
+        mondays: a list of dates of the Mondays of the weeks to warm.
+        processes: the number of worker processes to use; if 1, everything is
+            done in this process.
+
+    Returns:
+        an iterator of (monday, seconds taken) pairs, in order.
+    """
+    if processes <= 1:
+        return (warm_week(monday) for monday in mondays)
+
+    # The workers must not share this process's database connection.
+    connection.close()
+    pool = multiprocessing.Pool(processes, initializer=connection.close)
+    results = pool.imap(warm_week, mondays)
+    pool.close()
+    return results
+
+
+def warm_week(monday):
+    """Builds and caches the week starting on monday, and its days.
+
+    Args:
+        monday: the date of the Monday starting the week.
+
+    Returns:
+        a tuple of monday and the number of seconds the week took to warm.
+    """
+    started = time.time()
+    rev = cache.revision()
+    with memo.scope():
+        for variant in VARIANTS:
+            for schedule in variant_schedules(monday, variant):
+                cache.store(
+                    cache.schedule_key(schedule, variant),
+                    schedule.data,
+                    rev
+                )
+    return monday, time.time() - started
+
+
+def variant_schedules(monday, variant):
+    """Returns the week schedule starting on monday and its day schedules.
+
+    The schedules start at the same times as those created by the schedule
+    views, so that they are cached under the same keys.  The day schedules
+    are sliced out of the week schedule, except for days with no real
+    timeslots, which are built as the views would build them.
+    """
+    timeslots = common.variant_timeslots(variant)
+
+    def builder(schedule):
+        return object.range_builder(schedule, timeslots, variant)
+
+    week = object.WeekSchedule(common.ury_start_on_date(monday), builder)
+    days = [
+        object.DaySchedule(
+            common.ury_start_on_date(monday + datetime.timedelta(days=i)),
+            object.sliced_builder(week, builder)
+        )
+        for i in xrange(7)
+    ]
+    return [week] + days
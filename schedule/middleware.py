@@ -0,0 +1,23 @@
+"""Middleware provided by the schedule app."""
+
+from schedule.utils import memo
+
+
+class ScheduleMemoMiddleware(object):
+    """Shares schedule building work between all parts of one request.
+
+    This activates a request-scoped schedule memo (see schedule.utils.memo)
+    for the duration of each request, and makes it available as
+    request.schedule_memo.  To use it, add
+    'schedule.middleware.ScheduleMemoMiddleware' to MIDDLEWARE_CLASSES.
+
+    """
+    def process_request(self, request):
+        request.schedule_memo = memo.activate()
+
+    def process_response(self, request, response):
+        memo.deactivate()
+        return response
+
+    def process_exception(self, request, exception):
+        memo.deactivate()
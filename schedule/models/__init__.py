@@ -30,3 +30,10 @@ BlockShowRule = BlockShowRule
 
 from schedule.models.credit import ShowCredit
 ShowCredit = ShowCredit
+
+from schedule.models.timeslot_change import TimeslotChange
+TimeslotChange = TimeslotChange
+
+# Signal handlers need all of the models above to be loaded first.
+from schedule import signals
+signals = signals
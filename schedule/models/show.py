@@ -56,7 +56,7 @@ class ShowQuerySet(QuerySet):
         """
         return self.scheduled().filter(
             show_type__has_showdb_entry=True
-        )
+        ).select_related('show_type')
 
     def scheduled(self):
         """
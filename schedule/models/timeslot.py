@@ -104,8 +104,11 @@ class Timeslot(p_mixins.ApprovableMixin,
             db_column=settings.TIMESLOT_DB_ID_COLUMN
         )
     season = Season.make_foreign_key()
+    # Databases made before this was indexed get the index from the
+    # schedule_indexes command.
     start_time = models.DateTimeField(
         db_column='start_time',
+        db_index=True,
         help_text='The date and time of the start of this timeslot.'
     )
     duration = timedelta.TimedeltaField(
@@ -0,0 +1,185 @@
+"""Models recording changes to the schedule."""
+
+# IF YOU'RE ADDING CLASSES TO THIS, DON'T FORGET TO ADD THEM TO
+# __init__.py
+
+from django.conf import settings
+from django.db import models
+from django.db.models import Max
+
+
+class TimeslotChange(models.Model):
+    """
+    A record of a timeslot being created, changed or deleted.
+
+    Changes are numbered in the order they happen, and the number of the
+    latest change serves as the *schedule revision*: clients that have seen
+    the schedule as of one revision can ask for only the timeslots changed
+    since then.
+
+    The timeslot is referred to by ID rather than by foreign key, because
+    the record has to outlive the timeslot when it is deleted.  For the same
+    reason, each record keeps where the timeslot was just before the change,
+    so that it can be worked out which schedules it used to appear in.
+
+    """
+    if hasattr(settings, 'TIMESLOT_CHANGE_DB_ID_COLUMN'):
+        id = models.AutoField(
+            primary_key=True,
+            db_column=settings.TIMESLOT_CHANGE_DB_ID_COLUMN
+        )
+
+    CREATED = 'c'
+    CHANGED = 'u'
+    DELETED = 'd'
+    ACTIONS = (
+        (CREATED, 'created'),
+        (CHANGED, 'changed'),
+        (DELETED, 'deleted'),
+    )
+
+    # The most changes record inserts in one query.
+    BATCH_SIZE = 100
+
+    timeslot_id = models.IntegerField(
+        db_index=True,
+        help_text='The ID of the timeslot that was changed.'
+    )
+    action = models.CharField(
+        max_length=1,
+        choices=ACTIONS,
+        help_text='What happened to the timeslot.'
+    )
+    date = models.DateTimeField(
+        auto_now_add=True,
+        help_text='When the change happened.'
+    )
+    previous_start = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='The start of the timeslot before the change, if any.'
+    )
+    previous_end = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='The end of the timeslot before the change, if any.'
+    )
+
+    class Meta:
+        if hasattr(settings, 'TIMESLOT_CHANGE_DB_TABLE'):
+            db_table = settings.TIMESLOT_CHANGE_DB_TABLE
+        get_latest_by = 'id'
+        ordering = ['id']
+        app_label = 'schedule'
+
+    def __unicode__(self):
+        return u'r{0}: timeslot {1} {2}'.format(
+            self.id,
+            self.timeslot_id,
+            self.get_action_display()
+        )
+
+    @classmethod
+    def latest_revision(cls):
+        """Returns the current schedule revision (0 if nothing has changed).
+        """
+        return cls.objects.aggregate(rev=Max('id'))['rev'] or 0
+
+    @classmethod
+    def record(cls, timeslot_ids, action, previous=None):
+        """Logs the same change to many timeslots with one insert.
+
+        This is for bulk operations, which bypass the signals that normally
+        log changes.
+
+        Args:
+            timeslot_ids: the IDs of the timeslots changed.
+            action: one of CREATED, CHANGED or DELETED.
+            previous: a dictionary mapping the IDs of timeslots that existed
+                before the change to their (start, end) pairs beforehand.
+        """
+        if previous is None:
+            previous = {}
+        changes = [
+            cls(
+                timeslot_id=timeslot_id,
+                action=action,
+                previous_start=previous.get(timeslot_id, (None, None))[0],
+                previous_end=previous.get(timeslot_id, (None, None))[1]
+            )
+            for timeslot_id in timeslot_ids
+        ]
+        # Insert in batches, to keep within SQLite's 999 query parameters.
+        for i in xrange(0, len(changes), cls.BATCH_SIZE):
+            cls.objects.bulk_create(changes[i:i + cls.BATCH_SIZE])
+
+    @classmethod
+    def previously_in_range(cls, revision, start, end):
+        """Finds the timeslots that were in a date range as of a revision
+        but have changed since.
+
+        Only the changes of timeslots that were in the range before some
+        change are read, so this is bounded by the range rather than by the
+        whole history.
+
+        Args:
+            revision: the revision to look back to.
+            start: the start of the range.
+            end: the end of the range.
+
+        Returns:
+            the set of IDs of timeslots that overlapped the range as of the
+            revision and have been changed or deleted since.
+        """
+        candidates = cls.objects.filter(
+            id__gt=revision,
+            previous_start__lt=end,
+            previous_end__gt=start
+        ).values('timeslot_id')
+        changes = cls.objects.filter(
+            id__gt=revision,
+            timeslot_id__in=candidates
+        ).order_by('id').values_list(
+            'timeslot_id',
+            'previous_start',
+            'previous_end'
+        )
+        # The first change after the revision says where the timeslot was
+        # as of the revision (nowhere, if it was created since).
+        first = {}
+        for timeslot_id, previous_start, previous_end in changes:
+            first.setdefault(timeslot_id, (previous_start, previous_end))
+        return set(
+            timeslot_id
+            for timeslot_id, (previous_start, previous_end)
+            in first.iteritems()
+            if previous_start is not None
+            and previous_start < end and previous_end > start
+        )
+
+    @classmethod
+    def since(cls, revision):
+        """Summarises the changes made after the given revision.
+
+        Args:
+            revision: the revision to look for changes after.
+
+        Returns:
+            a tuple of the set of IDs of timeslots created or changed, and
+            the set of IDs of timeslots deleted, after the given revision.
+        """
+        changed = set()
+        deleted = set()
+        changes = cls.objects.filter(id__gt=revision).values_list(
+            'timeslot_id',
+            'action'
+        )
+        # Changes come out in order, so the last action on a timeslot wins.
+        for timeslot_id, action in changes:
+            if action == cls.DELETED:
+                changed.discard(timeslot_id)
+                deleted.add(timeslot_id)
+            else:
+                deleted.discard(timeslot_id)
+                changed.add(timeslot_id)
+        return changed, deleted
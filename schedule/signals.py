@@ -0,0 +1,150 @@
+"""Signal handlers for the schedule app.
+
+These keep the schedule cache honest by moving the cache revision on whenever
+something that can appear on a schedule changes, and keep the timeslot change
+log (see TimeslotChange) up to date.
+"""
+
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from schedule import models
+from schedule.utils import cache
+
+
+# Models whose changes can alter a built schedule.
+SCHEDULE_MODELS = (
+    models.Term,
+    models.Block,
+    models.BlockRangeRule,
+    models.BlockShowRule,
+    models.ShowType,
+    models.Show,
+    models.ShowTextMetadata,
+    models.Season,
+    models.SeasonTextMetadata,
+    models.Timeslot,
+    models.TimeslotTextMetadata,
+)
+
+
+def invalidate_schedule(sender, **kwargs):
+    """Marks every cached schedule as stale."""
+    cache.bump_revision()
+
+
+for model in SCHEDULE_MODELS:
+    for signal in (post_save, post_delete):
+        signal.connect(
+            invalidate_schedule,
+            sender=model,
+            dispatch_uid='schedule-invalidate-{}-{}'.format(
+                model.__name__,
+                'save' if signal is post_save else 'delete'
+            )
+        )
+
+
+def position(instance):
+    """Returns a timeslot's (start, end) pair, or (None, None) if either is
+    not loaded.
+
+    Only fields already loaded are looked at, so that deferred fields are
+    not fetched.
+    """
+    start = instance.__dict__.get('start_time')
+    duration = instance.__dict__.get('duration')
+    if start is None or duration is None:
+        return None, None
+    try:
+        return start, start + duration
+    except TypeError:
+        # The duration is still in its unparsed default form.
+        return None, None
+
+
+def remember_timeslot_position(sender, instance, raw=False, **kwargs):
+    """Notes where a timeslot about to be saved was in the database, so that
+    the change can be logged with its previous position.
+
+    This is done on saving, rather than whenever a timeslot is loaded, so
+    that only timeslots actually saved cost the extra query.
+    """
+    instance._saved_position = (None, None)
+    if instance.pk is not None and not raw:
+        for start, duration in models.Timeslot.objects.filter(
+            pk=instance.pk
+        ).values_list('start_time', 'duration'):
+            instance._saved_position = start, start + duration
+
+
+def record_timeslot_save(sender, instance, created, raw=False, **kwargs):
+    """Logs the creation or change of a timeslot."""
+    if not raw:
+        previous_start, previous_end = (
+            (None, None) if created
+            else getattr(instance, '_saved_position', (None, None))
+        )
+        models.TimeslotChange.objects.create(
+            timeslot_id=instance.pk,
+            action=(
+                models.TimeslotChange.CREATED if created
+                else models.TimeslotChange.CHANGED
+            ),
+            previous_start=previous_start,
+            previous_end=previous_end
+        )
+
+
+def record_timeslot_delete(sender, instance, **kwargs):
+    """Logs the deletion of a timeslot."""
+    previous_start, previous_end = position(instance)
+    models.TimeslotChange.objects.create(
+        timeslot_id=instance.pk,
+        action=models.TimeslotChange.DELETED,
+        previous_start=previous_start,
+        previous_end=previous_end
+    )
+
+
+def record_timeslot_metadata_change(sender, instance, raw=False, **kwargs):
+    """Logs a change to a timeslot's own metadata as a timeslot change.
+
+    (Changes to metadata inherited from seasons and shows are not logged.)
+    """
+    if not raw:
+        previous_start, previous_end = None, None
+        for start, duration in models.Timeslot.objects.filter(
+            pk=instance.element_id
+        ).values_list('start_time', 'duration'):
+            previous_start, previous_end = start, start + duration
+        models.TimeslotChange.objects.create(
+            timeslot_id=instance.element_id,
+            action=models.TimeslotChange.CHANGED,
+            previous_start=previous_start,
+            previous_end=previous_end
+        )
+
+
+pre_save.connect(
+    remember_timeslot_position,
+    sender=models.Timeslot,
+    dispatch_uid='schedule-remember-timeslot-position'
+)
+post_save.connect(
+    record_timeslot_save,
+    sender=models.Timeslot,
+    dispatch_uid='schedule-record-timeslot-save'
+)
+post_delete.connect(
+    record_timeslot_delete,
+    sender=models.Timeslot,
+    dispatch_uid='schedule-record-timeslot-delete'
+)
+for signal in (post_save, post_delete):
+    signal.connect(
+        record_timeslot_metadata_change,
+        sender=models.TimeslotTextMetadata,
+        dispatch_uid='schedule-record-timeslot-metadata-{}'.format(
+            'save' if signal is post_save else 'delete'
+        )
+    )
@@ -2,13 +2,50 @@
 This module contains unit tests for the schedule app.
 """
 
+import contextlib
+import datetime
 import operator
-
+import os
+import shutil
+import StringIO
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import get_cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
-from schedule.models import Term, Timeslot, Show, Season
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+from django.utils import unittest
+from people.models import Person
+from schedule.management.commands import schedule_indexes
+from schedule.management.commands import warm_schedule
+from schedule.models import Term, Timeslot, Show, Season, TimeslotChange
+from schedule.utils import analytics
+from schedule.utils import archive
+from schedule.utils import block
+from schedule.utils import clash
+from schedule.utils import cache as sched_cache
+from schedule.utils import export
 from schedule.utils import filler
-from schedule.utils.object import Schedule
-from schedule.views import week
+from schedule.utils import instrument
+from schedule.utils import integrity
+from schedule.utils import memo
+from schedule.utils import nltime
+from schedule.utils import profiling
+from schedule.utils import recurring
+from schedule.utils import reschedule
+from schedule.utils import rollover
+from schedule.utils import snapshot
+from schedule.utils import synthetic
+from schedule.utils import week_table
+from schedule.utils import object as sched_object
+from schedule.utils.exceptions import ScheduleConflictError
+from schedule.utils.object import DaySchedule, Schedule
+from schedule.utils import range as sched_range
+from schedule.views import common, header, home, ical, showdb, week
+from schedule.views import clash as clash_views
 from django.utils import timezone
 from datetime import timedelta
 
@@ -522,3 +559,1506 @@ class ShowListableSet(TestCase):
             self.assertTrue(show.show_type.has_showdb_entry)
         for show in unscheduled:
             self.assertNotIn(show, shows)
+
+
+class SyntheticScheduleMixin(object):
+    """
+    Mixin for tests run against a synthetic schedule (see
+    schedule.utils.synthetic) of the given number of weeks and shows,
+    starting at self.start and created by self.creator.
+
+    """
+    fixtures = ['test_people']
+    weeks = 4
+    shows = 5
+
+    def setUp(self):
+        super(SyntheticScheduleMixin, self).setUp()
+        self.creator = Person.objects.all()[0]
+        self.start = timezone.now().replace(
+            year=2012, month=10, day=8,
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        self.counts = synthetic.generate(
+            self.creator,
+            self.start,
+            weeks=self.weeks,
+            shows=self.shows
+        )
+
+
+class StubSlot(object):
+    """A minimal stand-in for a timeslot, for use with stub builders."""
+    def __init__(self, start_time, duration, pk=None):
+        self.pk = pk
+        self.start_time = start_time
+        self.duration = duration
+        self.end_time = start_time + duration
+
+
+class WeekScheduleDaysTests(TestCase):
+    """
+    Tests that :meth:`WeekSchedule.days` slices its data out of the week
+    instead of rebuilding each day.
+
+    """
+    def setUp(self):
+        self.builds = 0
+
+        def builder(schedule):
+            self.builds += 1
+            hours = int(schedule.range.total_seconds() // 3600)
+            return [
+                StubSlot(
+                    schedule.start + timedelta(hours=i),
+                    timedelta(hours=1),
+                    pk=i + 1
+                )
+                for i in xrange(hours)
+            ]
+
+        self.week = sched_object.WeekSchedule(
+            timezone.now().replace(
+                year=2012, month=10, day=8,
+                hour=7, minute=0, second=0, microsecond=0
+            ),
+            builder
+        )
+
+    def test_days_built_once(self):
+        """Evaluating all seven days should only build the week."""
+        days = self.week.days()
+        for day in days:
+            self.assertEqual(len(day.data), 24)
+            self.assertEqual(day.data[0].start_time, day.start)
+        self.assertEqual(self.builds, 1)
+
+    def test_outside_week(self):
+        """Days outside the week should fall back to the builder."""
+        day = self.week.days()[0].previous()
+        self.assertEqual(len(day.data), 24)
+        self.assertEqual(self.builds, 1)
+
+    def test_only_filler(self):
+        """Days with only filler in the week should fall back to the
+        builder, as it would give an excuse for them instead."""
+        week = sched_object.WeekSchedule(
+            self.week.start,
+            lambda schedule: (
+                'empty' if schedule.range.days == 1
+                else [StubSlot(schedule.start, schedule.range)]
+            )
+        )
+        self.assertEqual(
+            [day.data for day in week.days()],
+            ['empty'] * 7
+        )
+
+
+class BatchBuildTests(TestCase):
+    """
+    Tests that :func:`batch_build` gives the same results as building each
+    schedule separately with :func:`range_builder`.
+
+    """
+    fixtures = [
+        'test_people',
+        'test_terms',
+        'filler_show',
+        'test_shows'
+    ]
+
+    def setUp(self):
+        # The fixtures define no blocks, so don't try to match any.
+        self.old_hooks = block.HOOKS
+        block.HOOKS = []
+        start = timezone.now().replace(
+            year=2012, month=10, day=10,
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        self.day = DaySchedule(start, sched_object.range_builder)
+
+    def tearDown(self):
+        block.HOOKS = self.old_hooks
+
+    def test_batch_matches_range_builder(self):
+        days = [self.day.previous(), self.day, self.day.next()]
+        sched_object.batch_build(days)
+        for day in days:
+            expected = sched_object.range_builder(day)
+            if isinstance(expected, basestring):
+                self.assertEqual(day.data, expected)
+            else:
+                # Filler slots at the edges may differ, but real slots and
+                # coverage should not.
+                self.assertEqual(
+                    [s.pk for s in day.data if s.pk],
+                    [s.pk for s in expected if s.pk]
+                )
+                self.assertTrue(day.data[0].start_time <= day.start)
+                self.assertTrue(day.data[-1].end_time >= day.end)
+
+    def test_batch_before_first_term(self):
+        """A batch starting before every term should still be filled."""
+        start = self.day.start.replace(year=2003, month=10, day=5)
+        first = Term.objects.order_by('start_date')[0]
+        self.assertTrue(start < first.start_date)
+        Timeslot.objects.create(
+            season=Season.objects.get(pk=1),
+            creator=Person.objects.all()[0],
+            start_time=first.start_date + timedelta(hours=12),
+            duration=timedelta(hours=1)
+        )
+
+        before = DaySchedule(start, sched_object.range_builder)
+        days = [before, before.next()]
+        sched_object.batch_build(days)
+        self.assertEqual(days[0].data, 'empty')
+        self.assertEqual(len([s for s in days[1].data if s.pk]), 1)
+        self.assertTrue(days[1].data[0].start_time <= days[1].start)
+        self.assertTrue(days[1].data[-1].end_time >= days[1].end)
+
+
+class ArchiveTests(TestCase):
+    """
+    Tests that term archives give the same timeslots as the database.
+
+    """
+    fixtures = [
+        'test_people',
+        'test_terms',
+        'filler_show',
+        'test_shows'
+    ]
+
+    def setUp(self):
+        self.old_hooks = block.HOOKS
+        block.HOOKS = []
+        self.directory = tempfile.mkdtemp()
+        start = timezone.now().replace(
+            year=2012, month=10, day=10,
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        self.day = DaySchedule(start, sched_object.range_builder)
+        self.term = Term.of(start)
+        self.path = os.path.join(self.directory, 'term.archive')
+        archive.freeze(self.term, self.path)
+
+    def tearDown(self):
+        block.HOOKS = self.old_hooks
+        shutil.rmtree(self.directory)
+
+    def test_in_range(self):
+        frozen = archive.Archive(self.path)
+        for public_only, timeslots in [
+            (True, Timeslot.objects.public()),
+            (False, Timeslot.objects.all()),
+        ]:
+            self.assertEqual(
+                [entry.id for entry in frozen.in_range(
+                    self.day.start,
+                    self.day.end,
+                    public_only
+                )],
+                list(
+                    timeslots.in_range(self.day.start, self.day.end)
+                    .order_by('start_time', 'pk')
+                    .values_list('pk', flat=True)
+                )
+            )
+
+    def test_overlapping_term_start(self):
+        """Timeslots running into the term from before it should be
+        archived with it."""
+        start = self.term.start_date
+        slot = Timeslot.objects.create(
+            season=Season.objects.all()[0],
+            creator=Person.objects.all()[0],
+            start_time=start - timedelta(hours=1),
+            duration=timedelta(hours=3)
+        )
+        archive.freeze(self.term, self.path)
+        self.assertIn(
+            slot.pk,
+            [entry.id for entry in archive.Archive(self.path).in_range(
+                start,
+                start + timedelta(hours=1),
+                False
+            )]
+        )
+
+    def test_range_builder(self):
+        """range_builder should give the same schedule from the archive."""
+        expected = sched_object.range_builder(self.day)
+        with override_settings(SCHEDULE_ARCHIVE_DIR=self.directory):
+            archive.freeze(self.term)
+            self.assertTrue(archive.open_term(self.term))
+            actual = sched_object.range_builder(self.day)
+        self.assertEqual(
+            [(s.pk, s.start_time, s.end_time) for s in actual],
+            [(s.pk, s.start_time, s.end_time) for s in expected]
+        )
+
+    def test_variants(self):
+        """Archives should only stand in for the variants they hold."""
+        start, end = self.day.start, self.day.end
+        with override_settings(SCHEDULE_ARCHIVE_DIR=self.directory):
+            archive.freeze(self.term)
+            for variant in ('public', 'private'):
+                self.assertEqual(
+                    [s.pk for s in archive.timeslots(
+                        self.term,
+                        start,
+                        end,
+                        variant
+                    )],
+                    list(
+                        common.variant_timeslots(variant)
+                        .in_range(start, end)
+                        .order_by('start_time', 'pk')
+                        .values_list('pk', flat=True)
+                    )
+                )
+            self.assertIsNone(archive.timeslots(self.term, start, end, None))
+
+    def test_shared_seasons(self):
+        """Archived timeslots of one season should share its stand-in."""
+        with override_settings(SCHEDULE_ARCHIVE_DIR=self.directory):
+            archive.freeze(self.term)
+            slots = archive.timeslots(
+                self.term,
+                self.day.start,
+                self.day.end,
+                'public'
+            )
+        seasons = {}
+        for slot in slots:
+            seasons.setdefault(slot.season.pk, slot.season)
+            self.assertTrue(slot.season is seasons[slot.season.pk])
+        self.assertTrue(len(seasons) < len(slots))
+        with self.assertNumQueries(0):
+            for slot in slots:
+                slot.season.show.show_type
+
+
+class SnapshotTests(TestCase):
+    """
+    Tests that schedules read back from snapshots match those they were
+    written from.
+
+    """
+    fixtures = [
+        'test_people',
+        'test_terms',
+        'filler_show',
+        'test_shows'
+    ]
+
+    def setUp(self):
+        self.old_hooks = block.HOOKS
+        block.HOOKS = []
+        self.directory = tempfile.mkdtemp()
+        self.start = timezone.now().replace(
+            year=2012, month=10, day=8,
+            hour=7, minute=0, second=0, microsecond=0
+        )
+
+    def tearDown(self):
+        block.HOOKS = self.old_hooks
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        week = sched_object.WeekSchedule(
+            self.start,
+            sched_object.range_builder
+        )
+        with override_settings(SCHEDULE_SNAPSHOT_DIR=self.directory):
+            snapshot.write(week, 'public')
+            day = week.days()[2]
+            expected = sched_object.range_builder(day)
+            actual = snapshot.builder('public')(day)
+        # Filler slots at the edges may differ, but real slots and coverage
+        # should not.
+        self.assertEqual(
+            [(s.pk, s.start_time, s.end_time) for s in actual if s.pk],
+            [(s.pk, s.start_time, s.end_time) for s in expected if s.pk]
+        )
+        self.assertTrue(actual[0].start_time <= day.start)
+        self.assertTrue(actual[-1].end_time >= day.end)
+
+    def test_missing(self):
+        """Weeks with no snapshot should be empty."""
+        week = sched_object.WeekSchedule(
+            self.start,
+            snapshot.builder('public')
+        )
+        with override_settings(SCHEDULE_SNAPSHOT_DIR=self.directory):
+            self.assertEqual(week.data, 'empty')
+
+
+class WarmScheduleTests(SyntheticScheduleMixin, TestCase):
+    """
+    Tests that warm_schedule caches schedules where the views look for them.
+
+    """
+    weeks = 1
+    shows = 2
+
+    def setUp(self):
+        super(WarmScheduleTests, self).setUp()
+        today = timezone.localtime(timezone.now()).date()
+        monday = today - timedelta(days=today.weekday())
+        self.term = Term.objects.create(
+            name='Current',
+            start_date=nltime.un_nld(
+                datetime.datetime.combine(monday, datetime.time())
+            ),
+            end_date=nltime.un_nld(
+                datetime.datetime.combine(
+                    monday + timedelta(weeks=1),
+                    datetime.time()
+                )
+            )
+        )
+        self.old_store = sched_cache.store
+        self.old_single_flight = sched_cache.single_flight
+        self.stored = set()
+        self.read = set()
+        sched_cache.store = (
+            lambda key, value, rev, timeout=None: self.stored.add(key)
+        )
+        sched_cache.single_flight = self.single_flight
+
+    def tearDown(self):
+        sched_cache.store = self.old_store
+        sched_cache.single_flight = self.old_single_flight
+
+    def single_flight(self, key, build, timeout=None):
+        self.read.add(key)
+        return build()
+
+    def test_keys(self):
+        """The week and day keys warmed should be those the cached builder
+        reads, for both variants."""
+        call_command(
+            'warm_schedule',
+            processes=1,
+            stdout=StringIO.StringIO()
+        )
+        for monday in warm_schedule.term_mondays(self.term):
+            for variant in warm_schedule.VARIANTS:
+                builder = common.database_builder(variant)
+                common.SCHED_CONSTRUCTORS['week'](
+                    common.ury_start_on_date(monday),
+                    builder
+                ).data
+                for i in xrange(7):
+                    common.SCHED_CONSTRUCTORS['day'](
+                        common.ury_start_on_date(monday + timedelta(days=i)),
+                        builder
+                    ).data
+        self.assertTrue(self.read)
+        self.assertEqual(
+            set(key.split(':')[1] for key in self.read),
+            set(['public', 'private'])
+        )
+        self.assertEqual(self.stored, self.read)
+
+
+class SingleFlightTests(TestCase):
+    """
+    Tests that :func:`schedule.utils.cache.single_flight` builds each value
+    once, serves stale values while rebuilding, and notices revision bumps.
+
+    """
+    def setUp(self):
+        self.old_cache = sched_cache.cache
+        sched_cache.cache = get_cache(
+            'django.core.cache.backends.locmem.LocMemCache'
+        )
+        sched_cache.cache.clear()
+        self.builds = 0
+
+    def tearDown(self):
+        sched_cache.cache = self.old_cache
+
+    def build(self):
+        self.builds += 1
+        return self.builds
+
+    def test_builds_once(self):
+        """Fresh values should be served from the cache."""
+        self.assertEqual(sched_cache.single_flight('k', self.build), 1)
+        self.assertEqual(sched_cache.single_flight('k', self.build), 1)
+        self.assertEqual(self.builds, 1)
+
+    def test_revision_bump(self):
+        """Bumping the revision should cause a rebuild."""
+        sched_cache.single_flight('k', self.build)
+        sched_cache.bump_revision()
+        self.assertEqual(sched_cache.single_flight('k', self.build), 2)
+
+    def test_stale_while_locked(self):
+        """While somebody else holds the lock, stale data is served."""
+        sched_cache.single_flight('k', self.build)
+        sched_cache.bump_revision()
+        sched_cache.cache.add('k:lock', True)
+        self.assertEqual(sched_cache.single_flight('k', self.build), 1)
+        self.assertEqual(self.builds, 1)
+
+
+class MemoTests(TestCase):
+    """
+    Tests that the request-scoped schedule memo shares results only while
+    active.
+
+    """
+    def setUp(self):
+        self.calls = 0
+
+    def tearDown(self):
+        memo.deactivate()
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def test_inactive(self):
+        """Without an active memo, every call should be computed."""
+        memo.memoise('k', self.compute)
+        memo.memoise('k', self.compute)
+        self.assertEqual(self.calls, 2)
+
+    def test_active(self):
+        """With an active memo, repeated calls should be shared."""
+        memo.activate()
+        self.assertEqual(memo.memoise('k', self.compute), 1)
+        self.assertEqual(memo.memoise('k', self.compute), 1)
+        memo.activate()
+        self.assertEqual(memo.memoise('k', self.compute), 2)
+
+
+class SyntheticScheduleTests(SyntheticScheduleMixin, TestCase):
+    """
+    Tests that the synthetic schedule generator used by the benchmarks makes
+    a sensible schedule.
+
+    """
+    shows = 10
+
+    def test_counts(self):
+        """The reported counts should match the database."""
+        self.assertEqual(self.counts['terms'], Term.objects.count())
+        self.assertEqual(self.counts['timeslots'], Timeslot.objects.count())
+
+    def test_public_slots_do_not_overlap(self):
+        """Only private demos should overlap other timeslots."""
+        slots = list(Timeslot.objects.public())
+        self.assertTrue(slots)
+        for before, after in zip(slots, slots[1:]):
+            self.assertTrue(before.end_time <= after.start_time)
+
+    @unittest.skipIf(
+        not nltime.NON_EXISTENT_TIME_ERRORS,
+        'pytz is not installed'
+    )
+    def test_dst_changes(self):
+        """Slots at local times the clocks go forward past should be
+        left out, rather than failing."""
+        season = Season.objects.all()[0]
+        with timezone.override('Europe/London'):
+            term = Term(
+                name='Spring',
+                start_date=nltime.un_nld(datetime.datetime(2013, 3, 25)),
+                end_date=nltime.un_nld(datetime.datetime(2013, 4, 1))
+            )
+            skipped = synthetic.timeslot(
+                self.creator, season, term, 0, 6, 1, 1
+            )
+            after = synthetic.timeslot(
+                self.creator, season, term, 0, 6, 2, 1
+            )
+        self.assertEqual(skipped, None)
+        self.assertEqual(
+            after.start_time,
+            datetime.datetime(2013, 3, 31, 1, tzinfo=timezone.utc)
+        )
+
+
+class InstrumentTests(TestCase):
+    """
+    Tests that schedule build phases are reported to instrumentation sinks.
+
+    """
+    def setUp(self):
+        self.sink = instrument.AggregateSink()
+        instrument.add_sink(self.sink)
+
+    def tearDown(self):
+        instrument.remove_sink(self.sink)
+
+    def test_build_phase(self):
+        """Evaluating a schedule should report a build phase."""
+        sched = Schedule(timezone.now(), timedelta(days=1), lambda s: [])
+        sched.data
+        summary = self.sink.summary()
+        self.assertEqual(summary['build']['count'], 1)
+        self.assertEqual(summary['build']['queries_p95'], 0)
+
+    def test_queries_not_kept(self):
+        """The queries logged to count them should be dropped afterwards,
+        and the debug cursor left as it was."""
+        debug_cursor = connection.use_debug_cursor
+        before = len(connection.queries)
+        with instrument.phase('outer'):
+            with instrument.phase('inner'):
+                Term.objects.count()
+            Term.objects.count()
+        self.assertEqual(len(connection.queries), before)
+        self.assertEqual(connection.use_debug_cursor, debug_cursor)
+        summary = self.sink.summary()
+        self.assertEqual(summary['inner']['queries_p50'], 1)
+        self.assertEqual(summary['outer']['queries_p50'], 2)
+
+    def test_percentiles(self):
+        """The aggregate sink should give nearest-rank percentiles."""
+        for i in xrange(1, 101):
+            self.sink.emit({'phase': 'p', 'seconds': i, 'queries': 0})
+        summary = self.sink.summary()['p']
+        self.assertEqual(summary['p50'], 50)
+        self.assertEqual(summary['p95'], 95)
+
+
+class ProfilingTests(TestCase):
+    """
+    Tests that the sampling profiler hook writes profiles when, and only
+    when, configured to.
+
+    """
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.request = RequestFactory().get('/')
+        self.view = profiling.profiled(profiling.by_name('test'))(
+            lambda request, pk: pk
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_disabled(self):
+        """Without SCHEDULE_PROFILE_DIR, nothing should be profiled."""
+        with override_settings(SCHEDULE_PROFILE_EVERY=1):
+            self.assertEqual(self.view(self.request, 3), 3)
+        self.assertEqual(os.listdir(self.dir), [])
+
+    def test_every(self):
+        """With SCHEDULE_PROFILE_EVERY=1, every request is profiled."""
+        with override_settings(
+            SCHEDULE_PROFILE_DIR=self.dir,
+            SCHEDULE_PROFILE_EVERY=1
+        ):
+            self.assertEqual(self.view(self.request, 3), 3)
+        files = os.listdir(self.dir)
+        self.assertEqual(len(files), 1)
+        self.assertTrue(files[0].startswith('test-3-'))
+        self.assertTrue(files[0].endswith('.pstats'))
+
+    def test_renders_lazy_responses(self):
+        """Lazy responses should be rendered while being profiled."""
+        class Lazy(object):
+            rendered = False
+
+            def render(self):
+                self.rendered = True
+
+        view = profiling.profiled(profiling.by_name('lazy'))(
+            lambda request: Lazy()
+        )
+        with override_settings(
+            SCHEDULE_PROFILE_DIR=self.dir,
+            SCHEDULE_PROFILE_EVERY=1
+        ):
+            self.assertTrue(view(self.request).rendered)
+        with override_settings(SCHEDULE_PROFILE_EVERY=1):
+            self.assertFalse(view(self.request).rendered)
+
+
+class ICalendarTests(TestCase):
+    """
+    Tests the iCalendar feed's line formatting and ETags.
+
+    """
+    fixtures = [
+        'test_people',
+        'test_terms',
+        'filler_show',
+        'test_shows'
+    ]
+
+    def test_escape(self):
+        self.assertEqual(
+            ical.escape(u'a,b;c\\d\ne'),
+            u'a\\,b\\;c\\\\d\\ne'
+        )
+
+    def test_fold(self):
+        """Long lines should be folded at 75 octets without splitting
+        characters."""
+        folded = ical.line('SUMMARY', u'\u00e9' * 100)
+        self.assertTrue(folded.endswith('\r\n'))
+        parts = folded[:-2].split('\r\n ')
+        self.assertTrue(len(parts) > 1)
+        for part in parts:
+            self.assertTrue(len(part) <= 75)
+            part.decode('utf-8')
+        self.assertEqual(
+            ''.join(parts).decode('utf-8'),
+            u'SUMMARY:' + u'\u00e9' * 100
+        )
+
+    def test_etag(self):
+        """The feed ETag should not depend on the cache (which is a
+        DummyCache in tests), and should change with the log of the feed's
+        own timeslots only."""
+        slot = Timeslot.objects.all()[0]
+        feed = Timeslot.objects.filter(pk=slot.pk)
+        etag = ical.feed_etag(feed)
+        self.assertTrue(etag)
+        self.assertEqual(ical.feed_etag(feed), etag)
+        TimeslotChange.objects.create(
+            timeslot_id=slot.pk + 1,
+            action=TimeslotChange.CHANGED
+        )
+        self.assertEqual(ical.feed_etag(feed), etag)
+        TimeslotChange.objects.create(
+            timeslot_id=slot.pk,
+            action=TimeslotChange.CHANGED
+        )
+        self.assertNotEqual(ical.feed_etag(feed), etag)
+
+
+class TimeslotChangeTests(TestCase):
+    """
+    Tests the timeslot change log used by the JSON API.
+
+    """
+    fixtures = [
+        'test_people',
+        'test_terms',
+        'filler_show',
+        'test_shows'
+    ]
+
+    def test_save_logs_previous_position(self):
+        """Saving a moved timeslot should log where it was before."""
+        slot = Timeslot.objects.all()[0]
+        before = slot.start_time, slot.end_time
+        slot.start_time += timedelta(hours=1)
+        slot.save()
+        change = TimeslotChange.objects.order_by('-pk')[0]
+        self.assertEqual(change.timeslot_id, slot.pk)
+        self.assertEqual(change.action, TimeslotChange.CHANGED)
+        self.assertEqual((change.previous_start, change.previous_end), before)
+
+    def test_since(self):
+        """The last change to a timeslot after a revision should win."""
+        rev = TimeslotChange.latest_revision()
+        for timeslot_id, action in [
+            (1, TimeslotChange.CREATED),
+            (2, TimeslotChange.CHANGED),
+            (2, TimeslotChange.DELETED),
+            (3, TimeslotChange.DELETED),
+            (3, TimeslotChange.CREATED),
+        ]:
+            TimeslotChange.objects.create(
+                timeslot_id=timeslot_id,
+                action=action
+            )
+        self.assertEqual(TimeslotChange.since(rev), (set([1, 3]), set([2])))
+        self.assertEqual(
+            TimeslotChange.since(TimeslotChange.latest_revision()),
+            (set(), set())
+        )
+
+    def test_previously_in_range(self):
+        """Only timeslots in the range as of the revision should count,
+        judged by their first change after it."""
+        hour = timedelta(hours=1)
+        start = timezone.now().replace(
+            year=2012, month=10, day=8,
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        end = start + timedelta(days=1)
+        outside = start - timedelta(days=2)
+        rev = TimeslotChange.latest_revision()
+        for timeslot_id, action, previous in [
+            # Moved out of the range.
+            (1, TimeslotChange.CHANGED, start),
+            # Deleted from the range.
+            (2, TimeslotChange.DELETED, start + hour),
+            # Created since, then moved about.
+            (3, TimeslotChange.CREATED, None),
+            (3, TimeslotChange.CHANGED, start),
+            # Moved into the range, then out again.
+            (4, TimeslotChange.CHANGED, outside),
+            (4, TimeslotChange.CHANGED, start),
+            # Changed somewhere else entirely.
+            (5, TimeslotChange.CHANGED, outside),
+        ]:
+            TimeslotChange.objects.create(
+                timeslot_id=timeslot_id,
+                action=action,
+                previous_start=previous,
+                previous_end=previous + hour if previous else None
+            )
+        self.assertEqual(
+            TimeslotChange.previously_in_range(rev, start, end),
+            set([1, 2])
+        )
+
+
+class ExportTests(SyntheticScheduleMixin, TestCase):
+    """
+    Tests that timeslot exports page through every timeslot exactly once.
+
+    """
+    weeks = 2
+
+    def setUp(self):
+        super(ExportTests, self).setUp()
+        self.timeslots = export.in_range(
+            self.start,
+            self.start + timedelta(weeks=2)
+        )
+        self.old_hooks = block.HOOKS
+        block.HOOKS = []
+
+    def tearDown(self):
+        block.HOOKS = self.old_hooks
+
+    def test_pages(self):
+        """Small pages should still cover every timeslot, in order."""
+        ids = [row['id'] for row in export.rows(self.timeslots, page_size=7)]
+        self.assertEqual(
+            ids,
+            list(
+                self.timeslots.order_by('start_time', 'pk')
+                .values_list('pk', flat=True)
+            )
+        )
+
+    def test_csv(self):
+        """The CSV export should have a header and a line per timeslot."""
+        lines = list(export.lines(self.timeslots, 'csv'))
+        self.assertEqual(lines[0].strip(), ','.join(export.FIELDS))
+        self.assertEqual(len(lines) - 1, self.timeslots.count())
+
+    def test_select(self):
+        """Bad ranges should be refused."""
+        self.assertRaises(ValueError, export.select)
+        self.assertRaises(
+            ValueError,
+            export.select,
+            start='2012-10-08',
+            end='2012-10-01'
+        )
+
+
+class SweepTests(TestCase):
+    """
+    Tests the sweep used to find clashes.
+
+    """
+    def overlapping(self, ranges):
+        return sorted(
+            (first[2], second[2]) for first, second in clash.sweep(
+                ranges,
+                operator.itemgetter(0),
+                operator.itemgetter(1)
+            )
+        )
+
+    def test_touching_ranges_do_not_overlap(self):
+        self.assertEqual(
+            self.overlapping([(0, 10, 'a'), (10, 20, 'b'), (20, 30, 'c')]),
+            []
+        )
+
+    def test_overlaps(self):
+        self.assertEqual(
+            self.overlapping([
+                (0, 100, 'long'),
+                (10, 20, 'a'),
+                (15, 30, 'b'),
+                (40, 50, 'c'),
+                (100, 110, 'after'),
+            ]),
+            [('a', 'b'), ('long', 'a'), ('long', 'b'), ('long', 'c')]
+        )
+
+
+class ClashViewTests(TestCase):
+    """
+    Tests that the presenter clash view refuses bad proposals.
+
+    """
+    def get(self, **params):
+        request = RequestFactory().get('/', params)
+        request.user = User(is_active=True, is_staff=True)
+        return clash_views.presenter_clashes_json(request)
+
+    def test_duration_must_be_positive(self):
+        for duration in ('0', '-60'):
+            self.assertEqual(
+                self.get(
+                    show='1',
+                    start='2012-10-10T09:00',
+                    duration=duration
+                ).status_code,
+                400
+            )
+
+    @unittest.skipIf(
+        not clash_views.INVALID_TIME_ERRORS,
+        'pytz is not installed'
+    )
+    def test_invalid_local_times(self):
+        """Local times skipped or repeated by DST changes are refused."""
+        with timezone.override('Europe/London'):
+            for start in ('2012-03-25T01:30', '2012-10-28T01:30'):
+                self.assertEqual(
+                    self.get(show='1', start=start, duration='60')
+                    .status_code,
+                    400
+                )
+
+
+class RecurringTests(TestCase):
+    """
+    Tests the building blocks of the recurring slot finder.
+
+    """
+    def test_interval_index(self):
+        index = recurring.IntervalIndex([(0, 10), (5, 20), (30, 40)])
+        self.assertEqual(index.starts, [0, 30])
+        self.assertTrue(index.is_free(20, 30))
+        self.assertFalse(index.is_free(19, 21))
+        self.assertFalse(index.is_free(31, 32))
+        self.assertTrue(index.is_free(40, 50))
+
+    def test_weekly_keeps_local_time(self):
+        """Occurrences should keep their local time across DST changes."""
+        first = timezone.make_aware(
+            datetime.datetime(2012, 3, 1, 19),
+            timezone.get_current_timezone()
+        )
+        starts = recurring.weekly(first, first + timedelta(weeks=9, days=1))
+        self.assertEqual(len(starts), 10)
+        self.assertEqual(
+            set(timezone.localtime(start).hour for start in starts),
+            set([19])
+        )
+
+    @unittest.skipIf(
+        not nltime.NON_EXISTENT_TIME_ERRORS,
+        'pytz is not installed'
+    )
+    def test_dst_changes(self):
+        """Local times repeated when the clocks go back should be taken
+        once, and those skipped when they go forward left out.
+        """
+        def term(start, end):
+            return Term(
+                name='DST',
+                start_date=datetime.datetime(*start, tzinfo=timezone.utc),
+                end_date=datetime.datetime(*end, tzinfo=timezone.utc)
+            )
+        hour = timedelta(hours=1)
+
+        with timezone.override('Europe/London'):
+            autumn = term((2012, 10, 1), (2012, 11, 5))
+            self.assertEqual(
+                len(recurring.free_slots(autumn, hour)),
+                7 * 24
+            )
+            starts = recurring.term_occurrences(
+                autumn,
+                6,
+                datetime.time(1),
+                hour
+            )
+            self.assertEqual(len(starts), 5)
+            self.assertIn(
+                datetime.datetime(2012, 10, 28, tzinfo=timezone.utc),
+                starts
+            )
+
+            spring = term((2013, 3, 18), (2013, 4, 8))
+            occurrences = recurring.term_local_occurrences(
+                spring,
+                6,
+                datetime.time(1),
+                hour
+            )
+            self.assertEqual(
+                [start for local, start in occurrences if start is None],
+                [None]
+            )
+            found, = recurring.free_slots(
+                spring,
+                hour,
+                weekdays=[6],
+                hours=[1]
+            )
+            self.assertEqual(len(found.starts), 2)
+
+
+class ScheduleSeasonTests(SyntheticScheduleMixin, TestCase):
+    """
+    Tests bulk scheduling of weekly timeslots for a season.
+
+    """
+    def setUp(self):
+        super(ScheduleSeasonTests, self).setUp()
+        self.term = Term.of(self.start + timedelta(days=1))
+        self.season = Season.objects.filter(term=self.term)[0]
+
+    def test_conflicts_are_refused(self):
+        """Scheduling over existing public shows should fail, and create
+        nothing."""
+        busy = Timeslot.objects.public().filter(
+            start_time__gte=self.term.start_date
+        ).exclude(season__show__show_type__is_collapsible=True)[0]
+        local = timezone.localtime(busy.start_time)
+        count = Timeslot.objects.count()
+        self.assertRaises(
+            ScheduleConflictError,
+            recurring.schedule_season,
+            self.season,
+            local.weekday(),
+            local.time(),
+            busy.duration,
+            busy.creator
+        )
+        self.assertEqual(Timeslot.objects.count(), count)
+
+    def test_free_slot_is_scheduled(self):
+        """A free slot should be scheduled every week, in one go."""
+        hour = timedelta(hours=1)
+        free = recurring.free_slots(self.term, hour)
+        self.assertTrue(free)
+        existing = set(self.season.timeslot_set.values_list('pk', flat=True))
+        self.assertTrue(existing)
+        revision = TimeslotChange.latest_revision()
+        created = recurring.schedule_season(
+            self.season,
+            free[0].weekday,
+            free[0].time,
+            hour,
+            Person.objects.all()[0]
+        )
+        self.assertEqual(len(created), len(free[0].starts))
+        # Only the new timeslots, not the season's others, are logged.
+        self.assertEqual(
+            TimeslotChange.since(revision)[0],
+            set(self.season.timeslot_set.values_list('pk', flat=True))
+            - existing
+        )
+        self.assertEqual(
+            len(TimeslotChange.since(revision)[0]),
+            len(created)
+        )
+
+    @unittest.skipIf(
+        not nltime.NON_EXISTENT_TIME_ERRORS,
+        'pytz is not installed'
+    )
+    def test_dst_change(self):
+        """A slot at a local time repeated when the clocks go back should
+        be scheduled once that week, rather than failing."""
+        hour = timedelta(hours=1)
+        taken = set(
+            self.season.timeslot_set.values_list('start_time', flat=True)
+        )
+        with timezone.override('Europe/London'):
+            starts = recurring.term_occurrences(
+                self.term,
+                6,
+                datetime.time(1),
+                hour
+            )
+            created = recurring.schedule_season(
+                self.season,
+                6,
+                datetime.time(1),
+                hour,
+                self.creator,
+                force=True
+            )
+        self.assertIn(
+            datetime.datetime(2012, 10, 28, tzinfo=timezone.utc),
+            starts
+        )
+        self.assertEqual(
+            sorted(slot.start_time for slot in created),
+            sorted(set(starts) - taken)
+        )
+
+
+class RolloverTests(SyntheticScheduleMixin, TestCase):
+    """
+    Tests rolling seasons over into a new term.
+
+    """
+    def setUp(self):
+        super(RolloverTests, self).setUp()
+        self.season = Season.objects.filter(
+            term=Term.of(self.start + timedelta(days=1)),
+            show__show_type__name='Regular'
+        )[0]
+        self.term = Term.objects.create(
+            name='Next',
+            start_date=self.start + timedelta(weeks=5),
+            end_date=self.start + timedelta(weeks=8)
+        )
+
+    def test_rollover(self):
+        """A season should be cloned into the new term, with its timeslots
+        repeated in every week of it."""
+        result = rollover.rollover([self.season], self.term)
+        self.assertEqual(result.seasons, 1)
+        self.assertEqual(result.conflicts, [])
+        new = Season.objects.get(term=self.term, show=self.season.show)
+        slots = list(new.timeslot_set.all())
+        self.assertEqual(len(slots), result.timeslots)
+        self.assertTrue(slots)
+        for slot in slots:
+            self.assertTrue(self.term.start_date <= slot.start_time)
+            self.assertTrue(slot.end_time <= self.term.end_date)
+
+    def test_many_timeslots(self):
+        """Rolling over more timeslots than SQLite allows parameters in one
+        query should work, and log every new timeslot."""
+        first = self.season.timeslot_set.order_by('start_time')[0]
+        length = timedelta(minutes=20)
+        # A week of back-to-back slots gives 504 weekly patterns.
+        synthetic.bulk_create(Timeslot, [
+            Timeslot(
+                season=self.season,
+                creator_id=first.creator_id,
+                start_time=first.start_time + i * length,
+                duration=length
+            )
+            for i in xrange(7 * 24 * 3)
+        ])
+        revision = TimeslotChange.latest_revision()
+        # The new slots clash with the season's own, hence force.
+        result = rollover.rollover([self.season], self.term, force=True)
+        self.assertTrue(result.timeslots > 999)
+        new = Season.objects.get(term=self.term, show=self.season.show)
+        self.assertEqual(new.timeslot_set.count(), result.timeslots)
+        self.assertEqual(
+            TimeslotChange.since(revision)[0],
+            set(new.timeslot_set.values_list('pk', flat=True))
+        )
+
+    @unittest.skipIf(
+        not nltime.NON_EXISTENT_TIME_ERRORS,
+        'pytz is not installed'
+    )
+    def test_skipped_by_dst(self):
+        """Occurrences at local times the clocks go forward past should be
+        reported, not created."""
+        first = self.season.timeslot_set.order_by('start_time')[0]
+        spring = Term.objects.create(
+            name='Spring',
+            start_date=datetime.datetime(2013, 3, 18, tzinfo=timezone.utc),
+            end_date=datetime.datetime(2013, 4, 8, tzinfo=timezone.utc)
+        )
+        with timezone.override('Europe/London'):
+            Timeslot.objects.create(
+                season=self.season,
+                creator_id=first.creator_id,
+                start_time=nltime.un_nld(datetime.datetime(2012, 10, 7, 1)),
+                duration=timedelta(minutes=30)
+            )
+            result = rollover.rollover([self.season], spring, force=True)
+        self.assertIn(
+            rollover.Skipped(self.season, datetime.datetime(2013, 3, 31, 1)),
+            result.skipped
+        )
+        new = Season.objects.get(term=spring, show=self.season.show)
+        self.assertEqual(new.timeslot_set.count(), result.timeslots)
+
+    def test_one_season_per_show(self):
+        """Rolling over two seasons of one show should fail."""
+        self.assertRaises(
+            ValueError,
+            rollover.rollover,
+            [self.season, self.season],
+            self.term
+        )
+
+
+class RescheduleTests(SyntheticScheduleMixin, TestCase):
+    """
+    Tests moving and resizing timeslots in bulk.
+
+    """
+    def setUp(self):
+        super(RescheduleTests, self).setUp()
+        season = Season.objects.filter(show__show_type__name='Regular')[0]
+        self.timeslots = season.timeslot_set.all()
+        self.before = dict(
+            self.timeslots.values_list('pk', 'start_time')
+        )
+
+    def test_shift(self):
+        """Timeslots should all be moved by the same absolute time, and
+        each change logged."""
+        hour = timedelta(hours=1)
+        revision = TimeslotChange.latest_revision()
+        changed = reschedule.shift(self.timeslots, offset=hour)
+        self.assertEqual(changed, len(self.before))
+        for pk, start in self.timeslots.values_list('pk', 'start_time'):
+            self.assertEqual(start, self.before[pk] + hour)
+        self.assertEqual(
+            TimeslotChange.since(revision)[0],
+            set(self.before)
+        )
+
+    def test_shift_local(self):
+        """Timeslots moved by a week of local time should keep their local
+        times, even across a DST change."""
+        week = timedelta(weeks=1)
+        reschedule.shift(self.timeslots, offset=week, local=True)
+        for pk, start in self.timeslots.values_list('pk', 'start_time'):
+            self.assertEqual(
+                timezone.localtime(start).time(),
+                timezone.localtime(self.before[pk]).time()
+            )
+
+    def test_resize(self):
+        """Timeslots should each be lengthened by the same time, whatever
+        their durations were, and keep their starts."""
+        durations = dict(self.timeslots.values_list('pk', 'duration'))
+        first = min(self.before, key=self.before.get)
+        # Give the timeslots more than one duration to start with.
+        Timeslot.objects.filter(pk=first).update(
+            duration=durations[first] + timedelta(hours=1)
+        )
+        durations[first] += timedelta(hours=1)
+
+        half_hour = timedelta(minutes=30)
+        reschedule.shift(self.timeslots, resize=half_hour)
+        for pk, start, duration in self.timeslots.values_list(
+            'pk',
+            'start_time',
+            'duration'
+        ):
+            self.assertEqual(start, self.before[pk])
+            self.assertEqual(duration, durations[pk] + half_hour)
+
+    def test_one_update(self):
+        """Moving many timeslots alike should take one UPDATE, however
+        many there are."""
+        timeslots = Timeslot.objects.all()
+        self.assertTrue(timeslots.count() > recurring.BATCH_SIZE)
+        debug_cursor = connection.use_debug_cursor
+        connection.use_debug_cursor = True
+        before = len(connection.queries)
+        try:
+            reschedule.shift(timeslots, offset=timedelta(hours=1))
+        finally:
+            connection.use_debug_cursor = debug_cursor
+        table = Timeslot._meta.db_table
+        self.assertEqual(
+            len([
+                query for query in connection.queries[before:]
+                if query['sql'].startswith('UPDATE')
+                and table in query['sql'].split()[1]
+            ]),
+            1
+        )
+
+    def test_resize_to_nothing(self):
+        """Resizing timeslots to no duration should fail."""
+        self.assertRaises(
+            ValueError,
+            reschedule.shift,
+            self.timeslots,
+            resize=-timedelta(days=1)
+        )
+
+
+class AnalyticsTests(TestCase):
+    """
+    Tests the vectorised schedule analytics on hand-made arrays.
+
+    """
+    def slots(self):
+        numpy = analytics.numpy
+        week = analytics.MINUTES_PER_WEEK
+        ints = lambda *values: numpy.array(values, dtype=numpy.int64)
+        flags = lambda *values: numpy.array(values, dtype=numpy.bool_)
+        # Two weeks; live slots Monday 00:00-01:00 and 01:00-03:00, and a
+        # collapsible one from 02:00 to 04:00.
+        return analytics.Slots(
+            minutes=2 * week,
+            local_term=(0, 2 * week),
+            start=ints(0, 60, 120),
+            end=ints(60, 180, 240),
+            local_start=ints(0, 60, 120),
+            local_end=ints(60, 180, 240),
+            block=ints(1, 2, 2),
+            public=flags(True, True, True),
+            collapsible=flags(False, False, True)
+        )
+
+    @unittest.skipIf(analytics.numpy is None, 'NumPy is not installed.')
+    def test_occupancy(self):
+        numpy = analytics.numpy
+        covered = analytics.occupancy(
+            numpy.array([1, 3, -5]),
+            numpy.array([2, 9, 0]),
+            6
+        )
+        self.assertEqual(
+            covered.tolist(),
+            [False, True, False, True, True, True]
+        )
+
+    @unittest.skipIf(analytics.numpy is None, 'NumPy is not installed.')
+    def test_figures(self):
+        slots = self.slots()
+        self.assertEqual(analytics.airtime(slots), {1: 1.0, 2: 2.0})
+        self.assertAlmostEqual(
+            analytics.filler_share(slots),
+            1 - 180.0 / slots.minutes
+        )
+        heatmap = analytics.heatmap(slots)
+        self.assertEqual(heatmap.shape, (7, 24))
+        # Live in the first week only, so half of each hour on average.
+        self.assertEqual(heatmap[0][:4].tolist(), [0.5, 0.5, 0.5, 0.0])
+
+
+class IntegrityTests(SyntheticScheduleMixin, TestCase):
+    """
+    Tests the timeslot integrity checker.
+
+    """
+    def test_problems_found(self):
+        """Bad timeslots should be reported, across page boundaries."""
+        creator, start = self.creator, self.start
+        found = lambda: set(
+            (problem.kind, problem.timeslot)
+            for problem in integrity.check(page_size=7)
+        )
+        before = found()
+
+        season = Season.objects.filter(show__show_type__name='Regular')[0]
+        empty, busy = season.timeslot_set.all()[:2]
+        Timeslot.objects.filter(pk=empty.pk).update(duration=timedelta(0))
+        stray = Timeslot.objects.create(
+            season=season,
+            creator=creator,
+            start_time=start - timedelta(weeks=1),
+            duration=timedelta(hours=1)
+        )
+        # Lies within another public timeslot, so that only it overlaps.
+        minute = timedelta(minutes=1)
+        overlap = Timeslot.objects.create(
+            season=season,
+            creator=creator,
+            start_time=busy.start_time + minute,
+            duration=busy.duration - minute
+        )
+
+        self.assertEqual(
+            found() - before,
+            set([
+                (integrity.DURATION, empty.pk),
+                (integrity.NO_TERM, stray.pk),
+                (integrity.WRONG_TERM, stray.pk),
+                (integrity.OVERLAP, overlap.pk),
+            ])
+        )
+
+
+class LaneTests(TestCase):
+    """
+    Tests the assignment of overlapping slots to schedule table lanes.
+
+    """
+    def test_assign_lanes(self):
+        hour = timedelta(hours=1)
+        start = timezone.now().replace(
+            year=2012, month=10, day=8,
+            hour=7, minute=0, second=0, microsecond=0
+        )
+        slots = [
+            StubSlot(start, 3 * hour),
+            StubSlot(start + hour, hour),
+            StubSlot(start + hour, 3 * hour),
+            StubSlot(start + 2 * hour, hour),
+            StubSlot(start + 3 * hour, hour),
+        ]
+        lanes, count = week_table.assign_lanes(slots)
+        self.assertEqual(count, 3)
+        self.assertEqual(lanes, [0, 1, 2, 1, 0])
+        self.assertEqual(week_table.assign_lanes([]), ([], 1))
+
+
+class IndexTests(TestCase):
+    """
+    Tests the SQL adding new schedule indexes to existing databases.
+
+    """
+    def test_start_time(self):
+        statements = schedule_indexes.index_sql()
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith('CREATE INDEX'))
+        self.assertIn(Timeslot._meta.db_table, statements[0])
+        self.assertIn('start_time', statements[0])
+
+
+class RenderStub(object):
+    """Stand-in for django.shortcuts that keeps the context instead of
+    rendering a template (the templates live in the site, not this app).
+
+    """
+    def render(self, request, template, ctx=None):
+        self.ctx = ctx
+        return ctx
+
+
+class QueryBudgets(SyntheticScheduleMixin, TestCase):
+    """
+    Tests that the schedule and ShowDB views make no more than a fixed
+    number of queries, however big the schedule.
+
+    Paths known to be prone to a query per item (relative numbers,
+    locations, block matching and so on) are exercised, so that regressions
+    fail here rather than in production.
+
+    """
+    shows = 20
+
+    def setUp(self):
+        super(QueryBudgets, self).setUp()
+        self.request = RequestFactory().get('/')
+        self.old_shortcuts = common.shortcuts
+        common.shortcuts = header.shortcuts = home.shortcuts = RenderStub()
+        self.show = Show.objects.listable()[0]
+
+    def tearDown(self):
+        common.shortcuts = header.shortcuts = home.shortcuts = (
+            self.old_shortcuts
+        )
+
+    @contextlib.contextmanager
+    def assertMaxQueries(self, budget):
+        """Asserts that the block makes at most budget queries."""
+        debug_cursor = connection.use_debug_cursor
+        connection.use_debug_cursor = True
+        before = len(connection.queries)
+        try:
+            yield
+        finally:
+            connection.use_debug_cursor = debug_cursor
+        made = len(connection.queries) - before
+        self.assertTrue(
+            made <= budget,
+            'Made {} queries, budget was {}:\n{}'.format(
+                made,
+                budget,
+                '\n'.join(q['sql'] for q in connection.queries[before:])
+            )
+        )
+
+    def touch_slots(self, slots):
+        """Touches the attributes of slots that schedule templates use."""
+        for slot in slots:
+            slot.block
+            slot.show_type
+            slot.is_collapsible
+            slot.has_showdb_entry
+
+    def test_schedule_week(self):
+        with self.assertMaxQueries(10):
+            common.schedule_view(self.request, 'week', self.start.date())
+            schedule = common.shortcuts.ctx['schedule']
+            table = schedule.tabulate()
+            self.touch_slots(
+                cell[0] for row in table for cell in row[1:] if cell
+            )
+
+    def test_schedule_week_private(self):
+        """The private week, in which demos overlap the public schedule,
+        should tabulate in lanes, with every show in the table."""
+        request = RequestFactory().get('/', {'show_private': 'true'})
+        with self.assertMaxQueries(10):
+            common.schedule_view(request, 'week', self.start.date())
+            self.assertTrue(common.shortcuts.ctx['lanes'])
+            schedule = common.shortcuts.ctx['schedule']
+            # Templates only call tabulate, which should use lanes itself.
+            table = schedule.tabulate()
+            cells = [
+                cell for row in table for day in row[1:]
+                for cell in day if cell
+            ]
+            self.touch_slots(cell[0] for cell in cells)
+        self.assertEqual(
+            set(slot.pk for slot in schedule.data if slot.pk),
+            set(cell[0].pk for cell in cells if cell[0].pk)
+        )
+
+    def test_schedule_day(self):
+        with self.assertMaxQueries(10):
+            common.schedule_view(self.request, 'day', self.start.date())
+            self.touch_slots(common.shortcuts.ctx['schedule'].data)
+
+    def test_header_and_home(self):
+        for view in (header.header, home.home_schedule):
+            # Up to three more queries fetch the titles.
+            with self.assertMaxQueries(9):
+                view(self.request)
+                # The templates take their timeslots from range.day.
+                for slot in sched_range.day(self.start, limit=5):
+                    slot.show_type
+                    slot.is_collapsible
+                    slot.title
+
+    def test_show_index(self):
+        with self.assertMaxQueries(2):
+            response = showdb.show_index(self.request)
+            shows = response.context_data['object_list']
+            for show in shows:
+                show.show_type.has_showdb_entry
+                show.title
+        self.assertTrue(shows)
+
+    def test_show_detail(self):
+        with self.assertMaxQueries(2):
+            response = showdb.show_detail(self.request, pk=self.show.pk)
+            show = response.context_data['object']
+            show.show_type
+            show.title
+
+    def test_season_detail_relative(self):
+        with self.assertMaxQueries(6):
+            response = showdb.season_detail(self.request, self.show.pk, '1')
+            response.context_data['object'].number
+
+    def test_timeslot_detail_relative(self):
+        with self.assertMaxQueries(10):
+            response = showdb.timeslot_detail(
+                self.request,
+                self.show.pk,
+                '1',
+                '1'
+            )
+            timeslot = response.context_data['object']
+            timeslot.number
+            timeslot.season.number
+            timeslot.location
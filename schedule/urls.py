@@ -37,5 +37,18 @@ urlpatterns = patterns(
         'schedule_week',
         name='schedule_week'
     ),
+    # FEEDS
+    url(
+        r'^ical/$',
+        'schedule_ical',
+        name='schedule_ical'
+    ),
+    url(r'^json/', include('schedule.urls_api')),
+    # REPORTING
+    url(
+        r'^export/$',
+        'schedule_export',
+        name='schedule_export'
+    ),
     url(r'^shows/', include('schedule.urls_showdb')),
 )
@@ -0,0 +1,52 @@
+"""
+URLconf for the JSON schedule API of the `schedule` app.
+
+"""
+
+from django.conf.urls import patterns, url
+
+from urysite import url_regexes as ur
+
+
+urlpatterns = patterns(
+    'schedule.views',
+    # DAY SCHEDULES
+    url(
+        r'^today/',
+        'schedule_day_json',
+        name='today_json'
+    ),
+    url(
+        ur.DAY_REGEX,
+        'schedule_day_json',
+        name='schedule_day_json'
+    ),
+    url(
+        ur.WEEKDAY_REGEX,
+        'schedule_day_json',
+        name='schedule_weekday_json'
+    ),
+    # WEEK SCHEDULES
+    url(
+        r'^thisweek/',
+        'schedule_week_json',
+        name='this_week_json'
+    ),
+    url(
+        ur.WEEK_REGEX,
+        'schedule_week_json',
+        name='schedule_week_json'
+    ),
+    # CLASH CHECKS
+    url(
+        r'^clashes/presenters/$',
+        'presenter_clashes_json',
+        name='presenter_clashes_json'
+    ),
+    # ANALYTICS
+    url(
+        r'^analytics/(?P<term_id>\d+)/$',
+        'term_analytics_json',
+        name='term_analytics_json'
+    ),
+)
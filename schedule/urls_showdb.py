@@ -4,9 +4,10 @@ URLconf for the ShowDB section of the `schedule` app.
 """
 
 from django.conf.urls import patterns, url
-from django.views.generic import ListView, DetailView
+from django.views.generic import DetailView
 
 from schedule import models
+from schedule.utils.profiling import profiled, by_name
 from urysite import url_regexes as ur
 
 
@@ -35,22 +36,31 @@ urlpatterns = patterns(
     'schedule.views',
     url(
         r'^$',
-        ListView.as_view(queryset=models.Show.objects.listable()),
+        'show_index',
         name='show_index'
     ),
+    url(
+        r'^{}/ical/$'.format(show_regex),
+        'show_ical',
+        name='show_ical'
+    ),
     url(
         showdb_show_regex,
-        DetailView.as_view(queryset=models.Show.objects.listable()),
+        'show_detail',
         name='show_detail'
     ),
     url(
         showdb_season_regex,
-        DetailView.as_view(queryset=models.Season.objects.public()),
+        profiled(by_name('season_detail'))(
+            DetailView.as_view(queryset=models.Season.objects.public())
+        ),
         name='season_detail'
     ),
     url(
         showdb_timeslot_regex,
-        DetailView.as_view(queryset=models.Timeslot.objects.public()),
+        profiled(by_name('timeslot_detail'))(
+            DetailView.as_view(queryset=models.Timeslot.objects.public())
+        ),
         name='timeslot_detail'
     ),
     url(
@@ -0,0 +1,238 @@
+"""Schedule analytics computed over whole terms.
+
+A term's timeslots are loaded once into parallel NumPy arrays (their times in
+minutes, blocks and show type flags), and the figures are then worked out
+from those arrays without going back to Python for each timeslot:
+
+- airtime: the hours of live programming each block got;
+- heatmap: how much of each local weekday and hour was live, on average
+  over the weeks of the term;
+- filler share: the fraction of the term not covered by live programming,
+  and so left to filler and sustainer shows.
+
+Live programming is public timeslots whose show types are not collapsible.
+
+NumPy is an optional dependency: without it, the rest of the schedule system
+works as normal, but these functions raise ImproperlyConfigured.
+"""
+
+import collections
+import datetime
+
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .. import models
+from . import block, export, memo, nltime
+
+
+MINUTES_PER_WEEK = 7 * 24 * 60
+
+# A term's timeslots as parallel arrays, one element per timeslot.
+#
+# minutes is the length of the term, and start and end are in minutes since
+# its start (end being clipped to the term).  local_term, local_start and
+# local_end are in minutes of local time since midnight on the Monday of the
+# term's first week, local_term being a (start, end) pair for the term
+# itself.  block holds block IDs (0 for none), and public and collapsible
+# the show type flags.
+Slots = collections.namedtuple(
+    'Slots',
+    [
+        'minutes',
+        'local_term',
+        'start',
+        'end',
+        'local_start',
+        'local_end',
+        'block',
+        'public',
+        'collapsible'
+    ]
+)
+
+
+def require():
+    """Raises ImproperlyConfigured if NumPy is not installed."""
+    if numpy is None:
+        raise ImproperlyConfigured('Schedule analytics need NumPy.')
+
+
+###############################################################################
+# Loading
+
+def load(term):
+    """Loads the timeslots starting in a term into arrays.
+
+    Returns:
+        a Slots tuple.
+    """
+    require()
+    with memo.scope():
+        slots = block.annotate(
+            list(export.in_term(term).select_related('season__show'))
+        )
+        show_types = memo.show_types()
+    types = [show_types[slot.season.show.show_type_id] for slot in slots]
+
+    local_origin = nltime.nld(term.start_date)
+    monday = datetime.datetime.combine(
+        local_origin.date() - datetime.timedelta(
+            days=local_origin.weekday()
+        ),
+        datetime.time()
+    )
+    length = minutes(term.end_date - term.start_date)
+    local_end = minutes(nltime.nld(term.end_date) - monday)
+
+    def column(values, dtype=numpy.int64):
+        return numpy.fromiter(values, dtype, count=len(slots))
+
+    return Slots(
+        minutes=length,
+        local_term=(minutes(local_origin - monday), local_end),
+        start=column(
+            minutes(slot.start_time - term.start_date) for slot in slots
+        ),
+        end=column(
+            min(minutes(slot.end_time - term.start_date), length)
+            for slot in slots
+        ),
+        local_start=column(
+            minutes(nltime.nld(slot.start_time) - monday) for slot in slots
+        ),
+        local_end=column(
+            min(minutes(nltime.nld(slot.end_time) - monday), local_end)
+            for slot in slots
+        ),
+        block=column(
+            getattr(getattr(slot, 'block', None), 'pk', 0) for slot in slots
+        ),
+        public=column((t.public for t in types), numpy.bool_),
+        collapsible=column((t.is_collapsible for t in types), numpy.bool_)
+    )
+
+
+def minutes(delta):
+    """Converts a timedelta to a whole number of minutes."""
+    return int(delta.total_seconds()) // 60
+
+
+###############################################################################
+# Figures
+
+def live(slots):
+    """Returns a boolean array of which timeslots are live programming."""
+    return slots.public & ~slots.collapsible
+
+
+def airtime(slots):
+    """Works out the hours of live programming each block got.
+
+    Returns:
+        a dictionary mapping block IDs (0 for no block) to hours.
+    """
+    is_live = live(slots)
+    if not is_live.any():
+        return {}
+    hours = numpy.bincount(
+        slots.block[is_live],
+        weights=(slots.end - slots.start)[is_live]
+    ) / 60.0
+    return dict(
+        (int(pk), float(hours[pk])) for pk in numpy.flatnonzero(hours)
+    )
+
+
+def heatmap(slots):
+    """Works out how much of each local weekday and hour was live.
+
+    Returns:
+        a 7 by 24 array, indexed by weekday (0 for Monday) and hour, of the
+        fraction of that hour covered by live programming over the weeks of
+        the term.
+    """
+    first, last = slots.local_term
+    weeks = -(-last // MINUTES_PER_WEEK)
+    length = weeks * MINUTES_PER_WEEK
+    is_live = live(slots)
+    within = occupancy(numpy.array([first]), numpy.array([last]), length)
+    busy = within & occupancy(
+        slots.local_start[is_live],
+        slots.local_end[is_live],
+        length
+    )
+
+    shape = (weeks, 7, 24, 60)
+    busy_minutes = busy.reshape(shape).sum(axis=(0, 3))
+    term_minutes = within.reshape(shape).sum(axis=(0, 3))
+    return busy_minutes / numpy.maximum(term_minutes, 1).astype(float)
+
+
+def filler_share(slots):
+    """Returns the fraction of a term not covered by live programming."""
+    if not slots.minutes:
+        return 0.0
+    is_live = live(slots)
+    covered = occupancy(
+        slots.start[is_live],
+        slots.end[is_live],
+        slots.minutes
+    )
+    return 1.0 - float(covered.mean())
+
+
+def occupancy(starts, ends, length):
+    """Works out which minutes are covered by any of some ranges.
+
+    Args:
+        starts: an integer array of the starts of the ranges, in minutes.
+        ends: an integer array of the (exclusive) ends of the ranges.
+        length: the number of minutes to cover, from 0.
+
+    Returns:
+        a boolean array of length elements, each True if a range covers that
+        minute.
+    """
+    starts = numpy.clip(starts, 0, length).astype(numpy.int64)
+    ends = numpy.clip(ends, 0, length).astype(numpy.int64)
+    # Each range adds one at its start and takes one away at its end, so the
+    # running total is the number of ranges covering each minute.
+    changes = (
+        numpy.bincount(starts, minlength=length + 1)
+        - numpy.bincount(ends, minlength=length + 1)
+    )
+    return numpy.cumsum(changes[:length]) > 0
+
+
+###############################################################################
+# Summaries
+
+def summarise(term):
+    """Works out all the figures for a term.
+
+    Returns:
+        a JSON-ready dictionary with the term's ID and name; 'airtime', a
+        list of {'block', 'name', 'hours'} dictionaries in descending order
+        of hours; 'heatmap', a list of seven lists of 24 fractions; and
+        'filler_share'.
+    """
+    slots = load(term)
+    names = dict(models.Block.objects.values_list('pk', 'name'))
+    return {
+        'term': term.pk,
+        'name': unicode(term),
+        'airtime': [
+            {'block': pk or None, 'name': names.get(pk), 'hours': hours}
+            for pk, hours in sorted(
+                airtime(slots).iteritems(),
+                key=lambda item: -item[1]
+            )
+        ],
+        'heatmap': heatmap(slots).round(3).tolist(),
+        'filler_share': round(filler_share(slots), 4),
+    }
@@ -0,0 +1,405 @@
+"""Read-only columnar archives of the timeslots of closed terms.
+
+Once a term is over its schedule no longer changes, so there is no need to
+keep asking the database about it.  The archive_term management command
+freezes a closed term's timeslots into an archive file in
+SCHEDULE_ARCHIVE_DIR; Archive then memory-maps the file and answers range
+and point lookups from it without any queries, and range_builder uses it in
+place of the database for schedules lying within archived terms.
+
+Archives hold, for each timeslot, only what the schedule needs to be laid
+out: its ID, start and end, show, season, show type and block IDs, its title
+and whether it is public.  Anything else is looked up lazily from the
+database as normal.  If a closed term's schedule is edited after all, its
+archive must be regenerated (or deleted) with archive_term.
+
+File format
+===========
+
+All numbers are little-endian.  The file starts with a header (HEADER),
+followed by COLUMNS in order, each holding one value per timeslot with the
+timeslots sorted by start time then ID, followed by the string table: an
+array of string count + 1 offsets into a UTF-8 blob, then the blob itself.
+"""
+
+import bisect
+import calendar
+import collections
+import datetime
+import mmap
+import os
+import struct
+
+from django.conf import settings
+from django.utils import timezone
+
+from .. import models
+from . import block, export, memo, metadata
+
+
+MAGIC = 'LASSARC1'
+VERSION = 1
+
+# Magic, version, timeslot count, longest duration in seconds, string count.
+HEADER = struct.Struct('<8sIIqI')
+
+# Column names and struct codes.  Missing IDs and titles are stored as -1.
+COLUMNS = (
+    ('start', 'q'),
+    ('end', 'q'),
+    ('id', 'q'),
+    ('show_id', 'i'),
+    ('season_id', 'i'),
+    ('show_type_id', 'i'),
+    ('block_id', 'i'),
+    ('title', 'i'),
+    ('public', 'B'),
+)
+
+# Schedule variants that archives can stand in for, mapped to whether only
+# public timeslots are wanted.
+VARIANTS = {'public': True, 'private': False}
+
+# One archived timeslot, with times as seconds since the Unix epoch.
+Entry = collections.namedtuple('Entry', [name for name, _ in COLUMNS])
+
+
+###############################################################################
+# Writing
+
+def freeze(term, path=None):
+    """Writes an archive of every timeslot on at any point in a term.
+
+    Timeslots running over the start or end of the term are included, so
+    that schedules of the term's first and last days can be built from the
+    archive alone.
+
+    Args:
+        term: the Term to archive.
+        path: the file to write; defaults to the term's path in
+            SCHEDULE_ARCHIVE_DIR.
+
+    Returns:
+        the number of timeslots archived.
+    """
+    if path is None:
+        path = term_path(term)
+
+    timeslots = models.Timeslot.objects.in_range(
+        term.start_date,
+        term.end_date
+    )
+    public = set(timeslots.public().values_list('pk', flat=True))
+    columns = dict((name, []) for name, _ in COLUMNS)
+    strings = StringTable()
+    with memo.scope():
+        for page in export.pages(timeslots):
+            metadata.prefetch_timeslots(page, keys=('title',))
+            for slot in block.annotate(page):
+                slot_block = getattr(slot, 'block', None)
+                entry = Entry(
+                    start=epoch(slot.start_time),
+                    end=epoch(slot.end_time),
+                    id=slot.pk,
+                    show_id=slot.season.show_id,
+                    season_id=slot.season_id,
+                    show_type_id=slot.season.show.show_type_id,
+                    block_id=slot_block.pk if slot_block else -1,
+                    title=strings.add(getattr(slot, 'title', None)),
+                    public=int(slot.pk in public),
+                )
+                for name, _ in COLUMNS:
+                    columns[name].append(getattr(entry, name))
+
+    write(path, columns, strings.strings)
+    return len(columns['id'])
+
+
+def write(path, columns, strings):
+    """Writes columns and a string table out in the archive format.
+
+    The file is written under a temporary name and moved into place, so that
+    readers never see a partial archive.
+    """
+    count = len(columns['id'])
+    durations = [
+        end - start for start, end in zip(columns['start'], columns['end'])
+    ]
+    encoded = [string.encode('utf-8') for string in strings]
+    offsets = [0]
+    for string in encoded:
+        offsets.append(offsets[-1] + len(string))
+
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as out:
+        out.write(HEADER.pack(
+            MAGIC,
+            VERSION,
+            count,
+            max(durations) if durations else 0,
+            len(encoded)
+        ))
+        for name, code in COLUMNS:
+            out.write(struct.pack('<{}{}'.format(count, code), *columns[name]))
+        out.write(struct.pack('<{}I'.format(len(offsets)), *offsets))
+        out.write(''.join(encoded))
+    os.rename(temporary, path)
+
+
+class StringTable(object):
+    """Builds up a table of unique strings, for the archive string table."""
+    def __init__(self):
+        self.strings = []
+        self.indices = {}
+
+    def add(self, string):
+        """Returns the index of a string in the table, adding it if needed.
+
+        None is given the index -1.
+        """
+        if string is None:
+            return -1
+        if string not in self.indices:
+            self.indices[string] = len(self.strings)
+            self.strings.append(unicode(string))
+        return self.indices[string]
+
+
+###############################################################################
+# Reading
+
+class Column(object):
+    """A read-only sequence view of one column of a mapped archive."""
+    def __init__(self, buffer, offset, code, count):
+        self.buffer = buffer
+        self.offset = offset
+        self.format = struct.Struct('<' + code)
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return self.format.unpack_from(
+            self.buffer,
+            self.offset + index * self.format.size
+        )[0]
+
+
+class Archive(object):
+    """A memory-mapped timeslot archive.
+
+    Lookups read straight out of the mapped file, so opening an archive is
+    cheap however many timeslots it holds, and the operating system shares
+    its pages between processes.
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count, longest, string_count = HEADER.unpack_from(
+            self.buffer
+        )
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('{} is not a schedule archive.'.format(path))
+        self.count = count
+        self.longest = longest
+
+        offset = HEADER.size
+        self.columns = {}
+        for name, code in COLUMNS:
+            self.columns[name] = Column(self.buffer, offset, code, count)
+            offset += count * struct.calcsize('<' + code)
+        self.offsets = Column(self.buffer, offset, 'I', string_count + 1)
+        self.strings = offset + (string_count + 1) * struct.calcsize('<I')
+
+    def __len__(self):
+        return self.count
+
+    def entry(self, index):
+        """Returns the Entry at an index."""
+        values = dict(
+            (name, column[index]) for name, column in self.columns.iteritems()
+        )
+        values['title'] = self.string(values['title'])
+        return Entry(**values)
+
+    def string(self, index):
+        """Returns a string from the string table, or None for -1."""
+        if index < 0:
+            return None
+        return self.buffer[
+            self.strings + self.offsets[index]:
+            self.strings + self.offsets[index + 1]
+        ].decode('utf-8')
+
+    def in_range(self, start, end, public_only=False):
+        """Finds the timeslots on at any point in a range.
+
+        This has the same meaning as Timeslot.objects.in_range.
+
+        Args:
+            start: the start of the range, as an aware datetime.
+            end: the end of the range, as an aware datetime.
+            public_only: if True, only public timeslots are found.
+
+        Returns:
+            a list of Entries, in start time order.
+        """
+        start, end = epoch(start), epoch(end)
+        starts = self.columns['start']
+        ends = self.columns['end']
+        public = self.columns['public']
+        # Nothing starting earlier than the longest duration before the
+        # range can reach into it.
+        low = bisect.bisect_right(starts, start - self.longest)
+        high = bisect.bisect_left(starts, end)
+        return [
+            self.entry(i) for i in xrange(low, high)
+            if ends[i] > start and (public[i] or not public_only)
+        ]
+
+    def at(self, date, public_only=False):
+        """Finds the timeslots on at a given moment.
+
+        Returns:
+            a list of Entries, in start time order.
+        """
+        date = epoch(date)
+        starts = self.columns['start']
+        ends = self.columns['end']
+        public = self.columns['public']
+        low = bisect.bisect_right(starts, date - self.longest)
+        high = bisect.bisect_right(starts, date)
+        return [
+            self.entry(i) for i in xrange(low, high)
+            if ends[i] > date and (public[i] or not public_only)
+        ]
+
+
+# Archives opened by this process, by path, with their modification times.
+_open = {}
+
+
+def term_path(term):
+    """Returns the path of a term's archive in SCHEDULE_ARCHIVE_DIR."""
+    return os.path.join(
+        settings.SCHEDULE_ARCHIVE_DIR,
+        'term-{}.archive'.format(term.pk)
+    )
+
+
+def open_term(term):
+    """Opens the archive of a term, if there is one.
+
+    Returns:
+        an Archive, or None if the term has not been archived (or archives
+        are not set up).
+    """
+    if not getattr(settings, 'SCHEDULE_ARCHIVE_DIR', None):
+        return None
+    path = term_path(term)
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+    if path not in _open or _open[path][0] != mtime:
+        _open[path] = (mtime, Archive(path))
+    return _open[path][1]
+
+
+def is_closed(term):
+    """Returns whether a term is over, and so may be archived."""
+    return term.end_date < timezone.now()
+
+
+###############################################################################
+# Schedule building
+
+def timeslots(term, start, end, variant):
+    """Retrieves the timeslots for a schedule from an archive, if possible.
+
+    This is used by range_builder.  Archives only know whether timeslots are
+    public, so they can stand in for the 'public' (Timeslot.objects.public())
+    and 'private' (Timeslot.objects.all()) variants but not other QuerySets.
+
+    Args:
+        term: the Term the schedule starts in.
+        start: the start of the schedule.
+        end: the end of the schedule.
+        variant: 'public' or 'private', naming the timeslots the schedule is
+            being built from; or None if they are neither.
+
+    Returns:
+        a list of unsaved Timeslots, annotated with their blocks and titles,
+        standing in for the archived timeslots; or None if the archive can't
+        be used, in which case the database should be used instead.
+    """
+    if not is_closed(term) or end > term.end_date:
+        return None
+    public_only = VARIANTS.get(variant)
+    if public_only is None:
+        return None
+    archive = open_term(term)
+    if archive is None:
+        return None
+
+    entries = archive.in_range(start, end, public_only)
+    # Timeslots of the same season share one stand-in season (and show), so
+    # that anything looked up through them is looked up once per season.
+    seasons = {}
+    for entry in entries:
+        if entry.season_id not in seasons:
+            seasons[entry.season_id] = season(entry, term)
+    return [timeslot(entry, seasons[entry.season_id]) for entry in entries]
+
+
+def season(entry, term):
+    """Makes an unsaved Season, of an unsaved Show, standing in for an
+    archived timeslot's."""
+    show = models.Show(id=entry.show_id)
+    show.show_type = memo.show_types()[entry.show_type_id]
+    return models.Season(id=entry.season_id, show=show, term=term)
+
+
+def timeslot(entry, season):
+    """Makes an unsaved Timeslot standing in for an archived one.
+
+    Args:
+        entry: the archived timeslot's Entry.
+        season: the stand-in Season (see season) for the timeslot.
+    """
+    blocks = memo.memoise(
+        'blocks',
+        lambda: dict((b.id, b) for b in models.Block.objects.all())
+    )
+
+    slot = models.Timeslot(
+        id=entry.id,
+        season=season,
+        start_time=from_epoch(entry.start),
+        duration=datetime.timedelta(seconds=entry.end - entry.start)
+    )
+    slot._show_type = season.show.show_type
+    if entry.block_id in blocks:
+        slot.block = blocks[entry.block_id]
+    if entry.title is not None:
+        slot.title = entry.title
+    return slot
+
+
+###############################################################################
+# Utilities
+
+def epoch(date):
+    """Converts an aware datetime to seconds since the Unix epoch."""
+    return calendar.timegm(date.utctimetuple())
+
+
+def from_epoch(seconds):
+    """Converts seconds since the Unix epoch to an aware UTC datetime."""
+    return datetime.datetime.utcfromtimestamp(seconds).replace(
+        tzinfo=timezone.utc
+    )
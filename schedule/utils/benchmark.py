@@ -0,0 +1,180 @@
+"""Benchmarks for the schedule pipeline.
+
+Each benchmark times one phase of turning timeslots into a rendered schedule
+over a range of a given number of weeks:
+
+range_builder - querying, filling and annotating the whole range;
+fill - filler.fill on the range's timeslots;
+annotate - block.annotate on the filled range;
+tabulate - week_table.tabulate on each week of the range;
+legacy_tabulate - views.week_table.WeekTable.tabulate on each week.
+
+The database is expected to already hold a schedule to run against, usually
+one made by schedule.utils.synthetic; see the benchmark_schedule management
+command.
+"""
+
+import datetime
+import time
+
+from django.db import connection, reset_queries
+
+from . import block, filler, memo
+from . import range as r
+from .object import Schedule, WeekSchedule, range_builder, slice_data
+from .. import models
+from ..views import week_table as legacy
+
+
+PHASES = (
+    'range_builder',
+    'fill',
+    'annotate',
+    'tabulate',
+    'legacy_tabulate',
+)
+
+
+def run(start, sizes, repeat=3):
+    """Runs every benchmark phase for every size.
+
+    Args:
+        start: the aware datetime at which the benchmarked ranges start.
+        sizes: a list of range sizes, in weeks.
+        repeat: the number of times each benchmark is run.
+
+    Returns:
+        a list of result dictionaries, each holding the 'phase', 'weeks',
+        'timeslots' (the number of timeslots in the filled range) and
+        'seconds' (a list of times taken, one per repeat), as well as the
+        'min' and 'median' of those times and the 'queries' made by the first
+        run.  If a phase fails, its result holds an 'error' instead of times.
+    """
+    results = []
+    for weeks in sizes:
+        end = r.dst_add(start, datetime.timedelta(weeks=weeks))
+        slots = list(
+            models.Timeslot.objects.public().select_related().in_range(
+                start,
+                end
+            )
+        )
+        filled = block.annotate(filler.fill(slots, start, end))
+
+        phases = {
+            'range_builder': lambda: range_builder(
+                Schedule(start, datetime.timedelta(weeks=weeks), None)
+            ),
+            'fill': lambda: filler.fill(slots, start, end),
+            'annotate': lambda: block.annotate(filled),
+            'tabulate': lambda: tabulate_weeks(start, weeks, filled),
+            'legacy_tabulate': lambda: legacy_tabulate_weeks(
+                start,
+                weeks,
+                filled
+            ),
+        }
+        for phase in PHASES:
+            result = dict(phase=phase, weeks=weeks, timeslots=len(filled))
+            result.update(measure(phases[phase], repeat))
+            results.append(result)
+    return results
+
+
+def measure(func, repeat):
+    """Times func, which takes no arguments, over several runs.
+
+    No schedule memo is active while func runs, so nothing is shared
+    between runs.
+
+    Returns:
+        a dictionary with the 'seconds' of each run, their 'min' and
+        'median', and the number of 'queries' made by the first run; or with
+        an 'error' if func raised an exception.
+    """
+    memo.deactivate()
+    debug_cursor = connection.use_debug_cursor
+    connection.use_debug_cursor = True
+    seconds = []
+    queries = None
+    try:
+        for _ in xrange(repeat):
+            reset_queries()
+            started = time.time()
+            func()
+            seconds.append(time.time() - started)
+            if queries is None:
+                queries = len(connection.queries)
+    except Exception as e:
+        result = {'error': repr(e)}
+    else:
+        ordered = sorted(seconds)
+        result = {
+            'seconds': seconds,
+            'min': ordered[0],
+            'median': ordered[len(ordered) // 2],
+            'queries': queries,
+        }
+    finally:
+        connection.use_debug_cursor = debug_cursor
+        reset_queries()
+    return result
+
+
+###############################################################################
+# Tabulation over several weeks
+
+def week_schedules(start, weeks, filled):
+    """Splits filled range data up into a WeekSchedule per week.
+
+    The week schedules are handed their data directly, so building them costs
+    nothing.
+    """
+    schedules = []
+    for i in xrange(weeks):
+        week = WeekSchedule(
+            r.dst_add(start, datetime.timedelta(weeks=i)),
+            None
+        )
+        week._data = slice_data(filled, week.start, week.end)
+        schedules.append(week)
+    return schedules
+
+
+def tabulate_weeks(start, weeks, filled):
+    """Runs week_table.tabulate on every week of the filled range."""
+    return [
+        week.tabulate()
+        for week in week_schedules(start, weeks, filled)
+    ]
+
+
+class LegacyDay(object):
+    """Stand-in for the day range objects WeekTable.tabulate expects."""
+    with_jukebox_entries = True
+    timespan = datetime.timedelta(days=1)
+    exclude_before_start = False
+    exclude_after_end = False
+    exclude_subsuming = False
+
+    def __init__(self, start, data):
+        self.start = start
+        self.data = data
+
+
+def legacy_tabulate_weeks(start, weeks, filled):
+    """Runs the legacy WeekTable.tabulate on every week of the filled range."""
+    tables = []
+    for week in week_schedules(start, weeks, filled):
+        days = []
+        for i in xrange(7):
+            day_start = week.start + datetime.timedelta(days=i)
+            day_end = day_start + LegacyDay.timespan
+            days.append(
+                LegacyDay(
+                    day_start,
+                    slice_data(week.data, day_start, day_end)
+                )
+            )
+        tables.append(legacy.WeekTable.tabulate(days))
+    return tables
@@ -9,6 +9,7 @@ from django.conf import settings
 from django.utils import timezone
 
 from .. import models
+from . import memo
 from . import nltime
 
 
@@ -29,8 +30,14 @@ def annotate(slotlist):
         'block', that contains the Block the timeslot is matched to.
 
     """
-    blocks = {b.id: b for b in models.Block.objects.all()}
-    prepared_hooks = [hook() for hook in HOOKS]
+    blocks = memo.memoise(
+        'blocks',
+        lambda: {b.id: b for b in models.Block.objects.all()}
+    )
+    prepared_hooks = memo.memoise(
+        'block-hooks',
+        lambda: [hook() for hook in HOOKS]
+    )
 
     return [annotate_slot(slot, blocks, prepared_hooks) for slot in slotlist]
 
@@ -49,9 +56,9 @@ def hook_range():
     """Block matching hook that matches a timeslot if its start time is within
     the rule's defined range.
     """
-    rules = models.BlockRangeRule.objects.values(
+    rules = list(models.BlockRangeRule.objects.values(
         'block', 'start_time', 'end_time'
-    ).order_by('start_time')
+    ).order_by('start_time'))
 
     def h(ts):
         match = False
@@ -77,17 +84,12 @@ def hook_show():
     """Block matching hook that matches a timeslot if there is an explicit rule
     binding the timeslot's show to a block.
     """
-    rules = models.BlockShowRule.objects.values('block', 'show')
+    # Show to block lookup table; the first rule for a show wins.
+    rules = {}
+    for rule in models.BlockShowRule.objects.values('block', 'show'):
+        rules.setdefault(rule['show'], rule['block'])
 
-    def h(ts):
-        match = False
-        for rule in rules:
-            if rule['show'] == ts.season.show.pk:
-                match = rule['block']
-                break
-        return match
-
-    return h
+    return lambda ts: rules.get(ts.season.show_id, False)
 
 
 def hook_default():
@@ -0,0 +1,177 @@
+"""Cache-backed, single-flight storage for built schedules.
+
+Building a schedule (see object.range_builder) is expensive, and when a cached
+schedule expires or is invalidated every concurrent request for it would
+otherwise rebuild it at once.  This module keeps built schedule data in the
+Django cache together with the schedule revision it was built against and the
+time it goes stale, and uses a cache-backed lock so that only one worker
+rebuilds an entry while everyone else is served the last value.
+
+The lock is taken with cache.add, which is atomic on memcached, the database
+cache and (per-process) the local-memory cache, so this works with any of the
+Django cache backends without further configuration.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+# How long, in seconds, built schedule data is considered fresh.
+SCHEDULE_CACHE_TIME = getattr(settings, 'SCHEDULE_CACHE_TIME', 60 * 15)
+
+# How long, in seconds, stale schedule data is kept around to be served while
+# somebody else rebuilds it.
+SCHEDULE_STALE_TIME = getattr(settings, 'SCHEDULE_STALE_TIME', 60 * 60 * 24)
+
+# How long, in seconds, a rebuild lock is held before its holder is presumed
+# to have died.
+SCHEDULE_LOCK_TIME = getattr(settings, 'SCHEDULE_LOCK_TIME', 60)
+
+# How long, in seconds, to wait for another worker's build when there is no
+# stale value to fall back on, and how often to check for it.
+SCHEDULE_LOCK_WAIT = getattr(settings, 'SCHEDULE_LOCK_WAIT', 10)
+SCHEDULE_LOCK_POLL = 0.1
+
+REVISION_KEY = 'schedule-revision'
+REVISION_CACHE_TIME = 60 * 60 * 24 * 30  # One month
+
+
+###############################################################################
+# Revisions
+
+def revision():
+    """Returns the current schedule revision.
+
+    The revision changes whenever anything that appears on a schedule is
+    changed (see schedule.signals), so any cached schedule built against an
+    older revision is stale.
+
+    Returns:
+        the current revision number, or None if the cache cannot hold one (for
+        example, with the dummy cache).
+    """
+    rev = cache.get(REVISION_KEY)
+    if rev is None:
+        # Seed from the clock so that a revision evicted from the cache never
+        # comes back as a number an old entry was built against.
+        cache.add(REVISION_KEY, int(time.time()), REVISION_CACHE_TIME)
+        rev = cache.get(REVISION_KEY)
+    return rev
+
+
+def bump_revision():
+    """Moves the schedule revision on, making all cached schedules stale.
+
+    Stale schedules are still served while they are being rebuilt.
+    """
+    try:
+        cache.incr(REVISION_KEY)
+    except ValueError:
+        # The revision isn't in the cache (yet, or any more).
+        cache.set(REVISION_KEY, int(time.time()), REVISION_CACHE_TIME)
+
+
+###############################################################################
+# Single-flight building
+
+def schedule_key(schedule, variant):
+    """Returns the cache key under which a schedule's data is stored.
+
+    Args:
+        schedule: the Schedule whose data is being cached.
+        variant: a string distinguishing different data built for the same
+            period, for example 'public' and 'private'.
+
+    Returns:
+        a cache key string.
+    """
+    return 'schedule:{}:{}:{}'.format(
+        variant,
+        schedule.start.isoformat(),
+        schedule.end.isoformat()
+    )
+
+
+def single_flight(key, build, timeout=None):
+    """Retrieves a value from the cache, building it if stale or missing.
+
+    Only one caller at a time will run build for a given key.  Other callers
+    get the last built value if there is one (stale-while-revalidate), or wait
+    a short while for the builder to finish if there is not.
+
+    Args:
+        key: the cache key to store the value under.
+        build: a function of no arguments that builds the value.
+        timeout: the number of seconds the built value stays fresh; defaults
+            to SCHEDULE_CACHE_TIME.
+
+    Returns:
+        the cached or freshly built value.
+    """
+    rev = revision()
+    entry = cache.get(key)
+    if entry is not None and is_fresh(entry, rev):
+        return entry[0]
+
+    lock_key = key + ':lock'
+    if cache.add(lock_key, True, SCHEDULE_LOCK_TIME):
+        try:
+            value = build()
+            store(key, value, rev, timeout)
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    # Somebody else is rebuilding this entry.
+    if entry is not None:
+        return entry[0]
+    return wait_for(key, build)
+
+
+def store(key, value, rev, timeout=None):
+    """Stores a built value in the cache.
+
+    Args:
+        key: the cache key to store the value under.
+        value: the built value.
+        rev: the schedule revision the value was built against.
+        timeout: the number of seconds the value stays fresh; defaults to
+            SCHEDULE_CACHE_TIME.
+    """
+    if timeout is None:
+        timeout = SCHEDULE_CACHE_TIME
+    cache.set(
+        key,
+        (value, rev, time.time() + timeout),
+        timeout + SCHEDULE_STALE_TIME
+    )
+
+
+def is_cached(key):
+    """Decides whether key holds a fresh value in the cache."""
+    entry = cache.get(key)
+    return entry is not None and is_fresh(entry, revision())
+
+
+def is_fresh(entry, rev):
+    """Decides whether a cache entry made by store is still fresh."""
+    _, entry_rev, fresh_until = entry
+    return entry_rev == rev and time.time() < fresh_until
+
+
+def wait_for(key, build):
+    """Waits for another worker to build the value for key.
+
+    If the value does not turn up within SCHEDULE_LOCK_WAIT seconds, the
+    other worker is assumed to have failed and the value is built here
+    instead.
+    """
+    deadline = time.time() + SCHEDULE_LOCK_WAIT
+    while time.time() < deadline:
+        time.sleep(SCHEDULE_LOCK_POLL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+    return build()
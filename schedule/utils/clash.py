@@ -0,0 +1,184 @@
+"""Detection of timeslots double-booking the same location or presenter.
+
+Timeslots may legitimately overlap (demos, recordings and outside broadcasts
+share the schedule with on-air shows), but two timeslots should never be
+booked into the same studio at once, nor have the same person credited on
+both.  Timeslots are grouped by location (resolved from their shows'
+ShowLocation histories, as with Timeslot.location) or by credited person,
+and each group is then swept in start time order to find the overlapping
+pairs in O(n log n + clashes) time.
+"""
+
+import collections
+import heapq
+
+from .. import models
+from . import export
+
+
+# A pair of overlapping timeslots booked into the same location.
+Clash = collections.namedtuple('Clash', ['location', 'first', 'second'])
+
+# A pair of overlapping timeslots on which the same person is credited.
+# first and second are Booking tuples.
+DoubleBooking = collections.namedtuple(
+    'DoubleBooking',
+    ['person', 'first', 'second']
+)
+
+# The parts of a timeslot needed to check for double bookings.
+Booking = collections.namedtuple('Booking', ['timeslot', 'start', 'end'])
+
+
+def find(timeslots):
+    """Finds the location clashes among some timeslots.
+
+    Timeslots with no location on file are ignored.
+
+    Args:
+        timeslots: a Timeslot QuerySet, or list of timeslots with their
+            seasons loaded.
+
+    Returns:
+        a list of Clashes, where location is the location name and first and
+        second are the timeslots, the first starting no later than the
+        second; ordered by the start of the second timeslot.
+    """
+    if hasattr(timeslots, 'select_related'):
+        timeslots = list(timeslots.select_related('season'))
+
+    histories = export.show_locations(
+        set(slot.season.show_id for slot in timeslots),
+        fields=('location', 'location__name')
+    )
+    by_location = {}
+    for slot in timeslots:
+        location = export.location_at(
+            histories.get(slot.season.show_id, []),
+            slot.start_time
+        )
+        if location is not None:
+            by_location.setdefault(location, []).append(slot)
+
+    clashes = [
+        Clash(name, first, second)
+        for (_, name), slots in by_location.iteritems()
+        for first, second in sweep(
+            slots,
+            lambda slot: slot.start_time,
+            lambda slot: slot.end_time
+        )
+    ]
+    clashes.sort(key=lambda clash: clash.second.start_time)
+    return clashes
+
+
+def double_bookings(timeslots):
+    """Finds the people credited on overlapping timeslots.
+
+    The credits of every timeslot are fetched along with the timeslots, in
+    one query.
+
+    Args:
+        timeslots: a Timeslot QuerySet, for example one from
+            Timeslot.objects.in_range.
+
+    Returns:
+        a list of DoubleBookings, where person is the person's ID; ordered
+        by the start of the second timeslot.
+    """
+    by_person = {}
+    for person, booking in credited(timeslots):
+        by_person.setdefault(person, []).append(booking)
+
+    found = [
+        DoubleBooking(person, first, second)
+        for person, bookings in by_person.iteritems()
+        for first, second in sweep(
+            bookings,
+            lambda booking: booking.start,
+            lambda booking: booking.end
+        )
+    ]
+    found.sort(key=lambda booking: booking.second.start)
+    return found
+
+
+def presenter_clashes(show, start, duration, exclude=None):
+    """Checks whether a proposed timeslot would double-book anyone credited
+    on its show, in one query.
+
+    This is meant for scheduling tools to call as timeslots are placed.
+
+    Args:
+        show: the Show (or its ID) the timeslot is for.
+        start: the start of the timeslot, as an aware datetime.
+        duration: the duration of the timeslot, as a timedelta.
+        exclude: the ID of a timeslot to ignore, for example the one being
+            moved; or None.
+
+    Returns:
+        a list of (person ID, Booking) pairs, one per clash, where the
+        Booking is the existing timeslot clashing with the proposed one.
+    """
+    people = models.ShowCredit.objects.filter(
+        element=show
+    ).values('person')
+    timeslots = models.Timeslot.objects.in_range(start, start + duration)
+    if exclude is not None:
+        timeslots = timeslots.exclude(pk=exclude)
+    return list(credited(timeslots, people))
+
+
+def credited(timeslots, people=None):
+    """Joins timeslots to the people credited on their shows.
+
+    Args:
+        timeslots: a Timeslot QuerySet.
+        people: if given, a QuerySet or list of person IDs to restrict the
+            credits to.
+
+    Returns:
+        an iterator of (person ID, Booking) pairs, one per credit.
+    """
+    field = 'season__show__showcredit__person'
+    # These go in one filter, so that they apply to the same join.
+    conditions = {field + '__isnull': False}
+    if people is not None:
+        conditions[field + '__in'] = people
+    rows = timeslots.filter(**conditions).values_list(
+        'pk',
+        'start_time',
+        'duration',
+        field
+    ).distinct()
+    for pk, start, duration, person in rows:
+        yield person, Booking(pk, start, start + duration)
+
+
+def sweep(items, start, end):
+    """Finds the overlapping pairs among some items with time ranges.
+
+    Items are taken in order of start, keeping a heap of those still running
+    ordered by end; each item overlaps exactly the running items that end
+    after it starts.  Ranges that only touch (one ending as another starts)
+    do not overlap.
+
+    Args:
+        items: the items.
+        start: a function returning the start of an item's range.
+        end: a function returning the end of an item's range.
+
+    Returns:
+        a list of (earlier, later) pairs of overlapping items.
+    """
+    pairs = []
+    running = []
+    for index, item in enumerate(sorted(items, key=start)):
+        item_start = start(item)
+        while running and running[0][0] <= item_start:
+            heapq.heappop(running)
+        pairs.extend((other, item) for _, _, other in running)
+        # The index breaks ties, so that items themselves are never compared.
+        heapq.heappush(running, (end(item), index, item))
+    return pairs
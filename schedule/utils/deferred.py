@@ -0,0 +1,41 @@
+"""Work deferred until after the current response has been sent.
+
+Some schedule work (for example, warming the cache with the schedules either
+side of the one just viewed) is worth doing, but not while a user is waiting
+for the page.  Functions passed to defer are run when Django signals that the
+request has finished, which happens once the response has been sent.
+"""
+
+import logging
+import threading
+
+from django.core.signals import request_finished
+
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+def defer(func):
+    """Runs func, which takes no arguments, after the response is sent.
+
+    If func raises an exception, it is logged and then ignored.
+    """
+    if not hasattr(_local, 'queue'):
+        _local.queue = []
+    _local.queue.append(func)
+
+
+def run_deferred(**kwargs):
+    """Runs, and then forgets, all work deferred on this thread."""
+    queue = getattr(_local, 'queue', [])
+    _local.queue = []
+    for func in queue:
+        try:
+            func()
+        except Exception:
+            logger.exception('Deferred schedule work failed.')
+
+
+request_finished.connect(run_deferred, dispatch_uid='schedule-run-deferred')
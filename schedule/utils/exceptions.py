@@ -22,3 +22,16 @@ class ScheduleInconsistencyError(Exception):
 
     """
     pass
+
+
+class ScheduleConflictError(Exception):
+    """
+    Exception thrown when new timeslots would clash with existing ones.
+
+    The clashing new timeslots are available as the exception's
+    `conflicts` attribute.
+
+    """
+    def __init__(self, message, conflicts):
+        super(ScheduleConflictError, self).__init__(message)
+        self.conflicts = conflicts
@@ -0,0 +1,314 @@
+"""Bulk export of timeslots, with their related data, for reporting.
+
+Exports can cover years of schedule, so timeslots are never loaded all at
+once.  They are read a page at a time using keyset pagination (each page
+starts after the last timeslot of the one before, by start time and ID),
+which keeps memory bounded on every database backend, unlike a plain
+QuerySet iterator, which most backends buffer in full on the client.  The
+related data for each page (metadata, season numbers, blocks, locations and
+credits) is then fetched in bulk, a fixed number of queries per page.
+"""
+
+import csv
+import datetime
+import json
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .. import models
+from . import block, memo, metadata
+
+
+# Number of timeslots to read, and fetch related data for, at once.
+PAGE_SIZE = 500
+
+# The columns of an export, in order.
+FIELDS = (
+    'id',
+    'start',
+    'end',
+    'duration',
+    'show_id',
+    'title',
+    'season_id',
+    'season_number',
+    'block',
+    'location',
+    'credits',
+)
+
+FORMATS = ('csv', 'jsonl')
+
+
+def rows(timeslots, page_size=PAGE_SIZE):
+    """Generates export rows for a QuerySet of timeslots.
+
+    Args:
+        timeslots: the Timeslot QuerySet to export.
+        page_size: the number of timeslots to read at once.
+
+    Returns:
+        an iterator of dictionaries, one per timeslot in start time order,
+        mapping the names in FIELDS to values.
+    """
+    for page in pages(timeslots, page_size):
+        # The memo scope is kept to each page's fetch, rather than held open
+        # across yields to whatever is consuming the rows.
+        with memo.scope():
+            page_data = list(page_rows(page))
+        for row in page_data:
+            yield row
+
+
+def pages(timeslots, page_size=PAGE_SIZE):
+    """Reads a QuerySet of timeslots a page at a time.
+
+    Returns:
+        an iterator of lists of at most page_size timeslots, with their
+        seasons and shows loaded, in start time order.
+    """
+    ordered = timeslots.select_related('season__show').order_by(
+        'start_time',
+        'pk'
+    )
+    page = list(ordered[:page_size])
+    while page:
+        yield page
+        last = page[-1]
+        page = list(
+            ordered.filter(
+                Q(start_time__gt=last.start_time)
+                | Q(start_time=last.start_time, pk__gt=last.pk)
+            )[:page_size]
+        )
+
+
+def page_rows(page):
+    """Fetches the related data for a page of timeslots, and makes rows."""
+    show_ids = set(slot.season.show_id for slot in page)
+    metadata.prefetch_timeslots(page, keys=('title',))
+    block.annotate(page)
+    numbers = season_numbers(show_ids)
+    locations = show_locations(show_ids)
+    credits = show_credits(show_ids)
+
+    for slot in page:
+        show_id = slot.season.show_id
+        slot_block = getattr(slot, 'block', None)
+        yield {
+            'id': slot.pk,
+            'start': slot.start_time.isoformat(),
+            'end': slot.end_time.isoformat(),
+            'duration': int(slot.duration.total_seconds()),
+            'show_id': show_id,
+            'title': getattr(slot, 'title', None),
+            'season_id': slot.season_id,
+            'season_number': numbers.get(slot.season_id),
+            'block': slot_block.tag if slot_block else None,
+            'location': location_at(
+                locations.get(show_id, []),
+                slot.start_time
+            ),
+            'credits': credits.get(show_id, []),
+        }
+
+
+def season_numbers(show_ids):
+    """Works out the relative numbers of every season of the given shows.
+
+    Returns:
+        a dictionary mapping season IDs to numbers, numbered as in
+        Season.number.
+    """
+    numbers = {}
+    counts = {}
+    seasons = models.Season.objects.filter(
+        show__in=show_ids
+    ).order_by('pk').values_list('show', 'pk')
+    for show_id, season_id in seasons:
+        counts[show_id] = counts.get(show_id, 0) + 1
+        numbers[season_id] = counts[show_id]
+    return numbers
+
+
+def show_locations(show_ids, fields=('location__name',)):
+    """Retrieves the location history of the given shows.
+
+    Args:
+        show_ids: the IDs of the shows.
+        fields: the ShowLocation fields to retrieve for each location; by
+            default, just the location name.
+
+    Returns:
+        a dictionary mapping show IDs to lists of (effective_from,
+        effective_to, location) tuples, by effective_from, where location is
+        the value of the one field asked for, or a tuple of the values of
+        several.
+    """
+    locations = {}
+    entries = models.ShowLocation.objects.filter(
+        show__in=show_ids
+    ).order_by('effective_from').values_list(
+        'show',
+        'effective_from',
+        'effective_to',
+        *fields
+    )
+    for entry in entries:
+        show_id, effective_from, effective_to = entry[:3]
+        location = entry[3] if len(fields) == 1 else tuple(entry[3:])
+        locations.setdefault(show_id, []).append(
+            (effective_from, effective_to, location)
+        )
+    return locations
+
+
+def location_at(history, date):
+    """Finds the location effective at a date, as with Timeslot.location, in
+    a show's location history (as returned by show_locations).
+    """
+    found = None
+    for effective_from, effective_to, location in history:
+        if effective_from is None or effective_from > date:
+            continue
+        if effective_to is None or effective_to > date:
+            found = location
+    return found
+
+
+def show_credits(show_ids):
+    """Retrieves the credits of the given shows.
+
+    Returns:
+        a dictionary mapping show IDs to lists of strings of the form
+        'Person (Credit type)'.
+    """
+    credits = {}
+    entries = models.ShowCredit.objects.filter(
+        element__in=show_ids
+    ).select_related('person', 'credit_type').order_by('pk')
+    for credit in entries:
+        credits.setdefault(credit.element_id, []).append(
+            u'{0} ({1})'.format(credit.person, credit.credit_type)
+        )
+    return credits
+
+
+###############################################################################
+# Output
+
+def csv_lines(rows):
+    """Generates an export as UTF-8 CSV, one line at a time.
+
+    Credits are joined into one field with semicolons.
+    """
+    line = Line()
+    writer = csv.writer(line)
+    writer.writerow(FIELDS)
+    yield line.pop()
+    for row in rows:
+        values = dict(row, credits=u'; '.join(row['credits']))
+        writer.writerow([
+            (u'' if values[field] is None else unicode(values[field]))
+            .encode('utf-8')
+            for field in FIELDS
+        ])
+        yield line.pop()
+
+
+def jsonl_lines(rows):
+    """Generates an export as JSON lines: one JSON object per timeslot."""
+    for row in rows:
+        yield json.dumps(row, sort_keys=True, separators=(',', ':')) + '\n'
+
+
+LINE_WRITERS = {
+    'csv': csv_lines,
+    'jsonl': jsonl_lines,
+}
+
+
+def lines(timeslots, format):
+    """Generates an export of a QuerySet of timeslots in the given format.
+
+    Args:
+        timeslots: the Timeslot QuerySet to export.
+        format: one of FORMATS.
+
+    Returns:
+        an iterator of lines of the export, as byte strings.
+    """
+    return LINE_WRITERS[format](rows(timeslots))
+
+
+def select(term=None, start=None, end=None):
+    """Selects the timeslots to export from user-supplied parameters.
+
+    Either a term, or a start and end date, should be given.
+
+    Args:
+        term: the ID of the term to export, or None.
+        start: the first date to export, as YYYY-MM-DD, or None.
+        end: the date to stop exporting at (exclusive), as YYYY-MM-DD, or
+            None.
+
+    Returns:
+        the Timeslot QuerySet to export.
+
+    Raises:
+        ValueError: if the parameters don't describe a range.
+    """
+    if term is not None:
+        try:
+            return in_term(models.Term.objects.get(pk=int(term)))
+        except models.Term.DoesNotExist:
+            raise ValueError('There is no term {}.'.format(term))
+    if start is None or end is None:
+        raise ValueError('Give a term, or a start and end date.')
+
+    start, end = local_date(start), local_date(end)
+    if end <= start:
+        raise ValueError('The end date must be after the start date.')
+    return in_range(start, end)
+
+
+def local_date(date):
+    """Converts a YYYY-MM-DD string to an aware datetime at local midnight.
+    """
+    return timezone.make_aware(
+        datetime.datetime.strptime(date, '%Y-%m-%d'),
+        timezone.get_current_timezone()
+    )
+
+
+def in_range(start, end):
+    """Returns a QuerySet of every timeslot starting in the range [start,
+    end).
+    """
+    return models.Timeslot.objects.filter(
+        start_time__gte=start,
+        start_time__lt=end
+    )
+
+
+def in_term(term):
+    """Returns a QuerySet of every timeslot starting in a term."""
+    return in_range(term.start_date, term.end_date)
+
+
+class Line(object):
+    """A file-like object holding whatever was last written to it, so that
+    csv.writer can be used to produce one line at a time.
+    """
+    def __init__(self):
+        self.buffer = []
+
+    def write(self, data):
+        self.buffer.append(data)
+
+    def pop(self):
+        """Returns and forgets everything written since the last pop."""
+        data = ''.join(self.buffer)
+        self.buffer = []
+        return data
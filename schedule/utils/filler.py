@@ -37,7 +37,8 @@ from django.db.models import F
 from django.core.cache import cache
 
 from . import exceptions
-from ..models import Term, Show, Season, Timeslot
+from . import memo
+from ..models import Show, Season, Timeslot
 
 
 FILLER_SHOW_CACHE_TIME = 60 * 60 * 24  # One day
@@ -52,6 +53,15 @@ def show(start_time, duration):
         created, as an aware datetime
     duration -- the duration of the filler timeslot being
         created, as a timedelta
+    """
+    return memo.memoise('filler-show', cached_show)
+
+
+def cached_show():
+    """
+    Retrieves the filler show from the cache, or the database if it
+    is not cached.
+
     """
     cached = cache.get('filler-show')
     if cached:
@@ -76,9 +86,9 @@ def term(start_time, duration):
     duration -- the duration of the filler timeslot being
         created, as a timedelta
     """
-    term = Term.of(start_time)
+    term = memo.term_of(start_time)
     if not term:
-        term = Term.before(start_time)
+        term = memo.term_before(start_time)
     if not term:
         raise exceptions.ScheduleInconsistencyError(
             exceptions.MSG_NO_TERM_WHILE_FILLING.format({
@@ -214,26 +224,25 @@ def fill(timeslots, start_time, end_time):
             )
         # Next, fill in everything else
         # We're doing this by comparing each new show to the
-        # last inserted show (if any) to see if they follow on from
-        # each other; if they don't then we add a filler slot before
-        # adding the next show
+        # latest end of the shows inserted so far (if any) to see if
+        # they follow on from each other; if they don't then we add a
+        # filler slot before adding the next show.  (Taking the latest
+        # end, rather than the last show's, matters when private shows
+        # overlap the others.)
+        covered_to = None
         for ts in timeslots:
-            if filled_timeslots and (
-                    filled_timeslots[-1].end_time
-                    < ts.start_time
-            ):
+            if covered_to is not None and covered_to < ts.start_time:
                 filled_timeslots.append(
-                    timeslot(
-                        filled_timeslots[-1].end_time,
-                        ts.start_time
-                    )
+                    timeslot(covered_to, ts.start_time)
                 )
             filled_timeslots.append(ts)
+            if covered_to is None or covered_to < ts.end_time:
+                covered_to = ts.end_time
         # Finally fill the end
-        if filled_timeslots[-1].end_time < end_time:
+        if covered_to < end_time:
             filled_timeslots.append(
                 timeslot(
-                    filled_timeslots[-1].end_time,
+                    covered_to,
                     start_after(end_time, qs)
                 )
             )
@@ -0,0 +1,203 @@
+"""Per-phase instrumentation of schedule builds.
+
+When a schedule page is slow, it helps to know where the time went: the term
+lookup, the timeslot query, filling, block annotation, tabulation or template
+rendering.  The schedule code wraps each of these phases in phase(), which
+measures its wall time and database query count and hands a record of them to
+every configured sink.
+
+Sinks are configured with the SCHEDULE_INSTRUMENTATION_SINKS setting, a list
+of either dotted paths to sink classes or (dotted path, keyword arguments)
+pairs, for example::
+
+    SCHEDULE_INSTRUMENTATION_SINKS = [
+        'schedule.utils.instrument.LoggingSink',
+        ('schedule.utils.instrument.JSONLinesSink',
+         {'path': '/var/log/lass/schedule-phases.jsonl'}),
+    ]
+
+Sinks can also be added at run time with add_sink, which is handy for the
+in-memory AggregateSink.  With no sinks, phase() does nothing at all.
+"""
+
+import contextlib
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.utils.importlib import import_module
+
+
+_sinks = None
+
+
+###############################################################################
+# Measurement
+
+@contextlib.contextmanager
+def phase(name, **context):
+    """Context manager measuring one phase of a schedule build.
+
+    Args:
+        name: the name of the phase, for example 'fill'.
+        context: any other details to add to the phase's record, for example
+            the start of the schedule being built.
+    """
+    active_sinks = sinks()
+    if not active_sinks:
+        yield
+    else:
+        # Queries are only logged on the connection when the debug cursor is
+        # in use.
+        debug_cursor = connection.use_debug_cursor
+        connection.use_debug_cursor = True
+        queries_before = len(connection.queries)
+        started = time.time()
+        try:
+            yield
+        finally:
+            record = dict(
+                context,
+                phase=name,
+                seconds=time.time() - started,
+                queries=len(connection.queries) - queries_before
+            )
+            connection.use_debug_cursor = debug_cursor
+            if not logs_queries():
+                # The queries were only logged to be counted, and would
+                # otherwise pile up for as long as the process runs.  Phases
+                # within this one find the debug cursor already on, and so
+                # leave this to the outermost.
+                del connection.queries[queries_before:]
+            for sink in active_sinks:
+                sink.emit(record)
+
+
+def logs_queries():
+    """Returns whether the connection logs queries of its own accord."""
+    # This is how Django itself decides whether to use the debug cursor.
+    return bool(
+        connection.use_debug_cursor
+        or (connection.use_debug_cursor is None and settings.DEBUG)
+    )
+
+
+###############################################################################
+# Sink management
+
+def sinks():
+    """Returns the list of sinks, loading them from settings if needed."""
+    global _sinks
+    if _sinks is None:
+        _sinks = [
+            load_sink(spec)
+            for spec in getattr(settings, 'SCHEDULE_INSTRUMENTATION_SINKS', [])
+        ]
+    return _sinks
+
+
+def add_sink(sink):
+    """Starts sending phase records to sink."""
+    sinks().append(sink)
+
+
+def remove_sink(sink):
+    """Stops sending phase records to sink."""
+    sinks().remove(sink)
+
+
+def load_sink(spec):
+    """Creates a sink from its entry in SCHEDULE_INSTRUMENTATION_SINKS."""
+    if isinstance(spec, basestring):
+        path, kwargs = spec, {}
+    else:
+        path, kwargs = spec
+    module, cls = path.rsplit('.', 1)
+    return getattr(import_module(module), cls)(**kwargs)
+
+
+###############################################################################
+# Sinks
+# A sink is anything with an emit method taking a phase record dictionary.
+
+class LoggingSink(object):
+    """Sink that writes phase records to a logger."""
+    def __init__(self, logger=__name__, level=logging.DEBUG):
+        self.logger = logging.getLogger(logger)
+        self.level = level
+
+    def emit(self, record):
+        self.logger.log(
+            self.level,
+            'schedule phase %s: %.4fs, %d queries',
+            record['phase'],
+            record['seconds'],
+            record['queries'],
+            extra={'schedule_phase': record}
+        )
+
+
+class JSONLinesSink(object):
+    """Sink that appends phase records to a file, one JSON object per line."""
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def emit(self, record):
+        line = json.dumps(record, default=unicode) + '\n'
+        with self.lock:
+            with open(self.path, 'a') as f:
+                f.write(line)
+
+
+class AggregateSink(object):
+    """Sink that keeps phase timings in memory and summarises them."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.records = {}
+
+    def emit(self, record):
+        with self.lock:
+            self.records.setdefault(record['phase'], []).append(
+                (record['seconds'], record['queries'])
+            )
+
+    def clear(self):
+        """Forgets all records."""
+        with self.lock:
+            self.records = {}
+
+    def summary(self):
+        """Summarises the records seen so far.
+
+        Returns:
+            a dictionary mapping each phase name to a dictionary holding the
+            'count' of records for that phase and the 'p50' and 'p95' of their
+            times (in seconds) and query counts ('queries_p50' and
+            'queries_p95').
+        """
+        with self.lock:
+            records = dict(self.records)
+
+        summary = {}
+        for name, measurements in records.iteritems():
+            seconds = sorted(m[0] for m in measurements)
+            queries = sorted(m[1] for m in measurements)
+            summary[name] = {
+                'count': len(measurements),
+                'p50': percentile(seconds, 50),
+                'p95': percentile(seconds, 95),
+                'queries_p50': percentile(queries, 50),
+                'queries_p95': percentile(queries, 95),
+            }
+        return summary
+
+
+def percentile(ordered, p):
+    """Returns the p-th percentile (nearest rank) of a sorted, non-empty list.
+    """
+    rank = max(0, -(-len(ordered) * p // 100) - 1)
+    return ordered[rank]
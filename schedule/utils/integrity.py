@@ -0,0 +1,128 @@
+"""Integrity checking of the whole timeslot history.
+
+Bad timeslot data usually only comes to light when a schedule containing it
+is rendered, as a ScheduleInconsistencyError from the week table, by which
+point a visitor has already hit it.  check instead reads every timeslot in
+start time order, a page of plain rows at a time, and finds in one pass:
+
+- timeslots with zero or negative durations;
+- public timeslots overlapping earlier public timeslots;
+- timeslots starting outside every term;
+- timeslots starting outside their season's term.
+"""
+
+import collections
+import datetime
+
+from django.db.models import Q
+
+from .. import models
+from . import memo
+
+
+PAGE_SIZE = 5000
+
+DURATION = 'duration'
+OVERLAP = 'overlap'
+NO_TERM = 'no-term'
+WRONG_TERM = 'wrong-term'
+
+# A problem found with a timeslot.  kind is one of the constants above,
+# timeslot and start are the ID and start time of the timeslot, and detail
+# describes the problem.
+Problem = collections.namedtuple(
+    'Problem',
+    ['kind', 'timeslot', 'start', 'detail']
+)
+
+# The fields of each timeslot read by check.
+FIELDS = (
+    'pk',
+    'start_time',
+    'duration',
+    'season__term',
+    'season__show__show_type__public',
+)
+
+
+def check(timeslots=None, page_size=PAGE_SIZE):
+    """Checks timeslots for bad data.
+
+    Args:
+        timeslots: a Timeslot QuerySet of the timeslots to check; defaults to
+            every timeslot.
+        page_size: the number of timeslots to read at once.
+
+    Returns:
+        an iterator of Problems, in order of timeslot start time.
+    """
+    if timeslots is None:
+        timeslots = models.Timeslot.objects.all()
+    with memo.scope():
+        terms = memo.terms()
+    terms_by_id = dict((term.pk, term) for term in terms)
+    zero = datetime.timedelta(0)
+    term_index = 0
+    # The ID and end of the public timeslot ending last so far.
+    latest = None
+
+    for pk, start, duration, term_id, public in stream(timeslots, page_size):
+        end = start + duration
+        if duration <= zero:
+            yield Problem(DURATION, pk, start, 'duration is {}'.format(
+                duration
+            ))
+
+        if public:
+            if latest is not None and start < latest[1]:
+                yield Problem(
+                    OVERLAP,
+                    pk,
+                    start,
+                    'overlaps public timeslot {}'.format(latest[0])
+                )
+            if latest is None or end > latest[1]:
+                latest = (pk, end)
+
+        # Timeslots come in start order, so the term containing each one is
+        # never before the term containing the last.
+        while (term_index < len(terms)
+               and terms[term_index].end_date <= start):
+            term_index += 1
+        if term_index == len(terms) or start < terms[term_index].start_date:
+            yield Problem(NO_TERM, pk, start, 'starts outside every term')
+
+        term = terms_by_id.get(term_id)
+        if term is None:
+            yield Problem(WRONG_TERM, pk, start, 'season has no term')
+        elif not term.start_date <= start < term.end_date:
+            yield Problem(
+                WRONG_TERM,
+                pk,
+                start,
+                u"starts outside its season's term ({})".format(term)
+            )
+
+
+def stream(timeslots, page_size=PAGE_SIZE):
+    """Reads the FIELDS of timeslots a page at a time, in start time order.
+
+    Pages follow on from the last row read, by (start_time, pk), so each
+    page is a range read from the start time index rather than a scan past
+    an ever larger offset.
+
+    Returns:
+        an iterator of tuples of FIELDS.
+    """
+    ordered = timeslots.order_by('start_time', 'pk').values_list(*FIELDS)
+    page = list(ordered[:page_size])
+    while page:
+        for row in page:
+            yield row
+        last_pk, last_start = page[-1][:2]
+        page = list(
+            ordered.filter(
+                Q(start_time__gt=last_start)
+                | Q(start_time=last_start, pk__gt=last_pk)
+            )[:page_size]
+        )
@@ -0,0 +1,128 @@
+"""A request-scoped memo for schedule building.
+
+One page render can build bits of the schedule several times over: the header
+"on air/up next" box, the home page schedule and the main schedule view all
+ask for overlapping ranges, and each of those repeats the same term, filler
+show and block lookups.  While a memo is active (see
+schedule.middleware.ScheduleMemoMiddleware), these are computed once and then
+shared through the memo for the rest of the request.
+
+Outside of an active memo, everything here falls straight through to the
+underlying computation.
+"""
+
+import contextlib
+import threading
+
+from ..models import ShowType, Term
+
+
+_local = threading.local()
+
+
+def activate():
+    """Starts a new, empty memo for the current thread.
+
+    Returns:
+        the memo dictionary, which may be attached to the request.
+    """
+    _local.memo = {}
+    return _local.memo
+
+
+def deactivate():
+    """Throws away the current thread's memo, if any."""
+    _local.memo = None
+
+
+@contextlib.contextmanager
+def scope():
+    """Context manager making sure a memo is active inside its block.
+
+    If a memo is already active (for example, the request's), it is used;
+    otherwise a new memo is activated for the block and thrown away after.
+    """
+    if current() is not None:
+        yield current()
+    else:
+        try:
+            yield activate()
+        finally:
+            deactivate()
+
+
+def current():
+    """Returns the current thread's memo dictionary, or None if inactive."""
+    return getattr(_local, 'memo', None)
+
+
+def memoise(key, func):
+    """Returns the memoised result of func under key.
+
+    Args:
+        key: a hashable key identifying the computation.
+        func: a function of no arguments computing the result if it has not
+            been computed already during this request.
+
+    Returns:
+        the result of func, which may have been computed earlier.
+    """
+    memo = current()
+    if memo is None:
+        result = func()
+    elif key in memo:
+        result = memo[key]
+    else:
+        result = memo[key] = func()
+    return result
+
+
+###############################################################################
+# Commonly memoised lookups
+
+def terms():
+    """Returns a list of all terms, in ascending order of start date.
+
+    There are only a handful of terms a year, so within a memo it is cheaper
+    to fetch them all once and search them in memory than to query for each
+    date.
+    """
+    return memoise('terms', lambda: list(Term.objects.all()))
+
+
+def show_types():
+    """Returns a dictionary mapping show type IDs to all the show types."""
+    return memoise(
+        'show-types',
+        lambda: dict((t.id, t) for t in ShowType.objects.all())
+    )
+
+
+def term_of(date):
+    """Memoised version of Term.of."""
+    if current() is None:
+        result = Term.of(date)
+    else:
+        result = latest(
+            t for t in terms() if t.start_date <= date < t.end_date
+        )
+    return result
+
+
+def term_before(date):
+    """Memoised version of Term.before."""
+    if current() is None:
+        result = Term.before(date)
+    else:
+        result = latest(
+            t for t in terms() if t.start_date <= date and t.end_date <= date
+        )
+    return result
+
+
+def latest(matching_terms):
+    """Returns the last of an ordered iterable of terms, or None if empty."""
+    result = None
+    for result in matching_terms:
+        pass
+    return result
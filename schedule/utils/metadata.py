@@ -0,0 +1,155 @@
+"""Bulk retrieval of text metadata for schedule items.
+
+Text metadata (titles, descriptions and so on) is normally looked up one item
+at a time through the metadata system, which means at least one query per
+item, and more for timeslots and seasons as their metadata is inherited from
+their seasons and shows.  For lists of items, these functions instead fetch
+the metadata for the whole list with one query per metadata strand, and
+attach it to the items as attributes so that the usual attribute access
+(item.title and so on) finds it without going to the database.
+"""
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .. import models
+
+
+# Text metadata keys usually needed for lists of schedule items.
+DEFAULT_KEYS = ('title', 'description')
+
+
+def text_for(model, pks, keys=DEFAULT_KEYS, date=None):
+    """Retrieves text metadata for many items of one model in one query.
+
+    Args:
+        model: the text metadata model to query, for example
+            ShowTextMetadata.
+        pks: the primary keys of the items whose metadata is wanted.
+        keys: the names of the metadata keys wanted.
+        date: the date at which the metadata should be effective; defaults to
+            now.
+
+    Returns:
+        a dictionary mapping item primary keys to dictionaries mapping key
+        names to values.  Items with none of the keys are left out.
+    """
+    if date is None:
+        date = timezone.now()
+    pks = set(pks)
+    if not pks:
+        return {}
+
+    rows = model.objects.filter(
+        Q(effective_to__isnull=True) | Q(effective_to__gt=date),
+        element__in=pks,
+        key__name__in=keys,
+        effective_from__lte=date,
+    ).order_by('effective_from').values_list('element', 'key__name', 'value')
+
+    result = {}
+    for element, key, value in rows:
+        # Later effective metadata overrides earlier.
+        result.setdefault(element, {})[key] = value
+    return result
+
+
+def prefetch_shows(shows, keys=DEFAULT_KEYS, date=None):
+    """Attaches text metadata to a list of shows.
+
+    Returns:
+        the list of shows.
+    """
+    attach(
+        shows,
+        [text_for(models.ShowTextMetadata, (s.pk for s in shows), keys, date)],
+        [lambda show: show.pk]
+    )
+    return shows
+
+
+def prefetch_seasons(seasons, keys=DEFAULT_KEYS, date=None):
+    """Attaches text metadata, inherited from shows, to a list of seasons.
+
+    Returns:
+        the list of seasons.
+    """
+    attach(
+        seasons,
+        [
+            text_for(
+                models.SeasonTextMetadata,
+                (s.pk for s in seasons),
+                keys,
+                date
+            ),
+            text_for(
+                models.ShowTextMetadata,
+                (s.show_id for s in seasons),
+                keys,
+                date
+            ),
+        ],
+        [lambda season: season.pk, lambda season: season.show_id]
+    )
+    return seasons
+
+
+def prefetch_timeslots(timeslots, keys=DEFAULT_KEYS, date=None):
+    """Attaches text metadata, inherited from seasons and shows, to a list of
+    timeslots.
+
+    The timeslots' seasons should already be loaded (for example, with
+    select_related), or this will run a query per timeslot to find them.
+
+    Returns:
+        the list of timeslots.
+    """
+    attach(
+        timeslots,
+        [
+            text_for(
+                models.TimeslotTextMetadata,
+                (t.pk for t in timeslots if t.pk),
+                keys,
+                date
+            ),
+            text_for(
+                models.SeasonTextMetadata,
+                (t.season_id for t in timeslots if t.season_id),
+                keys,
+                date
+            ),
+            text_for(
+                models.ShowTextMetadata,
+                (t.season.show_id for t in timeslots),
+                keys,
+                date
+            ),
+        ],
+        [
+            lambda slot: slot.pk,
+            lambda slot: slot.season_id,
+            lambda slot: slot.season.show_id,
+        ]
+    )
+    return timeslots
+
+
+def attach(items, strands, keyers):
+    """Attaches metadata to items as attributes.
+
+    Args:
+        items: the items to attach metadata to.
+        strands: a list of metadata dictionaries, as returned by text_for,
+            in order of precedence (the item's own metadata first, then its
+            parent's, and so on).
+        keyers: a list of functions, one per strand, taking an item and
+            returning the key of its metadata in that strand.
+    """
+    for item in items:
+        found = {}
+        for strand, keyer in reversed(zip(strands, keyers)):
+            found.update(strand.get(keyer(item), {}))
+        for key, value in found.iteritems():
+            setattr(item, key, value)
@@ -9,6 +9,18 @@ TODO: test these?
 
 from django.utils import timezone
 
+try:
+    from pytz import AmbiguousTimeError, NonExistentTimeError
+except ImportError:
+    # Without pytz, make_aware can't tell that a local time is invalid.
+    AmbiguousTimeError = NonExistentTimeError = None
+
+# The errors make_aware raises for local times that happen twice (when the
+# clocks go back), and for those that don't happen at all (when they go
+# forward).
+AMBIGUOUS_TIME_ERRORS = tuple(e for e in (AmbiguousTimeError,) if e)
+NON_EXISTENT_TIME_ERRORS = tuple(e for e in (NonExistentTimeError,) if e)
+
 
 def un_nld(nldate):
     """Converts naive dates of local times into their aware date versions.
@@ -24,6 +36,30 @@ def un_nld(nldate):
     return timezone.make_aware(nldate, timezone.get_current_timezone())
 
 
+def un_nld_once(nldate):
+    """Converts a naive local time to an aware one, allowing for DST
+    changes.
+
+    Unlike un_nld, this doesn't fail on local times around DST changes: a
+    local time that happens twice is taken to be the first of the two, and
+    a local time that is skipped gives None.
+
+    Args:
+        nldate: the naive datetime representing a local time
+
+    Returns:
+        the aware datetime equivalent, or None if the local time never
+        happens.
+    """
+    zone = timezone.get_current_timezone()
+    try:
+        return timezone.make_aware(nldate, zone)
+    except AMBIGUOUS_TIME_ERRORS:
+        return zone.localize(nldate, is_dst=True)
+    except NON_EXISTENT_TIME_ERRORS:
+        return None
+
+
 def nldiff(a, b):
     """Takes the local-time difference between an aware datetime object
     pair.
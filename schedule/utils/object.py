@@ -10,7 +10,12 @@ from django.db import models as d_models
 
 from .. import utils
 from .. import models
+from ..utils import archive
 from ..utils import block
+from ..utils import cache
+from ..utils import deferred
+from ..utils import instrument
+from ..utils import memo
 from ..utils import range as r
 from ..utils import week_table
 
@@ -23,7 +28,7 @@ class Schedule(object):
     the act of compiling the schedule from model queries until the moment its
     contents are required.
     """
-    def __init__(self, start, range, builder):
+    def __init__(self, start, range, builder, lanes=False):
         """Creates a new :class:`Schedule`.
 
         This does *not* start processing the schedule; the schedule itself is
@@ -37,6 +42,9 @@ class Schedule(object):
             builder: A function, taking this schedule object, that returns the
                 actual schedule data (or an object representing a lack of
                 schedule).
+            lanes: True if the shows in this schedule may overlap (as when
+                it includes private shows), and so should be tabulated in
+                lanes.
         """
         self.start = start
         self.end = r.dst_add(start, range)
@@ -44,6 +52,7 @@ class Schedule(object):
 
         self._data = None
         self.builder = builder
+        self.lanes = lanes
 
     def replace(self, **kwargs):
         """Returns a copy of this schedule with the given replacements.
@@ -60,7 +69,7 @@ class Schedule(object):
         """
         initargs = {
             key: getattr(self, key)
-            for key in ['start', 'range', 'builder']
+            for key in ['start', 'range', 'builder', 'lanes']
         }
         initargs.update(kwargs)
 
@@ -96,7 +105,12 @@ class Schedule(object):
             function.
         """
         if self._data is None:
-            self._data = self.builder(self)
+            with instrument.phase(
+                'build',
+                type=self.__class__.__name__,
+                start=self.start
+            ):
+                self._data = self.builder(self)
 
         return self._data
 
@@ -108,19 +122,24 @@ class DaySchedule(Schedule):
     """A schedule type that specifically works for day schedule ranges."""
     type = 'Day'
 
-    def __init__(self, start, builder, range=None):
+    def __init__(self, start, builder, range=None, lanes=False):
         """Initialises a DaySchedule."""
         super(DaySchedule, self).__init__(
             start=start,
             range=range if range else datetime.timedelta(days=1),
-            builder=builder
+            builder=builder,
+            lanes=lanes
         )
 
     def up(self):
         """Returns the full week schedule that this day schedule is contained
         within.
         """
-        return WeekSchedule(start=self.start, builder=self.builder)
+        return WeekSchedule(
+            start=self.start,
+            builder=self.builder,
+            lanes=self.lanes
+        )
 
     def __unicode__(self):
         """Representation of this schedule object, in Unicode format."""
@@ -140,17 +159,38 @@ class WeekSchedule(Schedule):
     """A schedule type that specifically works for week schedule ranges."""
     type = 'Week'
 
-    def __init__(self, start, builder, range=None):
+    def __init__(self, start, builder, range=None, lanes=False):
         """Initialises a WeekSchedule."""
         super(WeekSchedule, self).__init__(
             start=to_monday(start),
             range=range if range else datetime.timedelta(weeks=1),
-            builder=builder
+            builder=builder,
+            lanes=lanes
         )
 
-    def tabulate(self):
-        """Returns a processed form of the schedule data ready to render."""
-        return week_table.tabulate(self)
+    def tabulate(self, lanes=None):
+        """Returns a processed form of the schedule data ready to render.
+
+        Args:
+            lanes: if True, overlapping shows are split into lanes within
+                each day; see week_table.tabulate.  Defaults to the
+                schedule's own lanes, so that templates calling tabulate
+                get lanes for schedules including private shows.
+        """
+        if lanes is None:
+            lanes = self.lanes
+        # Make sure building the data isn't counted as tabulation.
+        self.data
+        with instrument.phase('tabulate', start=self.start):
+            return week_table.tabulate(self, lanes)
+
+    def tabulate_lanes(self):
+        """Returns the schedule data ready to render, with overlapping shows
+        split into lanes.
+
+        This is for schedules including private shows, which may overlap.
+        """
+        return self.tabulate(lanes=True)
 
     def __unicode__(self):
         """Representation of this schedule object, in Unicode format."""
@@ -159,15 +199,21 @@ class WeekSchedule(Schedule):
     def days(self):
         """Returns a list of DaySchedules corresponding to days of this week.
 
+        The day schedules take their data from this week's data where
+        possible, so evaluating them does not run the builder seven more
+        times.
+
         Returns:
             A list of seven DaySchedules in ascending chronological order
             from Monday to Friday, each starting at the same time as this
             WeekSchedule.
         """
+        builder = sliced_builder(self, self.builder)
         return [
             DaySchedule(
                 start=self.start + datetime.timedelta(days=i),
-                builder=self.builder
+                builder=builder,
+                lanes=self.lanes
             )
             for i in range(0, 7)
         ]
@@ -190,7 +236,112 @@ def to_monday(date):
     return date - datetime.timedelta(days=(date.isocalendar()[2] - 1))
 
 
-def range_builder(schedule, timeslots=None):
+def slice_data(data, start, end):
+    """Takes the part of some built schedule data covering a given period.
+
+    Args:
+        data: a list of timeslots, as returned by range_builder.
+        start: the start datetime of the period to take.
+        end: the end datetime of the period to take.
+
+    Returns:
+        the list of timeslots in data that are on at any point between start
+        and end, which keeps any filling and block annotations from data.
+    """
+    return [
+        slot for slot in data
+        if slot.start_time < end and slot.end_time > start
+    ]
+
+
+def sliced_builder(parent, builder):
+    """Makes a builder that slices schedules out of a parent schedule's data.
+
+    Schedules lying within the parent (for example, the days of a week) are
+    built by slicing the parent's data, building the parent if needed.  Any
+    other schedules (for example, those reached through previous and next),
+    schedules whose parent has no data to slice, and schedules whose slice
+    has no real timeslots in it, are built with builder.
+
+    Args:
+        parent: the Schedule whose data is to be sliced.
+        builder: the builder to fall back on.
+
+    Returns:
+        a schedule builder function.
+    """
+    def f(schedule):
+        if parent.start <= schedule.start and schedule.end <= parent.end:
+            data = parent.data
+        else:
+            data = None
+        # The parent's excuse for not having data (for example, its start
+        # falling between terms) may not hold for the sliced schedule.
+        if data is None or isinstance(data, basestring):
+            result = builder(schedule)
+        else:
+            result = slice_data(data, schedule.start, schedule.end)
+            # A slice of nothing but filler would be an excuse (such as
+            # 'empty') if built on its own.
+            if not any(slot.pk for slot in result):
+                result = builder(schedule)
+        return result
+
+    return f
+
+
+def warm_adjacent(schedule, variant, timeslots=None):
+    """Builds the schedules either side of a schedule into the cache once the
+    current response has been sent.
+
+    People tend to page through schedules, so the previous and next schedules
+    are likely to be asked for next.  Only those not already cached are built,
+    and they are built together with batch_build.
+
+    Args:
+        schedule: the Schedule whose neighbours are to be warmed.
+        variant: the cache variant, as given to cached_builder.
+        timeslots: the Timeslot QuerySet from which to build the schedules;
+            see range_builder.
+    """
+    def warm():
+        rev = cache.revision()
+        uncached = [
+            s for s in (schedule.previous(), schedule.next())
+            if not cache.is_cached(cache.schedule_key(s, variant))
+        ]
+        for s in batch_build(uncached, timeslots):
+            cache.store(cache.schedule_key(s, variant), s.data, rev)
+
+    deferred.defer(warm)
+
+
+def cached_builder(builder, variant):
+    """Wraps a schedule builder so that its results are shared via the cache.
+
+    Only one worker at a time rebuilds a given schedule; while it does so,
+    other requests for that schedule are served the last built data, if any.
+    See schedule.utils.cache for details.
+
+    Args:
+        builder: the schedule builder (for example, range_builder) to wrap.
+        variant: a string distinguishing the data this builder produces from
+            that of other builders over the same period, for example 'public'
+            or 'private'.
+
+    Returns:
+        a schedule builder function.
+    """
+    def f(schedule):
+        return cache.single_flight(
+            cache.schedule_key(schedule, variant),
+            lambda: builder(schedule)
+        )
+
+    return f
+
+
+def range_builder(schedule, timeslots=None, variant=None):
     """A simple schedule data builder.
 
     Args:
@@ -198,6 +349,11 @@ def range_builder(schedule, timeslots=None):
         timeslots: An optional parameter allowing the Timeslot QuerySet from
             which the schedules are built to be changed from the default of
             Timeslot.objects.public().
+        variant: 'public' if timeslots is Timeslot.objects.public(), or
+            'private' if it is Timeslot.objects.all(), in which case closed
+            terms may be read from their archives instead; defaults to
+            'public' if timeslots is not given, and otherwise to None, which
+            means archives are never used.
 
     Returns:
         Either a list of schedule data, or one of the following strings
@@ -213,17 +369,120 @@ def range_builder(schedule, timeslots=None):
     start = schedule.start
     end = schedule.end
 
-    term = models.Term.of(start)
-    if not term:
-        result = 'empty' if not models.Term.before(start) else 'not_in_term'
-    else:
-        # Not 'if timeslots', that might evaluate the query!
-        if timeslots is None:
-            timeslots = models.Timeslot.objects.public()
+    # Not 'if timeslots', that might evaluate the query!
+    if timeslots is None:
+        timeslots = models.Timeslot.objects.public()
+        variant = 'public'
+
+    # Filling looks up the filler show and term once per gap, so make sure
+    # those lookups are shared even outside of a request memo.
+    with memo.scope():
+        return memo.memoise(
+            ('range_builder', start, end, str(timeslots.query)),
+            lambda: build_range(start, end, timeslots, variant)
+        )
+
+
+def batch_build(schedules, timeslots=None):
+    """Builds the data for several schedules at once.
+
+    This gives the same results as running range_builder on each schedule,
+    but the schedules share one timeslot query, one term lookup and one pass
+    of filling and block annotation over the whole period they cover, which
+    is then split up between them.  This works best for consecutive
+    schedules, such as a week and the weeks either side of it, or all of the
+    weeks in a term.
+
+    Args:
+        schedules: a list of Schedules whose data is to be built.
+        timeslots: the Timeslot QuerySet from which to build the schedules;
+            see range_builder.
+
+    Returns:
+        schedules, each of which has had its data filled in.
+    """
+    if not schedules:
+        return schedules
+
+    if timeslots is None:
+        timeslots = models.Timeslot.objects.public()
 
+    start = min(s.start for s in schedules)
+    end = max(s.end for s in schedules)
+
+    with memo.scope():
         slots = list(timeslots.select_related().in_range(start, end))
-        result = (
-            block.annotate(utils.filler.fill(slots, start, end))
-            if slots else 'empty'
-        )
+        to_fill = []
+
+        for schedule in schedules:
+            if not memo.term_of(schedule.start):
+                schedule._data = (
+                    'empty' if not memo.term_before(schedule.start)
+                    else 'not_in_term'
+                )
+            elif not slice_data(slots, schedule.start, schedule.end):
+                schedule._data = 'empty'
+            else:
+                to_fill.append(schedule)
+
+        if to_fill:
+            # Only fill from the first schedule starting in a term: filler
+            # slots take their season from the term they start in (or the
+            # one before it), so filling from a time before every term fails.
+            fill_start = min(s.start for s in to_fill)
+            fill_end = max(s.end for s in to_fill)
+            filled = block.annotate(
+                utils.filler.fill(
+                    slice_data(slots, fill_start, fill_end),
+                    fill_start,
+                    fill_end
+                )
+            )
+            for schedule in to_fill:
+                schedule._data = slice_data(
+                    filled,
+                    schedule.start,
+                    schedule.end
+                )
+    return schedules
+
+
+def build_range(start, end, timeslots, variant=None):
+    """Does the actual work of range_builder.
+
+    Args:
+        start: the start datetime of the range to build.
+        end: the end datetime of the range to build.
+        timeslots: the Timeslot QuerySet from which to build the range.
+        variant: the variant timeslots stands for; see range_builder.
+
+    Returns:
+        see range_builder.
+    """
+    with instrument.phase('term', start=start):
+        term = memo.term_of(start)
+        before = memo.term_before(start) if not term else None
+
+    if not term:
+        result = 'empty' if not before else 'not_in_term'
+    else:
+        with instrument.phase('timeslots', start=start):
+            # Closed terms may have been frozen into an archive.
+            archived = archive.timeslots(term, start, end, variant)
+            if archived is None:
+                slots = list(timeslots.select_related().in_range(start, end))
+            else:
+                slots = archived
+        if slots:
+            with instrument.phase('fill', start=start):
+                filled = utils.filler.fill(slots, start, end)
+            with instrument.phase('annotate', start=start):
+                if archived is None:
+                    result = block.annotate(filled)
+                else:
+                    # Archived timeslots already have their blocks.
+                    block.annotate([slot for slot in filled if not slot.pk])
+                    result = filled
+        else:
+            result = 'empty'
     return result
@@ -0,0 +1,123 @@
+"""Opt-in sampling profiler for schedule views.
+
+Some slow schedule renders only happen with production data, so this lets
+a sample of real requests be run under cProfile.  Profiling is controlled by
+the following settings:
+
+SCHEDULE_PROFILE_DIR - the directory .pstats files are written to; if not
+    set, nothing is ever profiled.
+SCHEDULE_PROFILE_EVERY - profile one in this many requests (per process); if
+    0 or not set, requests are only profiled on demand.
+SCHEDULE_PROFILE_PARAM - the query string parameter with which staff can
+    ask for any request to be profiled (default 'profile').
+
+The resulting files can be summarised with the profile_summary management
+command.
+"""
+
+import cProfile
+import functools
+import itertools
+import os
+import re
+import time
+
+from django.conf import settings
+
+
+_counter = itertools.count(1)
+
+
+def profiled(describe):
+    """Decorator for views that may be profiled.
+
+    Args:
+        describe: a function, taking the same arguments as the view, that
+            returns a list of strings identifying the request (for example,
+            the schedule type and start).  These go into the profile's file
+            name.
+
+    Returns:
+        a view decorator.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not should_profile(request):
+                return view(request, *args, **kwargs)
+
+            profiler = cProfile.Profile()
+            try:
+                return profiler.runcall(
+                    rendered(view),
+                    request,
+                    *args,
+                    **kwargs
+                )
+            finally:
+                dump(profiler, describe(request, *args, **kwargs))
+
+        return wrapper
+
+    return decorator
+
+
+def rendered(view):
+    """Wraps a view so that lazy responses are rendered before returning.
+
+    TemplateResponses are otherwise only rendered by the response handler,
+    after the profiler has stopped, leaving template rendering out of the
+    profile.
+    """
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            response.render()
+        return response
+
+    return wrapper
+
+
+def by_name(name):
+    """Makes a describe function for profiled from a view name.
+
+    The request is identified by the name and the view's arguments.
+    """
+    def describe(request, *args, **kwargs):
+        return [name] + list(args) + [kwargs[k] for k in sorted(kwargs)]
+
+    return describe
+
+
+def should_profile(request):
+    """Decides whether the given request should be profiled."""
+    if not getattr(settings, 'SCHEDULE_PROFILE_DIR', None):
+        return False
+
+    param = getattr(settings, 'SCHEDULE_PROFILE_PARAM', 'profile')
+    user = getattr(request, 'user', None)
+    if param in request.GET and user is not None and user.is_staff:
+        return True
+
+    every = getattr(settings, 'SCHEDULE_PROFILE_EVERY', 0)
+    return bool(every) and next(_counter) % every == 0
+
+
+def dump(profiler, parts):
+    """Writes a profiler's statistics to SCHEDULE_PROFILE_DIR.
+
+    Args:
+        profiler: the cProfile.Profile to dump.
+        parts: a list of objects identifying the profiled request, which are
+            put in the file name after being made file name safe.
+
+    Returns:
+        the path of the file written.
+    """
+    name = '-'.join(
+        [re.sub(r'[^\w.+-]', '_', unicode(part)) for part in parts]
+        + ['{:.0f}'.format(time.time() * 1000), str(os.getpid())]
+    )
+    path = os.path.join(settings.SCHEDULE_PROFILE_DIR, name + '.pstats')
+    profiler.dump_stats(path)
+    return path
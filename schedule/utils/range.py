@@ -8,6 +8,8 @@ the schedule.
 from django.utils import timezone
 
 from . import filler
+from . import memo
+from . import metadata
 from ..models import Timeslot
 
 
@@ -25,23 +27,30 @@ def between(start, end, limit=None):
 
     Returns:
         A list of show timeslots from 'from' to 'to' inclusive, including
-        filler shows and any timeslots straddling the boundary dates.
+        filler shows and any timeslots straddling the boundary dates, with
+        their titles already fetched.
     """
     def trim(lst):
         return lst[:limit] if limit else lst
 
-    return trim(
-        filler.fill(
-            trim(
-                Timeslot.objects.public().select_related().in_range(
-                    start,
-                    end
-                )
-            ),
-            start,
-            end,
+    # See object.range_builder.
+    with memo.scope():
+        return memo.memoise(
+            ('between', start, end, limit),
+            lambda: metadata.prefetch_timeslots(
+                trim(
+                    filler.fill(
+                        trim(
+                            Timeslot.objects.public().select_related()
+                            .in_range(start, end)
+                        ),
+                        start,
+                        end,
+                    )
+                ),
+                keys=('title',)
+            )
         )
-    )
 
 
 def day(today=None, limit=None):
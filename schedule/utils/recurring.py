@@ -0,0 +1,396 @@
+"""Functions for working with weekly recurring timeslots within terms.
+
+Seasons are scheduled as a timeslot at the same local time every week of a
+term.  These functions find free recurring slots to schedule seasons into,
+and schedule seasons in bulk, checking candidates against an in-memory index
+of the term's existing timeslots rather than querying for each one.
+"""
+
+import bisect
+import collections
+import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from .. import models
+from . import cache
+from . import exceptions
+from . import export
+from . import nltime
+
+
+WEEK = datetime.timedelta(weeks=1)
+
+# Number of rows to insert, or IDs to look up, at once (SQLite limits query
+# parameters).
+BATCH_SIZE = 100
+
+# A weekly slot free in every week of a term.  weekday is 0 for Monday to 6
+# for Sunday, time is the local start time, and starts lists the start of
+# every occurrence in the term.
+FreeSlot = collections.namedtuple('FreeSlot', ['weekday', 'time', 'starts'])
+
+
+class IntervalIndex(object):
+    """An index of busy time, answering whether ranges are free in
+    O(log n) time.
+
+    Overlapping intervals are merged when the index is built, so that the
+    busy time is a sorted list of disjoint intervals.
+    """
+    def __init__(self, intervals):
+        """Builds an index.
+
+        Args:
+            intervals: an iterable of (start, end) pairs of busy time.
+        """
+        self.starts = []
+        self.ends = []
+        for start, end in sorted(intervals):
+            if self.ends and start < self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    def is_free(self, start, end):
+        """Returns whether none of the busy time overlaps [start, end)."""
+        # The last busy interval starting before the end is the only one
+        # that can overlap.
+        index = bisect.bisect_left(self.starts, end) - 1
+        return index < 0 or self.ends[index] <= start
+
+
+def weekly(first, until):
+    """Returns the starts of a weekly recurrence, keeping the same local
+    time across DST changes.
+
+    Occurrences whose local time is skipped by a DST change are left out;
+    see local_weekly.
+
+    Args:
+        first: the aware start of the first occurrence.
+        until: the aware datetime before which every occurrence must start.
+
+    Returns:
+        a list of aware datetimes.
+    """
+    return [
+        start for _, start in local_weekly(nltime.nld(first), until)
+        if start is not None
+    ]
+
+
+def local_weekly(first, until):
+    """Returns the occurrences of a weekly recurrence at a local time.
+
+    An occurrence whose local time happens twice, as the clocks go back, is
+    taken to start at the first of the two; one whose local time is skipped,
+    as the clocks go forward, has no start.
+
+    Args:
+        first: the naive local start of the first occurrence.
+        until: the aware datetime before which every occurrence must start.
+
+    Returns:
+        a list of (naive local start, aware start) pairs, the aware start
+        being None for occurrences skipped by DST changes.
+    """
+    last = nltime.nld(until)
+    occurrences = []
+    local = first
+    while local < last:
+        occurrences.append((local, nltime.un_nld_once(local)))
+        local += WEEK
+    return occurrences
+
+
+def term_occurrences(term, weekday, time, duration):
+    """Returns the starts of a weekly slot's occurrences lying wholly within
+    a term.
+
+    Occurrences whose local time is skipped by a DST change are left out;
+    see term_local_occurrences.
+
+    Args:
+        term: the Term.
+        weekday: the weekday of the slot, 0 for Monday to 6 for Sunday.
+        time: the local start time of the slot, as a datetime.time.
+        duration: the duration of the slot, as a timedelta.
+
+    Returns:
+        a list of aware datetimes.
+    """
+    return [
+        start for _, start in term_local_occurrences(
+            term,
+            weekday,
+            time,
+            duration
+        )
+        if start is not None
+    ]
+
+
+def term_local_occurrences(term, weekday, time, duration):
+    """Finds the occurrences of a weekly slot lying wholly within a term,
+    including those skipped by DST changes.
+
+    Args:
+        see term_occurrences.
+
+    Returns:
+        a list of (naive local start, aware start) pairs, as local_weekly.
+    """
+    term_start = nltime.nld(term.start_date)
+    term_end = nltime.nld(term.end_date)
+    day = term_start.date() + datetime.timedelta(
+        days=(weekday - term_start.weekday()) % 7
+    )
+    first = datetime.datetime.combine(day, time)
+    if first < term_start:
+        first += WEEK
+
+    def within(local, start):
+        if start is None:
+            return local + duration <= term_end
+        return start + duration <= term.end_date
+
+    return [
+        (local, start) for local, start in local_weekly(first, term.end_date)
+        if within(local, start)
+    ]
+
+
+def busy_intervals(term, location=None):
+    """Finds the time in a term that is already booked.
+
+    Args:
+        term: the Term.
+        location: if given, a Location (or its ID); time booked in that
+            location by any timeslot, public or not, is also busy.
+
+    Returns:
+        a list of (start, end) pairs.
+    """
+    timeslots = models.Timeslot.objects.in_range(
+        term.start_date,
+        term.end_date
+    )
+    # Collapsible timeslots are filler, which new shows can replace.
+    on_air = timeslots.public().exclude(
+        season__show__show_type__is_collapsible=True
+    ).values_list('start_time', 'duration')
+    busy = [(start, start + duration) for start, duration in on_air]
+
+    if location is not None:
+        location = getattr(location, 'pk', location)
+        located = list(
+            timeslots.values_list('season__show', 'start_time', 'duration')
+        )
+        histories = export.show_locations(
+            set(show for show, _, _ in located),
+            fields=('location',)
+        )
+        busy.extend(
+            (start, start + duration)
+            for show, start, duration in located
+            if export.location_at(histories.get(show, []), start) == location
+        )
+    return busy
+
+
+def free_slots(term, duration, weekdays=None, hours=None, location=None):
+    """Finds the weekly slots free in every week of a term.
+
+    Existing timeslots are read in at most three queries, after which every
+    candidate is checked in memory.
+
+    Args:
+        term: the Term to search.
+        duration: the duration of the slots wanted, as a timedelta.
+        weekdays: the weekdays to consider, 0 for Monday to 6 for Sunday;
+            defaults to every day.
+        hours: the local hours at which slots may start; defaults to every
+            hour.
+        location: if given, a Location (or its ID) that must also be free.
+
+    Returns:
+        a list of FreeSlots, by weekday and time.
+    """
+    if weekdays is None:
+        weekdays = range(7)
+    if hours is None:
+        hours = range(24)
+
+    index = IntervalIndex(busy_intervals(term, location))
+    found = []
+    for weekday in sorted(weekdays):
+        for hour in sorted(hours):
+            time = datetime.time(hour=hour)
+            starts = term_occurrences(term, weekday, time, duration)
+            if starts and all(
+                index.is_free(start, start + duration) for start in starts
+            ):
+                found.append(FreeSlot(weekday, time, starts))
+    return found
+
+
+def schedule_season(season, weekday, time, duration, creator, force=False):
+    """Schedules a season into the same slot every week of its term.
+
+    The new timeslots are checked against the term's existing bookings (see
+    busy_intervals) and the season's own timeslots in memory, and then
+    inserted and logged together in one transaction.  Weeks in which the
+    season already has a timeslot starting at that time are skipped.
+
+    As the timeslots are bulk inserted, the usual save signals are not sent;
+    instead, the schedule revision is bumped and the changes logged once for
+    the whole batch.
+
+    Args:
+        season: the Season to schedule.
+        weekday: the weekday of the slot, 0 for Monday to 6 for Sunday.
+        time: the local start time of the slot, as a datetime.time.
+        duration: the duration of the slot, as a timedelta.
+        creator: the Person creating the timeslots.
+        force: if True, the timeslots are created even if they clash.
+
+    Returns:
+        the list of timeslots created.
+
+    Raises:
+        ScheduleConflictError: if any of the timeslots would clash with an
+            existing booking, and force is False.
+    """
+    # The season's own timeslots are read in the same transaction as the
+    # insert, so that nothing is scheduled twice, and a failed batch leaves
+    # none of the others behind.
+    with transaction.commit_on_success():
+        own = list(season.timeslot_set.values_list('start_time', 'duration'))
+        taken = set(start for start, _ in own)
+        slots = [
+            models.Timeslot(
+                season=season,
+                creator=creator,
+                start_time=start,
+                duration=duration
+            )
+            for start in term_occurrences(season.term, weekday, time, duration)
+            if start not in taken
+        ]
+        check(
+            slots,
+            busy_intervals(season.term)
+            + [(start, start + length) for start, length in own],
+            force
+        )
+        if slots:
+            insert(slots)
+    if slots:
+        cache.bump_revision()
+    return slots
+
+
+def repeat_weekly(season, force=False):
+    """Schedules a season into the slot of its first timeslot every week of
+    its term.
+
+    This is for seasons whose first timeslot has been entered by hand.
+
+    Args:
+        season: the Season to schedule.
+        force: if True, the timeslots are created even if they clash.
+
+    Returns:
+        the list of timeslots created.
+
+    Raises:
+        ValueError: if the season has no timeslots to repeat.
+        ScheduleConflictError: if any of the timeslots would clash with an
+            existing booking, and force is False.
+    """
+    try:
+        first = season.timeslot_set.order_by('start_time')[0]
+    except IndexError:
+        raise ValueError('{} has no timeslots to repeat.'.format(season))
+    local = timezone.localtime(first.start_time)
+    return schedule_season(
+        season,
+        local.weekday(),
+        local.time(),
+        first.duration,
+        first.creator,
+        force
+    )
+
+
+def check(slots, busy, force=False):
+    """Checks new timeslots for clashes with busy time.
+
+    Args:
+        slots: the new timeslots (saved or not).
+        busy: a list of (start, end) pairs of time already booked.
+        force: if True, clashes are not an error.
+
+    Returns:
+        the list of clashing timeslots.
+
+    Raises:
+        ScheduleConflictError: if any of the timeslots clash, and force is
+            False.
+    """
+    index = IntervalIndex(busy)
+    conflicts = [
+        slot for slot in slots
+        if not index.is_free(slot.start_time, slot.end_time)
+    ]
+    if conflicts and not force:
+        raise exceptions.ScheduleConflictError(
+            '{} of the timeslots clash with existing bookings.'.format(
+                len(conflicts)
+            ),
+            conflicts
+        )
+    return conflicts
+
+
+def insert(slots):
+    """Inserts new timeslots in bulk, and logs their creation.
+
+    This should be called inside a transaction, and the schedule revision
+    bumped afterwards.
+    """
+    # bulk_create doesn't give back IDs, so the new timeslots are found as
+    # those in the batch's seasons and time range that weren't there before.
+    seasons = sorted(set(slot.season_id for slot in slots))
+    first = min(slot.start_time for slot in slots)
+    last = max(slot.start_time for slot in slots)
+
+    def in_batch():
+        return set(
+            pk
+            for chunk in batches(seasons)
+            for pk in models.Timeslot.objects.filter(
+                season__in=chunk,
+                start_time__range=(first, last)
+            ).values_list('pk', flat=True)
+        )
+
+    existing = in_batch()
+    for chunk in batches(slots):
+        models.Timeslot.objects.bulk_create(chunk)
+    models.TimeslotChange.record(
+        sorted(in_batch() - existing),
+        models.TimeslotChange.CREATED
+    )
+
+
+def batches(items, size=BATCH_SIZE):
+    """Splits a list up into lists of at most size items.
+
+    This keeps bulk inserts and IN lookups within the number of parameters
+    a database allows in one query (999 for SQLite).
+    """
+    return [items[i:i + size] for i in xrange(0, len(items), size)]
@@ -0,0 +1,105 @@
+"""Bulk rescheduling of timeslots.
+
+Moving a show's slot for the rest of a term means changing every one of its
+timeslots in the same way.  shift does this with as few UPDATE statements as
+it can: one, by the timeslots' own filter, when they all change alike, and
+otherwise one for each distinct combination of how far the timeslots move and
+what their new duration is, by ID.  They only change differently if they are
+to keep their local times and a DST change lies between some of their old and
+new starts, or they are being resized and had different durations to begin
+with.  The changes are logged and the schedule revision bumped once for the
+whole batch, rather than once per timeslot as saving each one would.
+"""
+
+import datetime
+
+from django.db import transaction
+from django.db.models import F
+
+from .. import models
+from . import cache
+from . import nltime
+from . import recurring
+
+
+ZERO = datetime.timedelta(0)
+
+
+def shift(timeslots, offset=ZERO, resize=ZERO, local=False):
+    """Moves and resizes timeslots in bulk.
+
+    Args:
+        timeslots: a Timeslot QuerySet of the timeslots to change.
+        offset: the timedelta to move the start of each timeslot by.
+        resize: the timedelta to add to the duration of each timeslot.
+        local: if True, offset is in local time, so a timeslot moved across
+            a DST change keeps its local start time (plus offset); otherwise
+            offset is absolute.
+
+    Returns:
+        the number of timeslots changed.
+
+    Raises:
+        ValueError: if resizing would leave any timeslot with no duration.
+    """
+    with transaction.commit_on_success():
+        rows = list(timeslots.values_list('pk', 'start_time', 'duration'))
+        if not rows or not (offset or resize):
+            return 0
+        if any(duration + resize <= ZERO for _, _, duration in rows):
+            raise ValueError(
+                'Resizing would leave timeslots with no duration.'
+            )
+
+        grouped = groups(rows, offset, resize, local)
+        for (delta, duration), pks in grouped:
+            changes = {}
+            if delta:
+                changes['start_time'] = F('start_time') + delta
+            # The duration field can't be added to in the database, so each
+            # group is given its new duration outright.
+            if resize:
+                changes['duration'] = duration
+            if not changes:
+                continue
+            if len(grouped) == 1:
+                # Every timeslot changes alike, so the timeslots can be
+                # updated by their own filter, in one statement.
+                timeslots.update(**changes)
+            else:
+                for chunk in recurring.batches(pks):
+                    models.Timeslot.objects.filter(
+                        pk__in=chunk
+                    ).update(**changes)
+        models.TimeslotChange.record(
+            [pk for pk, _, _ in rows],
+            models.TimeslotChange.CHANGED,
+            dict(
+                (pk, (start, start + duration))
+                for pk, start, duration in rows
+            )
+        )
+    cache.bump_revision()
+    return len(rows)
+
+
+def groups(rows, offset, resize, local=False):
+    """Groups timeslots by how they are to be changed.
+
+    Args:
+        rows: a list of (ID, start, duration) tuples of timeslots.
+        offset: the timedelta to move the start of each timeslot by.
+        resize: the timedelta to add to the duration of each timeslot.
+        local: if True, offset is in local time (see shift).
+
+    Returns:
+        a list of ((move, duration), IDs) pairs, one per distinct absolute
+        move and new duration.
+    """
+    by_change = {}
+    for pk, start, duration in rows:
+        move = offset
+        if local:
+            move = nltime.un_nld(nltime.nld(start) + offset) - start
+        by_change.setdefault((move, duration + resize), []).append(pk)
+    return by_change.items()
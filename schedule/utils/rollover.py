@@ -0,0 +1,223 @@
+"""Rolling seasons over from one term into the next.
+
+At the start of each term, returning shows get a new season with the same
+weekly timeslots as their last one.  rollover does this for many seasons at
+once: the new seasons, their text metadata and their timeslots are each
+inserted in bulk, in one transaction, after the timeslots have been checked
+for clashes in memory.
+"""
+
+import collections
+
+from django.db import transaction
+from django.utils import timezone
+
+from .. import models
+from . import cache
+from . import clash
+from . import exceptions
+from . import recurring
+
+
+# The outcome of a rollover: the numbers of seasons and timeslots created,
+# the list of new timeslots that clash with existing bookings or each other
+# (only non-empty if the rollover was forced), and the list of Skipped
+# occurrences.
+Rollover = collections.namedtuple(
+    'Rollover',
+    ['seasons', 'timeslots', 'conflicts', 'skipped']
+)
+
+# An occurrence of an old season's weekly slot that was not rolled over,
+# because its naive local start never happens (the clocks go forward past
+# it).
+Skipped = collections.namedtuple('Skipped', ['season', 'start'])
+
+# A weekly slot of a season, as a local weekday and time and a duration.
+Pattern = collections.namedtuple('Pattern', ['weekday', 'time', 'duration'])
+
+
+def rollover(seasons, term, force=False):
+    """Clones seasons into a new term.
+
+    Each season is given a new season of the same show in term, with copies
+    of its current text metadata, and a timeslot in every week of term for
+    each distinct weekly slot (local weekday, time and duration) the old
+    season had.  Local times are kept across DST changes; occurrences at
+    local times skipped by a change are not created, but are reported.
+
+    Args:
+        seasons: the Seasons to roll over; no two may be of the same show.
+        term: the Term to roll them over into.
+        force: if True, the seasons are rolled over even if the new
+            timeslots clash.
+
+    Returns:
+        a Rollover.
+
+    Raises:
+        ValueError: if two of the seasons are of the same show.
+        ScheduleConflictError: if any of the new timeslots clash with
+            existing bookings or each other, and force is False.
+    """
+    seasons = list(seasons)
+    if len(set(season.show_id for season in seasons)) != len(seasons):
+        raise ValueError('Only one season per show can be rolled over.')
+    if not seasons:
+        return Rollover(0, 0, [], [])
+
+    # Plan the timeslots against the old seasons first, so that clashes are
+    # found before anything is written.
+    planned, skipped = plan(seasons, term)
+    conflicts = recurring.check(
+        planned,
+        recurring.busy_intervals(term),
+        force=True
+    )
+    # Unsaved timeslots all compare equal, so go by identity.
+    seen = set(id(slot) for slot in conflicts)
+    for _, later in clash.sweep(
+        planned,
+        lambda slot: slot.start_time,
+        lambda slot: slot.end_time
+    ):
+        if id(later) not in seen:
+            seen.add(id(later))
+            conflicts.append(later)
+    if conflicts and not force:
+        raise exceptions.ScheduleConflictError(
+            '{} of the new timeslots clash.'.format(len(conflicts)),
+            conflicts
+        )
+
+    with transaction.commit_on_success():
+        new_seasons = clone_seasons(seasons, term)
+        clone_metadata(seasons, new_seasons)
+        for slot in planned:
+            slot.season = new_seasons[slot.season.show_id]
+        if planned:
+            recurring.insert(planned)
+    cache.bump_revision()
+    return Rollover(len(new_seasons), len(planned), conflicts, skipped)
+
+
+def patterns(seasons):
+    """Works out the weekly slots of some seasons, in one query.
+
+    Returns:
+        a dictionary mapping season IDs to lists of (Pattern, creator ID)
+        pairs, one per distinct Pattern.
+    """
+    found = {}
+    rows = sorted(
+        (
+            row
+            for chunk in recurring.batches(seasons)
+            for row in models.Timeslot.objects.filter(
+                season__in=chunk
+            ).values_list('season', 'start_time', 'duration', 'creator')
+        ),
+        key=lambda row: row[1]
+    )
+    for season_id, start, duration, creator_id in rows:
+        local = timezone.localtime(start)
+        pattern = Pattern(local.weekday(), local.time(), duration)
+        season_patterns = found.setdefault(season_id, [])
+        if pattern not in [p for p, _ in season_patterns]:
+            season_patterns.append((pattern, creator_id))
+    return found
+
+
+def plan(seasons, term):
+    """Makes the unsaved timeslots for rolling seasons over into a term.
+
+    The timeslots are attached to the old seasons, to be swapped for the
+    new ones once they are saved.
+
+    Returns:
+        a (timeslots, skipped) pair, where skipped lists the Skipped
+        occurrences whose local start never happens.
+    """
+    season_patterns = patterns(seasons)
+    planned = []
+    skipped = []
+    for season in seasons:
+        for pattern, creator_id in season_patterns.get(season.pk, []):
+            occurrences = recurring.term_local_occurrences(
+                term,
+                pattern.weekday,
+                pattern.time,
+                pattern.duration
+            )
+            for local, start in occurrences:
+                if start is None:
+                    skipped.append(Skipped(season, local))
+                    continue
+                planned.append(models.Timeslot(
+                    season=season,
+                    creator_id=creator_id,
+                    start_time=start,
+                    duration=pattern.duration
+                ))
+    return planned, skipped
+
+
+def clone_seasons(seasons, term):
+    """Inserts new seasons in term for the shows of some seasons.
+
+    Returns:
+        a dictionary mapping show IDs to the new, saved seasons.
+    """
+    existing = set(
+        models.Season.objects.filter(term=term).values_list('pk', flat=True)
+    )
+    new = [
+        models.Season(
+            show_id=season.show_id,
+            term=term,
+            creator_id=season.creator_id,
+            date_submitted=timezone.now()
+        )
+        for season in seasons
+    ]
+    for chunk in recurring.batches(new):
+        models.Season.objects.bulk_create(chunk)
+    # bulk_create doesn't give back IDs, so find the new seasons again.
+    shows = [season.show_id for season in seasons]
+    return dict(
+        (season.show_id, season)
+        for chunk in recurring.batches(shows)
+        for season in models.Season.objects.filter(term=term, show__in=chunk)
+        if season.pk not in existing
+    )
+
+
+def clone_metadata(seasons, new_seasons):
+    """Copies the current text metadata of old seasons onto their new
+    seasons, in one query and one insert.
+
+    Args:
+        seasons: the old Seasons.
+        new_seasons: a dictionary mapping show IDs to the new Seasons.
+    """
+    model = models.SeasonTextMetadata
+    show_of = dict((season.pk, season.show_id) for season in seasons)
+    copies = []
+    rows = (
+        row
+        for chunk in recurring.batches(seasons)
+        for row in model.objects.filter(
+            element__in=chunk,
+            effective_to__isnull=True
+        )
+    )
+    for row in rows:
+        values = dict(
+            (field.attname, getattr(row, field.attname))
+            for field in model._meta.fields
+            if not field.primary_key
+        )
+        values['element_id'] = new_seasons[show_of[row.element_id]].pk
+        copies.append(model(**values))
+    for chunk in recurring.batches(copies):
+        model.objects.bulk_create(chunk)
@@ -0,0 +1,205 @@
+"""A schedule builder backend serving schedules from snapshot files.
+
+The snapshot_schedule management command writes out each week's schedule, as
+built by range_builder, to a JSON file in SCHEDULE_SNAPSHOT_DIR.  The builder
+returned by builder() then builds week and day schedules from those files
+alone, so a site with SCHEDULE_BUILDER set to 'snapshot' (for example, a
+read-only replica or a static mirror) can serve the schedule views without
+loading the database.
+
+Snapshots hold what the schedule needs to be laid out: each timeslot's ID,
+times, season, show and term IDs, title, block and show type.  Anything else
+on a timeslot (for example, its show's other metadata) is looked up lazily
+from the database as normal.
+"""
+
+import datetime
+import json
+import os
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .. import models
+from . import archive, memo, metadata
+from .object import slice_data
+
+
+VERSION = 1
+
+
+###############################################################################
+# Writing
+
+def write(schedule, variant):
+    """Writes a week schedule's data to its snapshot file.
+
+    Args:
+        schedule: the WeekSchedule to write; its data is built if needed.
+        variant: the schedule variant, for example 'public' or 'private'.
+
+    Returns:
+        the path of the file written.
+    """
+    result = path(variant, schedule.start)
+    temporary = result + '.tmp'
+    with open(temporary, 'wb') as out:
+        json.dump(
+            dump(schedule.data),
+            out,
+            cls=DjangoJSONEncoder,
+            separators=(',', ':')
+        )
+    os.rename(temporary, result)
+    return result
+
+
+def dump(data):
+    """Converts schedule data to a JSON-ready dictionary.
+
+    Args:
+        data: the schedule data, as returned by range_builder.
+
+    Returns:
+        a dictionary holding either the timeslots, with the blocks and show
+        types they refer to, or the excuse for there being none.
+    """
+    if isinstance(data, basestring):
+        return {'version': VERSION, 'status': data}
+
+    metadata.prefetch_timeslots(data, keys=('title',))
+    blocks = {}
+    show_types = {}
+    slots = []
+    for slot in data:
+        slot_block = getattr(slot, 'block', None)
+        if slot_block:
+            blocks[slot_block.pk] = fields(slot_block)
+        show_types[slot.show_type.pk] = fields(slot.show_type)
+        slots.append({
+            'id': slot.pk,
+            'start': archive.epoch(slot.start_time),
+            'duration': int(slot.duration.total_seconds()),
+            'season': slot.season_id,
+            'show': slot.season.show_id,
+            'term': slot.season.term_id,
+            'show_type': slot.show_type.pk,
+            'block': slot_block.pk if slot_block else None,
+            'title': getattr(slot, 'title', None),
+        })
+    return {
+        'version': VERSION,
+        'slots': slots,
+        'blocks': blocks,
+        'show_types': show_types,
+    }
+
+
+def fields(instance):
+    """Returns the field values of a model instance, by attribute name."""
+    return dict(
+        (field.attname, getattr(instance, field.attname))
+        for field in instance._meta.fields
+    )
+
+
+###############################################################################
+# Reading
+
+def builder(variant):
+    """Makes a schedule builder that reads schedules from snapshots.
+
+    Schedules are read from the snapshot of the week they start in, and are
+    cut down to the schedule's range, so day schedules come from their
+    weeks' snapshots.
+
+    Args:
+        variant: the schedule variant, for example 'public' or 'private'.
+
+    Returns:
+        a schedule builder function, which returns 'empty' for weeks with no
+        snapshot.
+    """
+    def f(schedule):
+        data = memo.memoise(
+            ('snapshot', variant, week_of(schedule.start)),
+            lambda: read(path(variant, schedule.start))
+        )
+        if not isinstance(data, basestring):
+            data = slice_data(data, schedule.start, schedule.end)
+        return data
+
+    return f
+
+
+def read(filename):
+    """Reads a snapshot file back into schedule data.
+
+    Returns:
+        the schedule data, as range_builder would return it; or 'empty' if
+        there is no such snapshot.
+    """
+    try:
+        with open(filename, 'rb') as f:
+            snapshot = json.load(f)
+    except IOError:
+        return 'empty'
+    return load(snapshot)
+
+
+def load(snapshot):
+    """Converts a dictionary made by dump back into schedule data.
+
+    The timeslots, seasons, blocks and show types are unsaved model
+    instances made from the snapshot, so making them runs no queries.
+    """
+    if snapshot.get('version') != VERSION:
+        return 'empty'
+    if 'status' in snapshot:
+        return snapshot['status']
+
+    blocks = dict(
+        (int(pk), models.Block(**values))
+        for pk, values in snapshot['blocks'].iteritems()
+    )
+    show_types = dict(
+        (int(pk), models.ShowType(**values))
+        for pk, values in snapshot['show_types'].iteritems()
+    )
+    slots = []
+    for row in snapshot['slots']:
+        slot = models.Timeslot(
+            id=row['id'],
+            season=models.Season(
+                id=row['season'],
+                show_id=row['show'],
+                term_id=row['term']
+            ),
+            start_time=archive.from_epoch(row['start']),
+            duration=datetime.timedelta(seconds=row['duration'])
+        )
+        slot._show_type = show_types[row['show_type']]
+        if row['block'] is not None:
+            slot.block = blocks[row['block']]
+        if row['title'] is not None:
+            slot.title = row['title']
+        slots.append(slot)
+    return slots
+
+
+###############################################################################
+# Utilities
+
+def week_of(date):
+    """Returns the local date of the Monday of the week containing date."""
+    local = timezone.localtime(date).date()
+    return local - datetime.timedelta(days=local.weekday())
+
+
+def path(variant, date):
+    """Returns the path of the snapshot of the week containing date."""
+    return os.path.join(
+        settings.SCHEDULE_SNAPSHOT_DIR,
+        '{}-{}.json'.format(variant, week_of(date).isoformat())
+    )
@@ -0,0 +1,368 @@
+"""Generation of synthetic schedule data.
+
+The fixtures used by the unit tests are deliberately tiny, which makes them no
+use for measuring how the schedule system copes with real amounts of data.
+This module fills the database with a schedule that looks roughly like the
+real thing: terms separated by holidays, titled shows with a season per term
+and one weekly timeslot per season (with the odd week missed), collapsible
+sustainer programming overnight, private demos overlapping the public
+schedule, and schedule blocks matched by time range and by show.
+
+Everything is generated from a seeded random number generator, so the same
+arguments always give the same schedule.
+"""
+
+import datetime
+import random
+
+from . import nltime
+from . import range as r
+from .. import models
+
+
+# Shape of the academic year.
+TERM_WEEKS = 10
+HOLIDAY_WEEKS = 4
+
+# Hours of the day between which public shows are scheduled, and between which
+# the collapsible sustainer is.
+SHOW_HOURS = (7, 24)
+SUSTAINER_HOURS = (1, 7)
+
+# Proportion of weeks in which a show misses its slot, leaving a gap.
+GAP_CHANCE = 0.1
+
+# Number of private demos per week.
+DEMOS_PER_WEEK = 5
+
+# Number of objects to bulk-create at once (SQLite limits query parameters).
+BATCH_SIZE = 100
+
+# Block tags, with the local-time ranges (in hours) matched to them.
+BLOCK_RANGES = (
+    ('overnight', 0, 7),
+    ('breakfast', 7, 10),
+    ('daytime', 10, 19),
+    ('evening', 19, 24),
+)
+
+# Block tag that some shows are directly matched to, by show rule.
+SHOW_RULE_BLOCK = 'specialist'
+SHOW_RULE_CHANCE = 0.2
+
+
+def generate(creator, start, weeks, shows=60, seed=0):
+    """Fills the database with a synthetic schedule.
+
+    Args:
+        creator: the Person to credit as creator of everything generated.
+        start: an aware datetime, ideally a Monday midnight in local time,
+            from which the schedule starts.
+        weeks: the number of weeks the schedule (including holidays) spans.
+        shows: the number of public shows to create.
+        seed: the seed for the random number generator.
+
+    Returns:
+        a dictionary of counts of the objects generated, keyed by their
+        plural names.
+    """
+    rng = random.Random(seed)
+
+    types = make_show_types()
+    make_filler_show(creator, types['filler'], start)
+    blocks = make_blocks()
+    terms = make_terms(start, weeks)
+
+    public_shows = make_shows(creator, types['regular'], start, shows)
+    sustainer = make_shows(creator, types['sustainer'], start, 1)[0]
+    demo = make_shows(creator, types['demo'], start, 1)[0]
+    show_rules = make_show_rules(rng, blocks[SHOW_RULE_BLOCK], public_shows)
+
+    timeslots = 0
+    for term in terms:
+        slots = term_timeslots(
+            rng,
+            creator,
+            term,
+            public_shows,
+            sustainer,
+            demo
+        )
+        bulk_create(models.Timeslot, slots)
+        timeslots += len(slots)
+
+    return {
+        'terms': len(terms),
+        'shows': len(public_shows) + 2,
+        'blocks': len(blocks),
+        'show_rules': show_rules,
+        'timeslots': timeslots,
+    }
+
+
+###############################################################################
+# Registries
+
+def make_show_types():
+    """Creates (or finds) the show types used by the synthetic schedule.
+
+    Returns:
+        a dictionary of ShowTypes, keyed by 'filler', 'regular', 'sustainer'
+        and 'demo'.
+    """
+    specs = {
+        'filler': dict(
+            name='Filler',
+            public=True,
+            has_showdb_entry=False,
+            is_collapsible=True
+        ),
+        'regular': dict(name='Regular', public=True),
+        'sustainer': dict(
+            name='Sustainer',
+            public=True,
+            has_showdb_entry=False,
+            is_collapsible=True
+        ),
+        'demo': dict(name='Demo', public=False, has_showdb_entry=False),
+    }
+    types = {}
+    for key, spec in specs.iteritems():
+        name = spec.pop('name')
+        types[key] = models.ShowType.objects.get_or_create(
+            name=name,
+            defaults=spec
+        )[0]
+    return types
+
+
+def make_filler_show(creator, filler_type, start):
+    """Makes sure that there is exactly one filler show."""
+    if not models.Show.objects.filter(show_type=filler_type).exists():
+        make_shows(creator, filler_type, start, 1)
+
+
+def make_blocks():
+    """Creates the blocks, and block range rules, for the schedule.
+
+    Returns:
+        a dictionary of Blocks, keyed by tag.
+    """
+    blocks = {}
+    tags = [tag for tag, _, _ in BLOCK_RANGES] + [SHOW_RULE_BLOCK]
+    for priority, tag in enumerate(tags):
+        blocks[tag] = models.Block.objects.create(
+            name=tag.title(),
+            tag=tag,
+            priority=priority,
+            is_listable=True
+        )
+    for tag, start_hour, end_hour in BLOCK_RANGES:
+        models.BlockRangeRule.objects.create(
+            block=blocks[tag],
+            start_time=datetime.timedelta(hours=start_hour),
+            end_time=datetime.timedelta(hours=end_hour)
+        )
+    return blocks
+
+
+def make_terms(start, weeks):
+    """Creates terms, separated by holidays, covering the given weeks.
+
+    Returns:
+        a list of Terms in chronological order.
+    """
+    terms = []
+    names = ('Autumn', 'Spring', 'Summer')
+    week = 0
+    while week < weeks:
+        length = min(TERM_WEEKS, weeks - week)
+        term_start = r.dst_add(start, datetime.timedelta(weeks=week))
+        terms.append(
+            models.Term.objects.create(
+                name=names[len(terms) % len(names)],
+                start_date=term_start,
+                end_date=r.dst_add(
+                    term_start,
+                    datetime.timedelta(weeks=length)
+                )
+            )
+        )
+        week += TERM_WEEKS + HOLIDAY_WEEKS
+    return terms
+
+
+def make_shows(creator, show_type, start, count):
+    """Creates count shows of the given type, each with a title.
+
+    Returns:
+        a list of the new Shows.
+    """
+    shows = [
+        models.Show.objects.create(
+            show_type=show_type,
+            creator=creator,
+            date_submitted=start
+        )
+        for _ in xrange(count)
+    ]
+    # The key model belongs to the metadata app, so find it through the key.
+    key_model = models.ShowTextMetadata._meta.get_field('key').rel.to
+    title, _ = key_model.objects.get_or_create(name='title')
+    bulk_create(
+        models.ShowTextMetadata,
+        [
+            models.ShowTextMetadata(
+                element=show,
+                key=title,
+                value=u'{} {}'.format(show_type.name, show.pk),
+                effective_from=start,
+                creator=creator,
+                approver=creator
+            )
+            for show in shows
+        ]
+    )
+    return shows
+
+
+def make_show_rules(rng, block, shows):
+    """Binds some of the given shows directly to block.
+
+    Returns:
+        the number of rules created.
+    """
+    ruled = [show for show in shows if rng.random() < SHOW_RULE_CHANCE]
+    bulk_create(
+        models.BlockShowRule,
+        [models.BlockShowRule(block=block, show=show) for show in ruled]
+    )
+    return len(ruled)
+
+
+###############################################################################
+# Timeslots
+
+def term_timeslots(rng, creator, term, shows, sustainer, demo):
+    """Creates seasons for a term and returns (unsaved) timeslots for them.
+
+    Public shows get one weekly slot each, on a weekday and hour that does
+    not clash with any other public show.  The sustainer fills some of the
+    overnight hours, and demos are dotted about at random, clashing with
+    whatever they like.
+
+    Returns:
+        a list of unsaved Timeslots.
+    """
+    slots = []
+    taken = set()
+
+    def season(show):
+        return models.Season.objects.create(
+            show=show,
+            term=term,
+            creator=creator,
+            date_submitted=term.start_date
+        )
+
+    for show in shows:
+        placement = place(rng, taken, *SHOW_HOURS)
+        if placement:
+            slots.extend(
+                weekly(rng, creator, season(show), term, *placement)
+            )
+
+    sustainer_season = season(sustainer)
+    for day in xrange(7):
+        placement = place(rng, taken, *SUSTAINER_HOURS, day=day)
+        if placement:
+            slots.extend(
+                weekly(rng, creator, sustainer_season, term, *placement)
+            )
+
+    demo_season = season(demo)
+    weeks = (term.end_date - term.start_date).days // 7
+    for week in xrange(weeks):
+        for _ in xrange(DEMOS_PER_WEEK):
+            slots.append(
+                timeslot(
+                    creator,
+                    demo_season,
+                    term,
+                    week,
+                    rng.randrange(7),
+                    rng.randrange(*SHOW_HOURS),
+                    1
+                )
+            )
+    return [slot for slot in slots if slot is not None]
+
+
+def place(rng, taken, first_hour, last_hour, day=None, tries=20):
+    """Finds a free weekly slot, and marks it as taken.
+
+    Args:
+        rng: the random number generator.
+        taken: the set of (day, hour) pairs already taken; this is updated.
+        first_hour: the earliest hour the slot may start on.
+        last_hour: the hour by which the slot must have ended.
+        day: if given, the day of the week to place the slot on.
+        tries: the number of random placements to try before giving up.
+
+    Returns:
+        a tuple of the day of the week, hour and duration in hours of the
+        slot, or None if none could be found.
+    """
+    for _ in xrange(tries):
+        slot_day = rng.randrange(7) if day is None else day
+        hours = rng.choice((1, 1, 2, 3))
+        hour = rng.randrange(first_hour, last_hour - hours + 1)
+        wanted = set((slot_day, h) for h in xrange(hour, hour + hours))
+        if not wanted & taken:
+            taken |= wanted
+            return slot_day, hour, hours
+    return None
+
+
+def weekly(rng, creator, season, term, day, hour, hours):
+    """Returns unsaved timeslots for a season, at the same time every week.
+
+    Some weeks are randomly skipped, leaving gaps for the filler, as are
+    any weeks in which the local time is skipped by a DST change.
+    """
+    weeks = (term.end_date - term.start_date).days // 7
+    slots = [
+        timeslot(creator, season, term, week, day, hour, hours)
+        for week in xrange(weeks)
+        if rng.random() >= GAP_CHANCE
+    ]
+    return [slot for slot in slots if slot is not None]
+
+
+def timeslot(creator, season, term, week, day, hour, hours):
+    """Returns an unsaved timeslot at the given local time in a term.
+
+    A local time repeated when the clocks go back is taken as the first of
+    the two; one skipped when they go forward gives None instead.
+    """
+    start = nltime.un_nld_once(
+        nltime.nld(term.start_date)
+        + datetime.timedelta(weeks=week, days=day, hours=hour)
+    )
+    if start is None:
+        return None
+    return models.Timeslot(
+        season=season,
+        creator=creator,
+        start_time=start,
+        duration=datetime.timedelta(hours=hours)
+    )
+
+
+###############################################################################
+# Utilities
+
+def bulk_create(model, objects):
+    """Saves objects to the database in batches of BATCH_SIZE."""
+    for i in xrange(0, len(objects), BATCH_SIZE):
+        model.objects.bulk_create(objects[i:i + BATCH_SIZE])
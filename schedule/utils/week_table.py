@@ -3,6 +3,9 @@
 You will probably want 'tabulate' specifically.
 """
 
+import bisect
+import heapq
+
 from django.utils import timezone
 
 from .. import utils
@@ -29,17 +32,22 @@ SCHEDULE_TIME_COL = 0
 ###############################################################################
 # Public interface
 
-def tabulate(schedule):
+def tabulate(schedule, lanes=False):
     """Takes a list of slots and converts it into a week schedule table.
 
     Args:
         schedule: the (Week)Schedule to pull data from.
+        lanes: if True, slots may overlap (as in schedules including private
+            shows), and each day is split into as many lanes as it needs for
+            no two slots in one lane to overlap.
 
     Returns:
         a list of schedule rows; each row begins with the row start and
         duration, then consists of tuples of shows active during that row, and
         the number of rows they span.  Duplicated entries (those that carry on
         from the previous row) are marked with None.
+        If lanes is True, each day's entry in a row is instead a list of such
+        tuples (or Nones), one per lane of that day.
     """
     data = schedule.data
     if isinstance(data, basestring):
@@ -49,7 +57,10 @@ def tabulate(schedule):
         nlstart = nltime.nld(schedule.start)
         data_lists, partitions = split_days(nlstart, schedule.data)
         table = empty_table(nlstart, partitions, len(data_lists))
-        populate_table(table, data_lists)
+        if lanes:
+            populate_table_lanes(table, data_lists)
+        else:
+            populate_table(table, data_lists)
     return table
 
 
@@ -167,11 +178,12 @@ def rotate_day(day_end, day_list, done_day_lists):
 
     done_day_lists.append(day_list)
 
-    # We need to see if the last show we processed straddles the boundary
-    # between the two days and, if so, make sure it appears at the start of the
-    # new list too.
-    last_show = day_list[-1]
-    return [last_show] if nltime.nld(last_show.end_time) > day_end else []
+    # We need to see if any shows we processed straddle the boundary between
+    # the two days and, if so, make sure they appear at the start of the new
+    # list too.  Without overlaps, only the last show can.
+    return [
+        slot for slot in day_list if nltime.nld(slot.end_time) > day_end
+    ]
 
 
 # 2. Empty table generation #
@@ -265,6 +277,89 @@ def populate_table_day(row_date, add_to_table, day):
         add_to_table(start_row, slot, current_row - start_row)
 
 
+def populate_table_lanes(table, data_lists):
+    """Populates empty schedule tables with data from lists of possibly
+    overlapping slots, splitting each day into lanes.
+
+    Args:
+        table: the empty table (generally created by empty_table) to populate
+            with schedule data; this is mutated in-place.
+        data_lists: a list of lists, each representing one day of timeslots
+            in order of start time.
+
+    Returns:
+        the populated table.
+    """
+    for i, day in enumerate(data_lists):
+        populate_table_day_lanes(table, i, day)
+    return table
+
+
+def populate_table_day_lanes(table, days, day):
+    """Adds a day of possibly overlapping slots into the table, in lanes.
+
+    Unlike populate_table_day, this does not need the slots to follow on
+    from each other: each slot's rows are found by binary search on the row
+    start times.
+
+    Args:
+        table: the schedule table to add the slots into.
+        days: the number of days since the start of the schedule.
+        day: the day's timeslots, in order of start time.
+    """
+    row_date = make_row_date(table, days)
+    dates = [row_date(row) for row in xrange(len(table))]
+    lanes, count = assign_lanes(day)
+
+    col = SCHEDULE_DAY_OFFSET + days
+    for row in table:
+        row[col] = [None] * count
+    for slot, lane in zip(day, lanes):
+        # Slots carried over from the day before start on the first row.
+        start_row = max(
+            bisect.bisect_right(dates, nltime.nld(slot.start_time)) - 1,
+            0
+        )
+        end_row = bisect.bisect_left(dates, nltime.nld(slot.end_time))
+        if end_row > start_row:
+            table[start_row][col][lane] = slot, end_row - start_row
+
+
+def assign_lanes(slots):
+    """Assigns slots to lanes such that no two slots in a lane overlap,
+    using as few lanes as possible.
+
+    This colours the slots' interval graph greedily in order of start time,
+    which is optimal for interval graphs: a heap of the slots still running
+    gives the lanes freed by each slot's start, and a heap of free lanes
+    gives the lowest one to reuse, so this takes O(n log n) time.
+
+    Args:
+        slots: the timeslots.
+
+    Returns:
+        a tuple of the list of the lanes (from 0) of the slots, in the same
+        order as slots, and the number of lanes used (at least 1).
+    """
+    lanes = [0] * len(slots)
+    count = 0
+    running = []
+    free = []
+    order = sorted(xrange(len(slots)), key=lambda i: slots[i].start_time)
+    for i in order:
+        slot = slots[i]
+        while running and running[0][0] <= slot.start_time:
+            heapq.heappush(free, heapq.heappop(running)[1])
+        if free:
+            lane = heapq.heappop(free)
+        else:
+            lane = count
+            count += 1
+        heapq.heappush(running, (slot.end_time, lane))
+        lanes[i] = lane
+    return lanes, max(count, 1)
+
+
 ###############################################################################
 # Higher-order functions
 
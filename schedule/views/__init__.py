@@ -9,6 +9,9 @@ schedule_week = schedule_week
 from schedule.views.header import header
 header = header
 
+from schedule.views.showdb import show_index, show_detail
+show_index, show_detail = show_index, show_detail
+
 from schedule.views.showdb import season_detail
 season_detail = season_detail
 
@@ -17,3 +20,18 @@ timeslot_detail = timeslot_detail
 
 from schedule.views.home import home_schedule
 home_schedule = home_schedule
+
+from schedule.views.ical import schedule_ical, show_ical
+schedule_ical, show_ical = schedule_ical, show_ical
+
+from schedule.views.api import schedule_day_json, schedule_week_json
+schedule_day_json, schedule_week_json = schedule_day_json, schedule_week_json
+
+from schedule.views.export import schedule_export
+schedule_export = schedule_export
+
+from schedule.views.clash import presenter_clashes_json
+presenter_clashes_json = presenter_clashes_json
+
+from schedule.views.analytics import term_analytics_json
+term_analytics_json = term_analytics_json
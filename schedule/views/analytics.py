@@ -0,0 +1,42 @@
+"""Staff views for schedule analytics."""
+
+import json
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+
+from ..models import Term
+from ..utils import analytics
+
+
+## VIEWS
+## Only actual views as referenced by URLconf should go here.
+## Remember to add them to __init__.py!
+
+@staff_member_required
+def term_analytics_json(request, term_id):
+    """Reports a term's block airtime, filler share and heatmap of live
+    programming, as JSON.
+
+    See analytics.summarise for the format.  Responds with 501 Not
+    Implemented if NumPy is not installed.
+
+    Args:
+        request: the HTTP request this view is responding to.
+        term_id: the ID of the term.
+    """
+    term = get_object_or_404(Term, pk=term_id)
+    try:
+        summary = analytics.summarise(term)
+    except ImproperlyConfigured as error:
+        return HttpResponse(
+            unicode(error),
+            content_type='text/plain',
+            status=501
+        )
+    return HttpResponse(
+        json.dumps(summary, separators=(',', ':')),
+        content_type='application/json'
+    )
@@ -0,0 +1,202 @@
+"""Views providing week and day schedules as compact JSON.
+
+These are built from the same Schedule objects as the HTML schedule views, and
+are meant for programs (the mobile app, playout integration and so on) rather
+than people.  Each timeslot is sent as an array, in the order given by FIELDS:
+
+id - the timeslot ID, or null for filler;
+start - the start time, in seconds since the Unix epoch;
+duration - the duration, in seconds;
+show - the show ID;
+block - the tag of the timeslot's schedule block, or null;
+title - the timeslot's title.
+
+Responses carry the schedule revision (see TimeslotChange).  Given a
+since=REVISION parameter, only the timeslots in the schedule created or
+changed after that revision are sent, along with the IDs of any that were in
+the schedule as of that revision but have since been deleted or moved out of
+it, so that clients can poll cheaply.  Gaps left between timeslots are
+filler.  If the revision is unknown, or too many changes have been made
+since, the whole schedule is sent instead, with 'reload' set to true.
+
+As with the HTML views, show_private=true includes private shows.
+"""
+
+import calendar
+import json
+
+from django.http import HttpResponse, HttpResponseBadRequest
+
+from lass_utils import view_decorators
+
+from . import common
+from ..models import TimeslotChange
+from ..utils import block, metadata
+
+
+FIELDS = ('id', 'start', 'duration', 'show', 'block', 'title')
+
+# The number of changes since a client's revision beyond which the client is
+# sent the whole schedule rather than the changes.
+MAX_CHANGES = 1000
+
+
+## VIEWS
+## Only actual views as referenced by URLconf should go here.
+## Remember to add them to __init__.py!
+
+@view_decorators.date_normalise
+def schedule_week_json(request, start):
+    """A view outputting a weekly schedule as JSON.
+
+    Args:
+        request: the HTTP request this view is responding to
+        start: a date representing the start of the week schedule.
+    """
+    return schedule_json(request, 'week', start)
+
+
+@view_decorators.date_normalise
+def schedule_day_json(request, start):
+    """A view outputting a daily schedule as JSON.
+
+    Args:
+        request: the HTTP request this view is responding to
+        start: a date representing the start of the day schedule.
+    """
+    return schedule_json(request, 'day', start)
+
+
+## SUPPORTING FUNCTIONS
+##
+## Please DON'T export these through __init__.py
+## Only export the actual views that are reachable through URLconf
+## Thanks!
+
+def schedule_json(request, type, start, backend=None):
+    """Renders a schedule as JSON.
+
+    Args:
+        request: the HTTP request to respond to.
+        type: the type of schedule, 'week' or 'day'.
+        start: the start date, which may be modified to fit the schedule type.
+        backend: if given, the schedule builder backend to use instead of
+            the SCHEDULE_BUILDER setting; see common.variant_builder.
+    """
+    try:
+        since = (
+            int(request.GET['since']) if 'since' in request.GET else None
+        )
+    except ValueError:
+        return HttpResponseBadRequest('since must be a revision number.')
+
+    variant = (
+        'private'
+        if request.GET.get('show_private', 'false').lower() == 'true'
+        else 'public'
+    )
+    timeslots = common.variant_timeslots(variant)
+    # Read the revision first, so that nothing changed while building is
+    # missed by the client's next poll.
+    revision = TimeslotChange.latest_revision()
+
+    schedule = common.SCHED_CONSTRUCTORS[type](
+        common.ury_start_on_date(start),
+        common.variant_builder(variant, backend)
+    )
+    result = {
+        'type': type,
+        'start': epoch(schedule.start),
+        'end': epoch(schedule.end),
+        'revision': revision,
+        'fields': FIELDS,
+    }
+
+    if since is not None and too_old(since, revision):
+        result['reload'] = True
+        since = None
+
+    if since is None:
+        data = schedule.data
+        if isinstance(data, basestring):
+            # An excuse for there being no schedule, such as 'not_in_term'.
+            result['status'] = data
+            slots = []
+        else:
+            slots = data
+    else:
+        result['since'] = since
+        slots, result['deleted'] = changed_slots(schedule, timeslots, since)
+
+    metadata.prefetch_timeslots(slots, keys=('title',))
+    result['slots'] = [row(slot) for slot in slots]
+
+    return HttpResponse(
+        json.dumps(result, separators=(',', ':')),
+        content_type='application/json'
+    )
+
+
+def too_old(since, revision):
+    """Returns whether a client's revision is too far from the current one
+    to send changes since it.
+    """
+    return (
+        not 0 <= since <= revision
+        or TimeslotChange.objects.filter(id__gt=since).count() > MAX_CHANGES
+    )
+
+
+def changed_slots(schedule, timeslots, since):
+    """Finds the changes to a schedule since a revision.
+
+    Both the changed timeslots and the gone ones are found with subqueries
+    limited to the schedule's range, however many changes were made
+    elsewhere in the schedule.
+
+    Args:
+        schedule: the Schedule being looked at.
+        timeslots: the Timeslot QuerySet the schedule is built from.
+        since: the revision the client last saw.
+
+    Returns:
+        a tuple of the list of block-annotated timeslots in the schedule
+        that were created or changed since the revision, and the sorted list
+        of IDs of timeslots that were in the range of the schedule as of the
+        revision but have since been deleted or moved out of it.
+    """
+    changes = TimeslotChange.objects.filter(id__gt=since).values(
+        'timeslot_id'
+    )
+    slots = block.annotate(
+        list(
+            timeslots.filter(pk__in=changes).select_related().in_range(
+                schedule.start,
+                schedule.end
+            )
+        )
+    )
+    gone = TimeslotChange.previously_in_range(
+        since,
+        schedule.start,
+        schedule.end
+    ) - set(slot.pk for slot in slots)
+    return slots, sorted(gone)
+
+
+def row(slot):
+    """Converts a timeslot to its compact JSON array form."""
+    slot_block = getattr(slot, 'block', None)
+    return [
+        slot.pk,
+        epoch(slot.start_time),
+        int(slot.duration.total_seconds()),
+        slot.season.show_id,
+        slot_block.tag if slot_block else None,
+        getattr(slot, 'title', None),
+    ]
+
+
+def epoch(date):
+    """Converts an aware datetime to seconds since the Unix epoch."""
+    return calendar.timegm(date.utctimetuple())
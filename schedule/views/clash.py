@@ -0,0 +1,88 @@
+"""Staff views for checking proposed timeslots for clashes.
+
+These are for scheduling tools to call as timeslots are placed, so they
+answer in JSON, in a single query.
+"""
+
+import datetime
+import json
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.utils import timezone
+
+try:
+    from pytz import AmbiguousTimeError, NonExistentTimeError
+except ImportError:
+    # Without pytz, make_aware can't tell that a local time is invalid.
+    AmbiguousTimeError = NonExistentTimeError = None
+
+from ..utils import clash
+from .api import epoch
+
+# Errors make_aware raises for local times that happen twice, or not at all,
+# around DST changes.
+INVALID_TIME_ERRORS = tuple(
+    error for error in (AmbiguousTimeError, NonExistentTimeError) if error
+)
+
+
+## VIEWS
+## Only actual views as referenced by URLconf should go here.
+## Remember to add them to __init__.py!
+
+@staff_member_required
+def presenter_clashes_json(request):
+    """Lists the people who would be double-booked by a proposed timeslot.
+
+    This takes the following GET parameters:
+
+    show - the ID of the show the timeslot is for;
+    start - the start of the timeslot, as local YYYY-MM-DDTHH:MM, which
+            must happen exactly once (not be skipped or repeated by a DST
+            change);
+    duration - the duration of the timeslot, in minutes, which must be
+               positive;
+    exclude - optionally, the ID of a timeslot to ignore (such as the one
+              being moved).
+
+    The response is a JSON object whose 'clashes' member is a list of
+    [person ID, timeslot ID, start, end] arrays, with times in seconds since
+    the Unix epoch.
+
+    Args:
+        request: the HTTP request this view is responding to.
+    """
+    try:
+        show = int(request.GET['show'])
+        start = timezone.make_aware(
+            datetime.datetime.strptime(request.GET['start'], '%Y-%m-%dT%H:%M'),
+            timezone.get_current_timezone()
+        )
+        duration = datetime.timedelta(minutes=int(request.GET['duration']))
+        exclude = (
+            int(request.GET['exclude']) if 'exclude' in request.GET else None
+        )
+    except (KeyError, ValueError):
+        return HttpResponseBadRequest(
+            'Give show, start (YYYY-MM-DDTHH:MM) and duration (minutes).'
+        )
+    except INVALID_TIME_ERRORS:
+        return HttpResponseBadRequest(
+            'start is skipped or repeated by a DST change; give a time that'
+            ' happens exactly once.'
+        )
+    if duration <= datetime.timedelta(0):
+        return HttpResponseBadRequest('duration must be positive.')
+
+    clashes = clash.presenter_clashes(show, start, duration, exclude)
+    return HttpResponse(
+        json.dumps({
+            'clashes': [
+                [person, booking.timeslot, epoch(booking.start),
+                 epoch(booking.end)]
+                for person, booking in clashes
+            ]
+        }, separators=(',', ':')),
+        content_type='application/json'
+    )
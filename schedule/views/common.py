@@ -6,10 +6,14 @@ Common functions for schedule views.
 import datetime
 
 from django import shortcuts
+from django.conf import settings
 from django.utils import timezone
 
 from ..models import Timeslot
+from ..utils import instrument
 from ..utils import object
+from ..utils import profiling
+from ..utils import snapshot
 
 # Changing this will change the starting time of the schedule
 # views.
@@ -39,13 +43,92 @@ def ury_start_on_date(date):
     )
 
 
-def schedule_view(request, type, start):
+def variant_timeslots(variant):
+    """Returns the Timeslot QuerySet that schedules are built from.
+
+    Args:
+        variant: 'private' to include private shows, or 'public' to hide them.
+
+    Returns:
+        a Timeslot QuerySet.
+    """
+    to = Timeslot.objects
+    return to.all() if variant == 'private' else to.public()
+
+
+def database_builder(variant):
+    """Makes a cached builder building schedules from the database.
+
+    Args:
+        variant: 'private' to include private shows, or 'public' to hide them.
+
+    Returns:
+        a schedule builder function.
+    """
+    timeslots = variant_timeslots(variant)
+    return object.cached_builder(
+        lambda s: object.range_builder(s, timeslots, variant),
+        variant
+    )
+
+
+def plain_builder(variant):
+    """Makes a builder building schedules from the database, without the
+    cache.
+
+    This is for commands building many schedules once each, which would
+    only fill the cache with schedules nobody else asks for.
+
+    Args:
+        variant: 'private' to include private shows, or 'public' to hide them.
+
+    Returns:
+        a schedule builder function.
+    """
+    timeslots = variant_timeslots(variant)
+    return lambda s: object.range_builder(s, timeslots, variant)
+
+
+# Jump table of SCHEDULE_BUILDER settings to functions that, given a variant,
+# make schedule builders.
+BUILDERS = {
+    'database': database_builder,
+    'plain': plain_builder,
+    'snapshot': snapshot.builder,
+}
+
+
+def builder_setting():
+    """Returns the name of the schedule builder backend in use."""
+    return getattr(settings, 'SCHEDULE_BUILDER', 'database')
+
+
+def variant_builder(variant, backend=None):
+    """Returns the schedule builder for a variant, using the backend chosen
+    by the SCHEDULE_BUILDER setting ('database', the default, 'plain' or
+    'snapshot').
+
+    Args:
+        variant: 'private' to include private shows, or 'public' to hide them.
+        backend: if given, the backend to use instead of the setting.
+
+    Returns:
+        a schedule builder function.
+    """
+    return BUILDERS[backend or builder_setting()](variant)
+
+
+@profiling.profiled(lambda request, type, start, **kwargs: [type, start])
+def schedule_view(request, type, start, backend=None):
     """Renders a view of the given schedule.
 
     This function passes the schedule file to the template:
 
     inner_view - the name of the view to call to render the schedule
                  proper
+    lanes - True if the schedule includes private shows, which may
+            overlap, and so are tabulated in lanes (schedule.tabulate
+            does this itself for such schedules)
 
     It also takes the following GET parameters:
 
@@ -62,11 +145,14 @@ def schedule_view(request, type, start):
             'week' and 'day'.
         start: the start date or datetime, which may be modified to fit the
             schedule type.
+        backend: if given, the schedule builder backend to use instead of
+            the SCHEDULE_BUILDER setting; see variant_builder.
 
     Returns:
         None
     """
     start = ury_start_on_date(start)
+    backend = backend or builder_setting()
 
     # Check for query string information
     show_private = (
@@ -76,21 +162,31 @@ def schedule_view(request, type, start):
         request.GET.get('iframe', 'false').lower() == 'true'
     )
 
-    to = Timeslot.objects
-    timeslots = (to.all() if show_private else to.public())
+    variant = 'private' if show_private else 'public'
 
-    ctx = {}
+    ctx = {'lanes': show_private}
 
     sched = SCHED_CONSTRUCTORS[type.lower()]
     ctx['schedule'] = sched(
         start,
-        lambda s: object.range_builder(s, timeslots)
+        variant_builder(variant, backend),
+        lanes=show_private
     )
 
-    return shortcuts.render(
-        request,
-        'schedule/schedule-{}.html'.format(
-            'iframe' if iframe else 'base'
-        ),
-        ctx
-    )
+    # Snapshots are already built, so there is nothing to warm.
+    if (getattr(settings, 'SCHEDULE_WARM_ADJACENT', False)
+            and backend == 'database'):
+        object.warm_adjacent(
+            ctx['schedule'],
+            variant,
+            variant_timeslots(variant)
+        )
+
+    with instrument.phase('render', type=type, start=start):
+        return shortcuts.render(
+            request,
+            'schedule/schedule-{}.html'.format(
+                'iframe' if iframe else 'base'
+            ),
+            ctx
+        )
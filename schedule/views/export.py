@@ -0,0 +1,55 @@
+"""Staff view for bulk exports of timeslots, for reporting.
+
+See schedule.utils.export for how exports are put together.
+"""
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, HttpResponseBadRequest
+
+from ..utils import export
+
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+## VIEWS
+## Only actual views as referenced by URLconf should go here.
+## Remember to add them to __init__.py!
+
+@staff_member_required
+def schedule_export(request):
+    """A streamed export of the timeslots in a term or date range.
+
+    This takes the following GET parameters:
+
+    term - the ID of the term to export; or
+    start, end - the first date to export and the date to export up to
+                 (exclusive), as YYYY-MM-DD;
+    format - csv (the default) or jsonl.
+
+    Args:
+        request: the HTTP request this view is responding to.
+    """
+    format = request.GET.get('format', 'csv')
+    if format not in export.FORMATS:
+        return HttpResponseBadRequest('Unknown export format.')
+    try:
+        timeslots = export.select(
+            request.GET.get('term'),
+            request.GET.get('start'),
+            request.GET.get('end')
+        )
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+
+    response = HttpResponse(
+        export.lines(timeslots, format),
+        content_type=CONTENT_TYPES[format]
+    )
+    response['Content-Disposition'] = (
+        'attachment; filename=schedule.{}'.format(format)
+    )
+    return response
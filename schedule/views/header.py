@@ -1,7 +1,7 @@
 """The view used to create the schedule overview in the site's header.
 """
 
-from django.shortcuts import render
+from django import shortcuts
 
 
 def header(request, block_id=None):
@@ -9,7 +9,7 @@ def header(request, block_id=None):
     View for the "On Air/Up Next" header summary of the schedule.
 
     """
-    return render(
+    return shortcuts.render(
         request,
         'schedule/header.html',
     )
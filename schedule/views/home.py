@@ -1,6 +1,6 @@
 """Home page schedule view."""
 
-from django.shortcuts import render
+from django import shortcuts
 
 
 def home_schedule(request, block_id=None):
@@ -8,7 +8,7 @@ def home_schedule(request, block_id=None):
 
     """
     # Uses template context now
-    return render(
+    return shortcuts.render(
         request,
         'schedule/home-schedule.html',
     )
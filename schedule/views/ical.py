@@ -0,0 +1,227 @@
+"""Views providing the schedule as iCalendar feeds.
+
+Feeds can cover a lot of timeslots (a long-running show's feed covers every
+season it has ever had), so they are streamed: timeslots are read from the
+database a page at a time (see export.pages), each page has its metadata
+fetched in bulk, and the calendar is written out as the pages arrive instead
+of being built up in memory first.
+
+Feeds also support conditional GET, so calendar clients polling them only
+receive a new copy when the timeslots in them change.
+"""
+
+import calendar as calendar_module
+import datetime
+
+from django.db.models import Count, Max
+from django.http import HttpResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from ..models import Show, Timeslot, TimeslotChange
+from ..utils import export, metadata
+
+
+# Number of timeslots to fetch, and prefetch metadata for, at once.
+PAGE_SIZE = 500
+
+# Default and maximum number of days covered by the schedule feed.
+DEFAULT_DAYS = 28
+MAX_DAYS = 366
+
+# Maximum line length, in octets, before folding (RFC 5545 section 3.1).
+MAX_LINE = 75
+
+ICAL_DATE = '%Y%m%dT%H%M%SZ'
+
+
+## VIEWS
+## Only actual views as referenced by URLconf should go here.
+## Remember to add them to __init__.py!
+
+def schedule_ical(request):
+    """An iCalendar feed of the public schedule over a window.
+
+    This takes the following GET parameters:
+
+    start - the first date in the window, as YYYY-MM-DD; defaults to today
+    days - the number of days in the window; defaults to DEFAULT_DAYS and may
+           be at most MAX_DAYS
+
+    Args:
+        request: the HTTP request this view is responding to.
+    """
+    return feed_view(request, schedule_timeslots(request), 'URY Schedule')
+
+
+def show_ical(request, pk):
+    """An iCalendar feed of every public timeslot of a show.
+
+    Args:
+        request: the HTTP request this view is responding to.
+        pk: the ID of the show.
+    """
+    show = get_object_or_404(Show.objects.public(), pk=pk)
+    metadata.prefetch_shows([show], keys=('title',))
+    return feed_view(
+        request,
+        Timeslot.objects.public().filter(season__show=show),
+        getattr(show, 'title', 'URY Show')
+    )
+
+
+## SUPPORTING FUNCTIONS
+##
+## Please DON'T export these through __init__.py
+## Only export the actual views that are reachable through URLconf
+## Thanks!
+
+def schedule_timeslots(request):
+    """Works out the timeslots covered by a schedule feed request."""
+    try:
+        start = (
+            datetime.datetime.strptime(request.GET['start'], '%Y-%m-%d')
+            if 'start' in request.GET
+            else timezone.localtime(timezone.now()).replace(tzinfo=None)
+        )
+        days = int(request.GET.get('days', DEFAULT_DAYS))
+    except ValueError:
+        raise Http404('Bad schedule feed window.')
+    if not 0 < days <= MAX_DAYS:
+        raise Http404('Bad schedule feed window.')
+
+    start = timezone.make_aware(
+        start.replace(hour=0, minute=0, second=0, microsecond=0),
+        timezone.get_current_timezone()
+    )
+    return Timeslot.objects.public().in_range(
+        start,
+        start + datetime.timedelta(days=days)
+    )
+
+
+def feed_view(request, timeslots, name):
+    """Responds with a streamed, conditional iCalendar feed.
+
+    Args:
+        request: the HTTP request being responded to.
+        timeslots: the Timeslot QuerySet to put in the feed.
+        name: the name of the calendar.
+    """
+    def respond(request):
+        response = HttpResponse(
+            calendar(request, timeslots, name),
+            content_type='text/calendar; charset=utf-8'
+        )
+        response['Content-Disposition'] = 'inline; filename=schedule.ics'
+        return response
+
+    return condition(etag_func=lambda request: feed_etag(timeslots))(
+        respond
+    )(request)
+
+
+def feed_etag(timeslots):
+    """Computes an ETag for a feed of the given timeslots.
+
+    The ETag changes whenever a timeslot is added to or removed from the
+    feed, a timeslot in the feed is changed (as logged by TimeslotChange),
+    or new metadata is given to the shows or seasons in the feed.  Changes
+    to timeslots in other feeds leave it alone.  It is worked out from the
+    database alone, so it does not change when caches are emptied.
+
+    Each part is its own query, as joining the timeslots to both metadata
+    tables at once would multiply the rows aggregated over.
+    """
+    summary = timeslots.aggregate(count=Count('pk'), last=Max('pk'))
+    changed = TimeslotChange.objects.filter(
+        timeslot_id__in=timeslots.values('pk')
+    ).aggregate(last=Max('pk'))
+    show_metadata = timeslots.aggregate(
+        last=Max('season__show__showtextmetadata__effective_from')
+    )
+    season_metadata = timeslots.aggregate(
+        last=Max('season__seasontextmetadata__effective_from')
+    )
+    return '{}-{}-{}-{}-{}'.format(
+        changed['last'],
+        summary['count'],
+        summary['last'],
+        epoch(show_metadata['last']),
+        epoch(season_metadata['last'])
+    )
+
+
+def epoch(date):
+    """Converts an aware datetime, or None, to a number for an ETag."""
+    return calendar_module.timegm(date.utctimetuple()) if date else 0
+
+
+def calendar(request, timeslots, name):
+    """Generates the lines of an iCalendar feed of the given timeslots."""
+    stamp = timezone.now().strftime(ICAL_DATE)
+    host = request.get_host()
+
+    yield line('BEGIN', 'VCALENDAR')
+    yield line('VERSION', '2.0')
+    yield line('PRODID', '-//University Radio York//LASS Schedule//EN')
+    yield line('X-WR-CALNAME', escape(name))
+
+    for page in export.pages(
+        timeslots.select_related('season__show__show_type'),
+        PAGE_SIZE
+    ):
+        metadata.prefetch_timeslots(page)
+        for slot in page:
+            for event_line in event(request, slot, stamp, host):
+                yield event_line
+
+    yield line('END', 'VCALENDAR')
+
+
+def event(request, slot, stamp, host):
+    """Generates the lines of the VEVENT for a timeslot."""
+    yield line('BEGIN', 'VEVENT')
+    yield line('UID', 'timeslot-{}@{}'.format(slot.pk, host))
+    yield line('DTSTAMP', stamp)
+    yield line('DTSTART', utc(slot.start_time))
+    yield line('DTEND', utc(slot.end_time))
+    yield line('SUMMARY', escape(getattr(slot, 'title', '')))
+    description = getattr(slot, 'description', None)
+    if description:
+        yield line('DESCRIPTION', escape(description))
+    yield line('URL', request.build_absolute_uri(slot.get_absolute_url()))
+    yield line('END', 'VEVENT')
+
+
+def utc(date):
+    """Formats an aware datetime as an iCalendar UTC date-time."""
+    return date.astimezone(timezone.utc).strftime(ICAL_DATE)
+
+
+def escape(text):
+    """Escapes text for use as an iCalendar TEXT value."""
+    return (
+        unicode(text)
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+
+def line(name, value):
+    """Makes a folded, CRLF-terminated iCalendar content line, as UTF-8."""
+    encoded = u'{}:{}'.format(name, value).encode('utf-8')
+    folded = []
+    while len(encoded) > MAX_LINE:
+        # Don't split UTF-8 sequences: back up to the start of a character.
+        cut = MAX_LINE if not folded else MAX_LINE - 1
+        while cut > 0 and (ord(encoded[cut]) & 0xC0) == 0x80:
+            cut -= 1
+        folded.append(encoded[:cut])
+        encoded = encoded[cut:]
+    folded.append(encoded)
+    return '\r\n '.join(folded) + '\r\n'
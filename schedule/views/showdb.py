@@ -2,12 +2,48 @@
 
 """
 
-from django.views.generic import DetailView
+from django.views.generic import DetailView, ListView
 from schedule.models import Show, Season, Timeslot
+from schedule.utils import metadata, profiling
 from django.shortcuts import get_object_or_404
 from django.http import Http404
 
 
+class ShowIndex(ListView):
+    """Lists the shows in the show database, with their metadata fetched
+    for the whole list at once.
+
+    """
+    queryset = Show.objects.listable()
+
+    def get_context_data(self, **kwargs):
+        context = super(ShowIndex, self).get_context_data(**kwargs)
+        # Listing the page fills the QuerySet's cache with the same shows
+        # the template will iterate over.
+        metadata.prefetch_shows(list(context['object_list']))
+        return context
+
+
+class ShowDetail(DetailView):
+    """Details a show in the show database.
+
+    """
+    queryset = Show.objects.listable()
+
+    def get_object(self, queryset=None):
+        show = super(ShowDetail, self).get_object(queryset)
+        metadata.prefetch_shows([show])
+        return show
+
+
+show_index = profiling.profiled(profiling.by_name('show_index'))(
+    ShowIndex.as_view()
+)
+show_detail = profiling.profiled(profiling.by_name('show_detail'))(
+    ShowDetail.as_view()
+)
+
+
 def relative_season(show_id, season_num):
     """Attempts to find the 'season_num'th season of the show with
     ID 'show_id', where the count starts from 0.
@@ -18,9 +54,11 @@ def relative_season(show_id, season_num):
         pk=show_id,
         show_type__has_showdb_entry=True
     )
-    return (show.season_set.all()[season_num]
-            if show.season_set.count() > season_num
-            else None)
+    try:
+        season = show.season_set.all()[season_num]
+    except IndexError:
+        season = None
+    return season
 
 
 def relative_timeslot(show_id, season_num, timeslot_num):
@@ -30,11 +68,14 @@ def relative_timeslot(show_id, season_num, timeslot_num):
 
     """
     season = relative_season(show_id, season_num)
-    return (season.timeslot_set.all()[timeslot_num]
-            if (season and season.timeslot_set.count() > timeslot_num)
-            else None)
+    try:
+        timeslot = season.timeslot_set.all()[timeslot_num] if season else None
+    except IndexError:
+        timeslot = None
+    return timeslot
 
 
+@profiling.profiled(profiling.by_name('season_detail_relative'))
 def season_detail(request, pk, season_num):
     """View detailing a show season.
 
@@ -48,6 +89,7 @@ def season_detail(request, pk, season_num):
     return DetailView.as_view(model=Season)(request, pk=season.pk)
 
 
+@profiling.profiled(profiling.by_name('timeslot_detail_relative'))
 def timeslot_detail(request, pk, season_num, timeslot_num):
     """View detailing a season timeslot.
 